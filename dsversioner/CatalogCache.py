@@ -0,0 +1,112 @@
+"""
+This module
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class CatalogCache:
+    """
+    This class keeps parsed catalog files, e.g. the versions or the metadata of a dataset, in memory.
+    An entry is valid as long as the file has the inode, modification time and size it had when it was parsed.
+    Catalogs are replaced by renaming a complete new file into place, so a key never belongs to a partly
+    written file.
+    The least recently used entries are evicted when more than max_entries entries or files of more than
+    max_size bytes in total are cached.
+    """
+
+    def __init__(self,
+                 max_entries: int = 128,
+                 max_size: int = 256 * 1024 * 1024):
+        self._max_entries = max_entries
+        self._max_size = max_size
+        # path -> ((inode, modification time, size), parsed content)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_entries(self) -> int:
+        """
+
+        :return:
+        """
+        return self._max_entries
+
+    @property
+    def max_size(self) -> int:
+        """
+
+        :return:
+        """
+        return self._max_size
+
+    def get(self,
+            path: Path,
+            load_function):
+        """
+        Returns the parsed content of the file, the file is parsed again if it changed since it was cached.
+        The parsed content is shared by all callers and must not be modified.
+
+        :param path:
+        :param load_function: callable which parses the file at path
+        :return: the return value of load_function
+        """
+        path = Path(path)
+        path_stat = os.stat(path)
+        key = (path_stat.st_ino, path_stat.st_mtime_ns, path_stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        content = load_function(path)
+
+        with self._lock:
+            self._remove(path=path)
+            if path_stat.st_size <= self._max_size:
+                self._entries[path] = (key, content)
+                self._size += path_stat.st_size
+                while len(self._entries) > self._max_entries or self._size > self._max_size:
+                    self._remove(path=next(iter(self._entries)))
+
+        return content
+
+    def invalidate(self,
+                   path: Path = None) -> None:
+        """
+        Removes the file from the cache, or all files if path is None. Files changed in place within the
+        resolution of the file system timestamps without changing their size have to be invalidated explicitly.
+
+        :param path:
+        :return:
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._size = 0
+            else:
+                self._remove(path=Path(path))
+
+    def _remove(self,
+                path: Path) -> None:
+        """
+
+        :param path:
+        :return:
+        """
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= entry[0][2]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# cache shared by all storages which are not given a cache of their own
+shared_catalog_cache = CatalogCache()
@@ -4,6 +4,7 @@ This module...
 import abc
 
 import pandas
+import pyarrow
 
 
 class DatasetRecordData(abc.ABC):
@@ -34,3 +35,18 @@ class PandasDatasetRecordData(DatasetRecordData):
         :return:
         """
         pass
+
+
+class ArrowDatasetRecordData(DatasetRecordData):
+    """
+    This class
+    """
+
+    @property
+    @abc.abstractmethod
+    def record_data(self) -> pyarrow.Table:
+        """
+
+        :return:
+        """
+        pass
@@ -54,3 +54,87 @@ class InvalidRecordStorageFormatException(Exception):
                  message: str = f"The specified storage format is invalid.") -> None:
         self.message = f"{message} Dataset: {dataset_name}"
         super().__init__(self.message)
+
+
+class ObjectDoesNotExistException(Exception):
+    def __init__(self,
+                 dataset_name: str,
+                 object_uri: str,
+                 message: str = "The object does not exist in the object storage.") -> None:
+        self.message = f"{message} Dataset name: {dataset_name}. Object uri: {object_uri}."
+        super().__init__(self.message)
+
+
+class ObjectTransferException(Exception):
+    def __init__(self,
+                 dataset_name: str,
+                 errors: dict,
+                 message: str = "The transfer of one or more objects failed.") -> None:
+        self.errors = errors
+        # only the first errors are part of the message, all errors are available in self.errors
+        details = "; ".join(f"{uri}: {error}" for uri, error in list(errors.items())[:10])
+        self.message = f"{message} Dataset name: {dataset_name}. Failed objects: {len(errors)}. Errors: {details}"
+        super().__init__(self.message)
+
+
+class CompressionCodecNotAvailableException(Exception):
+    def __init__(self,
+                 codec_name: str,
+                 message: str = "The compression codec is not available. Install the package which provides it.") -> None:
+        self.message = f"{message} Codec: {codec_name}."
+        super().__init__(self.message)
+
+
+class PartialRecordDataException(Exception):
+    def __init__(self,
+                 dataset_name: str,
+                 message: str = "The records were pulled filtered or projected, committing them drops the records "
+                                "and dimensions which were not pulled. Try commit(partial=True).") -> None:
+        self.message = f"{message} Dataset name: {dataset_name}."
+        super().__init__(self.message)
+
+
+class RefExistsException(Exception):
+    def __init__(self,
+                 dataset_name: str,
+                 ref_name: str,
+                 message: str = "The branch or tag already exists.") -> None:
+        self.message = f"{message} Dataset name: {dataset_name}. Ref: {ref_name}."
+        super().__init__(self.message)
+
+
+class RefDoesNotExistException(Exception):
+    def __init__(self,
+                 dataset_name: str,
+                 ref_name: str,
+                 message: str = "The branch or tag does not exist.") -> None:
+        self.message = f"{message} Dataset name: {dataset_name}. Ref: {ref_name}."
+        super().__init__(self.message)
+
+
+class RefChangedException(Exception):
+    def __init__(self,
+                 dataset_name: str,
+                 ref_name: str,
+                 message: str = "The head of the branch was moved by another commit. "
+                                "Pull the branch and commit again.") -> None:
+        self.message = f"{message} Dataset name: {dataset_name}. Ref: {ref_name}."
+        super().__init__(self.message)
+
+
+class BranchAmendException(Exception):
+    def __init__(self,
+                 dataset_name: str,
+                 ref_name: str,
+                 message: str = "Versions on branches are not amended. Commit a new version to the branch.") -> None:
+        self.message = f"{message} Dataset name: {dataset_name}. Ref: {ref_name}."
+        super().__init__(self.message)
+
+
+class InvalidRefNameException(Exception):
+    def __init__(self,
+                 dataset_name: str,
+                 ref_name: str,
+                 message: str = "The name is not a valid branch or tag name.") -> None:
+        self.message = f"{message} Dataset name: {dataset_name}. Ref: {ref_name}."
+        super().__init__(self.message)
@@ -0,0 +1,90 @@
+"""
+This module
+"""
+
+import os
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # not available on windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    # only available on windows
+    msvcrt = None
+
+
+class FileLock:
+    """
+    This class locks a lock file against other processes and other FileLock instances of the same process.
+    The lock is released when the lock file is closed, so locks of crashed processes do not have to be removed.
+    Shared locks are exclusive on windows.
+    """
+
+    def __init__(self,
+                 path: Path,
+                 shared: bool = False):
+        self._path = Path(path)
+        self._shared = shared
+        self._file_descriptor = None
+
+    @property
+    def path(self) -> Path:
+        """
+
+        :return:
+        """
+        return self._path
+
+    def acquire(self) -> None:
+        """
+        Blocks until the lock is acquired.
+
+        :return:
+        """
+        file_descriptor = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            if fcntl is not None:
+                fcntl.flock(file_descriptor, fcntl.LOCK_SH if self._shared else fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                while True:
+                    try:
+                        # retries for about 10 seconds before it fails
+                        msvcrt.locking(file_descriptor, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        pass
+        except BaseException:
+            os.close(file_descriptor)
+            raise
+
+        self._file_descriptor = file_descriptor
+
+    def release(self) -> None:
+        """
+
+        :return:
+        """
+        file_descriptor = self._file_descriptor
+        self._file_descriptor = None
+        if file_descriptor is None:
+            return
+
+        try:
+            if fcntl is not None:
+                fcntl.flock(file_descriptor, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                msvcrt.locking(file_descriptor, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(file_descriptor)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
@@ -0,0 +1,1014 @@
+"""
+This module
+"""
+
+import abc
+import hashlib
+import io
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import uuid
+from enum import Enum
+from pathlib import Path
+
+from .FileTransfer import ObjectTransferModes, transfer_file, get_commit_transfer_mode
+from .ObjectCompression import ObjectCompressionCodecs, CODEC_FILE_EXTENSIONS, compress_stream, decompress_stream
+from .Storage import ObjectAccessModes
+
+
+def hash_file(path: Path,
+              chunk_size: int = 1024 * 1024) -> str:
+    """
+
+    :param path:
+    :param chunk_size:
+    :return:
+    """
+    hash_object = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hash_object.update(chunk)
+    return hash_object.hexdigest()
+
+
+def _to_access_mode(data,
+                    access_mode: ObjectAccessModes):
+    """
+
+    :param data: bytes-like object with the content of an object
+    :param access_mode:
+    :return:
+    """
+    if access_mode is ObjectAccessModes.FILE:
+        return io.BytesIO(data)
+    if access_mode is ObjectAccessModes.MEMORYVIEW or len(data) == 0:
+        # empty objects can not be memory-mapped
+        return memoryview(data)
+
+    anonymous_map = mmap.mmap(-1, len(data))
+    anonymous_map.write(data)
+    anonymous_map.seek(0)
+    return anonymous_map
+
+
+def _open_decompressed(source,
+                       codec: ObjectCompressionCodecs,
+                       access_mode: ObjectAccessModes,
+                       length: int = None):
+    """
+
+    :param source: readable binary file object positioned at the start of the compressed object
+    :param codec:
+    :param access_mode:
+    :param length: number of compressed bytes, everything if None
+    :return:
+    """
+    # large objects are decompressed to disk instead of memory
+    decompressed = tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024)
+    decompress_stream(source=source, destination=decompressed, codec=codec, length=length)
+    decompressed.seek(0)
+
+    if access_mode is ObjectAccessModes.FILE:
+        return decompressed
+
+    with decompressed:
+        return _to_access_mode(data=decompressed.read(), access_mode=access_mode)
+
+
+def _open_mapped(path: Path,
+                 access_mode: ObjectAccessModes,
+                 offset: int = 0,
+                 length: int = None):
+    """
+
+    :param path: file containing the uncompressed object
+    :param access_mode: MEMORYVIEW or MMAP
+    :param offset:
+    :param length: object size, up to the end of the file if None
+    :return:
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if length is None:
+            length = size - offset
+        if length == 0:
+            return memoryview(b"")
+        file_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # a file map can only be returned as is if the object spans the whole file
+    if access_mode is ObjectAccessModes.MMAP and offset == 0 and length == size:
+        return file_map
+
+    view = memoryview(file_map)[offset:offset + length]
+    if access_mode is ObjectAccessModes.MEMORYVIEW:
+        return view
+
+    return _to_access_mode(data=view, access_mode=access_mode)
+
+
+def open_path(path: Path,
+              access_mode: ObjectAccessModes = ObjectAccessModes.FILE):
+    """
+
+    :param path: file containing an uncompressed object
+    :param access_mode:
+    :return:
+    """
+    if access_mode is ObjectAccessModes.FILE:
+        return open(path, "rb")
+
+    return _open_mapped(path=path, access_mode=access_mode)
+
+
+class ObjectStorageLayouts(Enum):
+    """
+    This enum
+
+    LOOSE: one file per object.
+    PACKED: objects are appended to large pack files with an offset index per pack.
+    SHARDED: one file per object, spread over two levels of hash-prefix directories (objects/ab/cd/abcd...).
+    """
+    LOOSE = 1
+    PACKED = 2
+    SHARDED = 3
+
+
+class FileSystemObjectStore(abc.ABC):
+    """
+    This class stores objects content-addressed by their hash, so every distinct object
+    is written only once regardless of how many dataset versions reference it. Objects are
+    identified by the hash of their uncompressed content and the codec they are stored with.
+    """
+
+    def __init__(self,
+                 storage_path: Path,
+                 transfer_mode: ObjectTransferModes = ObjectTransferModes.COPY):
+        self._storage_path = storage_path
+        self._transfer_mode = transfer_mode
+
+    @property
+    def storage_path(self) -> Path:
+        """
+
+        :return:
+        """
+        return self._storage_path
+
+    @property
+    def transfer_mode(self) -> ObjectTransferModes:
+        """
+
+        :return:
+        """
+        return self._transfer_mode
+
+    @abc.abstractmethod
+    def contains(self,
+                 object_hash: str,
+                 codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> bool:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return:
+        """
+        pass
+
+    @abc.abstractmethod
+    def write(self,
+              object_hash: str,
+              source_path: Path,
+              codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE,
+              compression_level: int = None) -> bool:
+        """
+
+        :param object_hash:
+        :param source_path: uncompressed object
+        :param codec:
+        :param compression_level:
+        :return: True if the object was written, False if the store already contained it
+        """
+        pass
+
+    @abc.abstractmethod
+    def read(self,
+             object_hash: str,
+             destination_path: Path,
+             codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> None:
+        """
+
+        :param object_hash:
+        :param destination_path: uncompressed object
+        :param codec:
+        :return:
+        """
+        pass
+
+    @abc.abstractmethod
+    def delete(self,
+               object_hash: str,
+               codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> None:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return:
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_stored_size(self,
+                        object_hash: str,
+                        codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> int:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return: number of bytes the object occupies in the store
+        """
+        pass
+
+    @abc.abstractmethod
+    def open(self,
+             object_hash: str,
+             codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE,
+             access_mode: ObjectAccessModes = ObjectAccessModes.FILE):
+        """
+
+        :param object_hash:
+        :param codec:
+        :param access_mode:
+        :return: uncompressed object as file object, memoryview or mmap depending on the access mode
+        """
+        pass
+
+    @abc.abstractmethod
+    def remove_unreferenced(self,
+                            referenced_hashes: set) -> None:
+        """
+        Removes all objects whose hashes are not referenced. Callers make sure that no object is written
+        meanwhile, an object which was just found in the store could be removed otherwise.
+
+        :param referenced_hashes:
+        :return:
+        """
+        pass
+
+    def locate_codec(self,
+                     object_hash: str) -> ObjectCompressionCodecs:
+        """
+
+        :param object_hash:
+        :return: codec of the stored object or None if the store does not contain the object
+        """
+        for codec in ObjectCompressionCodecs:
+            if self.contains(object_hash=object_hash, codec=codec):
+                return codec
+
+        return None
+
+    def flush(self) -> None:
+        """
+        Persists objects which were written but are not yet readable by other store instances.
+
+        :return:
+        """
+        pass
+
+    def refresh(self) -> None:
+        """
+        Makes objects which other store instances wrote since this store looked for them visible.
+
+        :return:
+        """
+        pass
+
+
+class LooseFileSystemObjectStore(FileSystemObjectStore):
+    """
+    This class stores every object in a file named after its hash.
+    """
+
+    directory_name = "objects"
+
+    def get_object_path(self,
+                        object_hash: str,
+                        codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> Path:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return:
+        """
+        return Path(self._storage_path, self.directory_name, f"{object_hash}{CODEC_FILE_EXTENSIONS[codec]}")
+
+    def contains(self,
+                 object_hash: str,
+                 codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> bool:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return:
+        """
+        return os.path.exists(self.get_object_path(object_hash=object_hash, codec=codec))
+
+    def write(self,
+              object_hash: str,
+              source_path: Path,
+              codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE,
+              compression_level: int = None) -> bool:
+        """
+
+        :param object_hash:
+        :param source_path: uncompressed object
+        :param codec:
+        :param compression_level:
+        :return: True if the object was written, False if the store already contained it
+        """
+        if self.contains(object_hash=object_hash, codec=codec):
+            return False
+
+        object_path = self.get_object_path(object_hash=object_hash, codec=codec)
+        os.makedirs(object_path.parent, exist_ok=True)
+
+        if codec is ObjectCompressionCodecs.NONE:
+            transfer_file(source_path=source_path,
+                          destination_path=object_path,
+                          transfer_mode=get_commit_transfer_mode(transfer_mode=self._transfer_mode))
+        else:
+            temporary_path = Path(object_path.parent, f".{object_path.name}.{uuid.uuid4().hex}.tmp")
+            with open(source_path, "rb") as source, open(temporary_path, "wb") as destination:
+                compress_stream(source=source, destination=destination, codec=codec, level=compression_level)
+            os.replace(temporary_path, object_path)
+
+        return True
+
+    def read(self,
+             object_hash: str,
+             destination_path: Path,
+             codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> None:
+        """
+
+        :param object_hash:
+        :param destination_path: uncompressed object
+        :param codec:
+        :return:
+        """
+        os.makedirs(destination_path.parent, exist_ok=True)
+        object_path = self.get_object_path(object_hash=object_hash, codec=codec)
+
+        if codec is ObjectCompressionCodecs.NONE:
+            transfer_file(source_path=object_path,
+                          destination_path=destination_path,
+                          transfer_mode=self._transfer_mode)
+        else:
+            temporary_path = Path(destination_path.parent, f".{destination_path.name}.{uuid.uuid4().hex}.tmp")
+            with open(object_path, "rb") as source, open(temporary_path, "wb") as destination:
+                decompress_stream(source=source, destination=destination, codec=codec)
+            os.replace(temporary_path, destination_path)
+
+    def delete(self,
+               object_hash: str,
+               codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> None:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return:
+        """
+        object_path = self.get_object_path(object_hash=object_hash, codec=codec)
+        if os.path.exists(object_path):
+            os.remove(object_path)
+
+    def open(self,
+             object_hash: str,
+             codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE,
+             access_mode: ObjectAccessModes = ObjectAccessModes.FILE):
+        """
+
+        :param object_hash:
+        :param codec:
+        :param access_mode:
+        :return:
+        """
+        object_path = self.get_object_path(object_hash=object_hash, codec=codec)
+
+        if codec is not ObjectCompressionCodecs.NONE:
+            with open(object_path, "rb") as source:
+                return _open_decompressed(source=source, codec=codec, access_mode=access_mode)
+
+        return open_path(path=object_path, access_mode=access_mode)
+
+    def get_stored_size(self,
+                        object_hash: str,
+                        codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> int:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return:
+        """
+        return os.path.getsize(self.get_object_path(object_hash=object_hash, codec=codec))
+
+    def remove_unreferenced(self,
+                            referenced_hashes: set) -> None:
+        """
+
+        :param referenced_hashes:
+        :return:
+        """
+        for directory_path, _, file_names in os.walk(Path(self._storage_path, self.directory_name)):
+            for file_name in file_names:
+                # temporary files of running writers start with a dot
+                if file_name.startswith("."):
+                    continue
+                if file_name.split(".", 1)[0] not in referenced_hashes:
+                    os.remove(Path(directory_path, file_name))
+
+
+class ShardedFileSystemObjectStore(LooseFileSystemObjectStore):
+    """
+    This class stores every object in a file named after its hash below directories named after
+    the leading characters of the hash, so no directory holds more than a fraction of the objects.
+    """
+
+    shard_levels = 2
+    shard_width = 2
+
+    def get_object_path(self,
+                        object_hash: str,
+                        codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> Path:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return:
+        """
+        shards = [object_hash[level * self.shard_width:(level + 1) * self.shard_width] for
+                  level in range(self.shard_levels)]
+        return Path(self._storage_path, self.directory_name, *shards, f"{object_hash}{CODEC_FILE_EXTENSIONS[codec]}")
+
+
+class PackIndex:
+    """
+    This class reads the offset index of a pack file. The index is a sorted array of
+    fixed size (digest, codec, offset, length) records, so lookups are binary searches on the
+    memory-mapped file and the index is never parsed as a whole.
+    """
+
+    magic = b"DSVIDX01"
+    record = struct.Struct(">32sBQQ")
+
+    def __init__(self,
+                 path: Path):
+        self._path = path
+        with open(path, "rb") as f:
+            magic = f.read(len(self.magic))
+            if magic != self.magic:
+                raise ValueError(f"{path} is not a pack index.")
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._count = (len(self._data) - len(self.magic)) // self.record.size
+
+    @property
+    def path(self) -> Path:
+        """
+
+        :return:
+        """
+        return self._path
+
+    def _get_record(self,
+                    position: int) -> tuple:
+        """
+
+        :param position:
+        :return: (digest, codec value, offset, length)
+        """
+        return self.record.unpack_from(self._data, len(self.magic) + position * self.record.size)
+
+    def find(self,
+             digest: bytes,
+             codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> tuple:
+        """
+
+        :param digest:
+        :param codec:
+        :return: (offset, length) of the object in the pack or None
+        """
+        key = (digest, codec.value)
+        low = 0
+        high = self._count
+        while low < high:
+            middle = (low + high) // 2
+            record_digest, record_codec, offset, length = self._get_record(position=middle)
+            record_key = (record_digest, record_codec)
+            if record_key == key:
+                return offset, length
+            if record_key < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return None
+
+    def __iter__(self):
+        for position in range(self._count):
+            yield self._get_record(position=position)
+
+    def __len__(self):
+        return self._count
+
+    def close(self) -> None:
+        """
+
+        :return:
+        """
+        self._data.close()
+
+    @classmethod
+    def write(cls,
+              path: Path,
+              entries: dict) -> None:
+        """
+
+        :param path:
+        :param entries: (digest, codec value) -> (offset, length)
+        :return:
+        """
+        temporary_path = Path(path.parent, f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(temporary_path, "wb") as f:
+            f.write(cls.magic)
+            for digest, codec_value in sorted(entries):
+                offset, length = entries[(digest, codec_value)]
+                f.write(cls.record.pack(digest, codec_value, offset, length))
+        os.replace(temporary_path, path)
+
+
+class PackObjectReader(io.RawIOBase):
+    """
+    This class reads a single object of a pack file as if it was a file of its own.
+    """
+
+    def __init__(self,
+                 pack_path: Path,
+                 offset: int,
+                 length: int):
+        super().__init__()
+        self._file = open(pack_path, "rb")
+        self._offset = offset
+        self._length = length
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self,
+             offset: int,
+             whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        else:
+            position = self._length + offset
+        self._position = max(0, min(position, self._length))
+        return self._position
+
+    def readinto(self,
+                 buffer) -> int:
+        size = min(len(buffer), self._length - self._position)
+        if size <= 0:
+            return 0
+        self._file.seek(self._offset + self._position)
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._position += read
+        return read
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+class PackedFileSystemObjectStore(FileSystemObjectStore):
+    """
+    This class appends objects to pack files. A pack is readable once its index exists,
+    packs without index are incomplete and ignored. Packs written by other processes or store
+    instances are found by scanning the pack directory again when an object is not found, at most
+    once until the next flush() or refresh(). Objects which must exist are always looked for again.
+    Objects are never removed from a pack, delete() does not free any space. repack() rewrites
+    the packs with the objects that are still referenced.
+    """
+
+    directory_name = "packs"
+    pack_file_extension = ".pack"
+    index_file_extension = ".idx"
+    copy_chunk_size = 1024 * 1024
+
+    def __init__(self,
+                 storage_path: Path,
+                 transfer_mode: ObjectTransferModes = ObjectTransferModes.COPY,
+                 max_pack_size: int = 1024 * 1024 * 1024):
+        super().__init__(storage_path=storage_path, transfer_mode=transfer_mode)
+        self._max_pack_size = max_pack_size
+        self._lock = threading.RLock()
+        self._pack_indexes = None
+        self._is_refreshed = False
+        self._pending_pack = None
+        self._pending_pack_path = None
+        self._pending_entries = {}
+
+    @property
+    def packs_path(self) -> Path:
+        """
+
+        :return:
+        """
+        return Path(self._storage_path, self.directory_name)
+
+    def _get_pack_indexes(self) -> list:
+        if self._pack_indexes is None:
+            self._pack_indexes = []
+            self._refresh_pack_indexes()
+        return self._pack_indexes
+
+    def _refresh_pack_indexes(self) -> list:
+        """
+        Loads the indexes of packs written since the pack directory was scanned last and
+        forgets the indexes of packs removed by a repack in the meantime.
+
+        :return: newly loaded indexes
+        """
+        try:
+            index_paths = {Path(self.packs_path, entry.name) for entry in os.scandir(self.packs_path) if
+                           entry.name.endswith(self.index_file_extension) and not entry.name.startswith(".")}
+        except FileNotFoundError:
+            index_paths = set()
+
+        pack_indexes = []
+        for pack_index in self._get_pack_indexes():
+            if pack_index.path in index_paths:
+                pack_indexes.append(pack_index)
+            else:
+                pack_index.close()
+
+        known_index_paths = {pack_index.path for pack_index in pack_indexes}
+        new_pack_indexes = []
+        for index_path in sorted(index_paths - known_index_paths):
+            try:
+                new_pack_indexes.append(PackIndex(path=index_path))
+            except FileNotFoundError:
+                # removed by a repack after the scan
+                pass
+
+        self._pack_indexes = pack_indexes + new_pack_indexes
+        self._is_refreshed = True
+        return new_pack_indexes
+
+    def _locate(self,
+                object_hash: str,
+                codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> tuple:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return: (pack path, offset, length) or None
+        """
+        digest = bytes.fromhex(object_hash)
+        with self._lock:
+            if (digest, codec.value) in self._pending_entries:
+                self._pending_pack.flush()
+                return (self._pending_pack_path,) + self._pending_entries[(digest, codec.value)]
+
+            for pack_indexes in (self._get_pack_indexes(), None):
+                # packs of other writers are only looked for if the known packs do not contain the object,
+                # a batch of writes scans the pack directory once instead of once per new object
+                if pack_indexes is None:
+                    if self._is_refreshed:
+                        break
+                    pack_indexes = self._refresh_pack_indexes()
+                for pack_index in pack_indexes:
+                    location = pack_index.find(digest=digest, codec=codec)
+                    if location is not None:
+                        return (pack_index.path.with_suffix(self.pack_file_extension),) + location
+
+        return None
+
+    def _locate_existing(self,
+                         object_hash: str,
+                         codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> tuple:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return: (pack path, offset, length)
+        """
+        location = self._locate(object_hash=object_hash, codec=codec)
+        if location is None:
+            self.refresh()
+            location = self._locate(object_hash=object_hash, codec=codec)
+        if location is None:
+            raise FileNotFoundError(f"Object {object_hash} is not part of any pack.")
+
+        return location
+
+    def _read_located(self,
+                      object_hash: str,
+                      codec: ObjectCompressionCodecs,
+                      function):
+        """
+        Calls the function with the location of the object. The pack may have been removed by a repack
+        of another store instance, the object is then looked for again in the packs which replaced it.
+
+        :param object_hash:
+        :param codec:
+        :param function: function of the pack path, offset and length
+        :return: result of the function
+        """
+        try:
+            return function(*self._locate_existing(object_hash=object_hash, codec=codec))
+        except FileNotFoundError:
+            self.refresh()
+            return function(*self._locate_existing(object_hash=object_hash, codec=codec))
+
+    def contains(self,
+                 object_hash: str,
+                 codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> bool:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return:
+        """
+        return self._locate(object_hash=object_hash, codec=codec) is not None
+
+    def _append(self,
+                digest: bytes,
+                codec: ObjectCompressionCodecs,
+                source,
+                length: int) -> None:
+        # start a new pack once the pending one would grow beyond the maximum size
+        if self._pending_pack is not None and self._pending_pack.tell() + length > self._max_pack_size:
+            self._finish_pending_pack()
+
+        if self._pending_pack is None:
+            os.makedirs(self.packs_path, exist_ok=True)
+            self._pending_pack_path = Path(self.packs_path, f"pack-{uuid.uuid4().hex}{self.pack_file_extension}")
+            self._pending_pack = open(self._pending_pack_path, "wb")
+
+        offset = self._pending_pack.tell()
+        remaining = length
+        while remaining > 0:
+            chunk = source.read(min(self.copy_chunk_size, remaining))
+            if not chunk:
+                break
+            self._pending_pack.write(chunk)
+            remaining -= len(chunk)
+
+        self._pending_entries[(digest, codec.value)] = (offset, self._pending_pack.tell() - offset)
+
+    def _finish_pending_pack(self) -> None:
+        if self._pending_pack is None:
+            return
+
+        self._pending_pack.flush()
+        os.fsync(self._pending_pack.fileno())
+        self._pending_pack.close()
+
+        # the pack becomes visible to readers with its index
+        index_path = self._pending_pack_path.with_suffix(self.index_file_extension)
+        PackIndex.write(path=index_path, entries=self._pending_entries)
+        self._get_pack_indexes().append(PackIndex(path=index_path))
+
+        self._pending_pack = None
+        self._pending_pack_path = None
+        self._pending_entries = {}
+
+    def write(self,
+              object_hash: str,
+              source_path: Path,
+              codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE,
+              compression_level: int = None) -> bool:
+        """
+
+        :param object_hash:
+        :param source_path: uncompressed object
+        :param codec:
+        :param compression_level:
+        :return: True if the object was written, False if the store already contained it
+        """
+        if self.contains(object_hash=object_hash, codec=codec):
+            return False
+
+        if codec is ObjectCompressionCodecs.NONE:
+            with self._lock:
+                if self.contains(object_hash=object_hash, codec=codec):
+                    return False
+                with open(source_path, "rb") as source:
+                    self._append(digest=bytes.fromhex(object_hash),
+                                 codec=codec,
+                                 source=source,
+                                 length=os.fstat(source.fileno()).st_size)
+            return True
+
+        # compress outside the lock, so objects are compressed in parallel and only appended one at a time
+        os.makedirs(self.packs_path, exist_ok=True)
+        temporary_path = Path(self.packs_path, f".{object_hash}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(source_path, "rb") as source, open(temporary_path, "wb") as destination:
+                compress_stream(source=source, destination=destination, codec=codec, level=compression_level)
+
+            with self._lock:
+                if self.contains(object_hash=object_hash, codec=codec):
+                    return False
+                with open(temporary_path, "rb") as source:
+                    self._append(digest=bytes.fromhex(object_hash),
+                                 codec=codec,
+                                 source=source,
+                                 length=os.fstat(source.fileno()).st_size)
+        finally:
+            os.remove(temporary_path)
+
+        return True
+
+    def read(self,
+             object_hash: str,
+             destination_path: Path,
+             codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> None:
+        """
+
+        :param object_hash:
+        :param destination_path: uncompressed object
+        :param codec:
+        :return:
+        """
+        os.makedirs(destination_path.parent, exist_ok=True)
+        temporary_path = Path(destination_path.parent, f".{destination_path.name}.{uuid.uuid4().hex}.tmp")
+
+        def read_object(pack_path: Path,
+                        offset: int,
+                        length: int) -> None:
+            with open(pack_path, "rb") as source, open(temporary_path, "wb") as destination:
+                source.seek(offset)
+                if codec is ObjectCompressionCodecs.NONE:
+                    remaining = length
+                    while remaining > 0:
+                        chunk = source.read(min(self.copy_chunk_size, remaining))
+                        if not chunk:
+                            break
+                        destination.write(chunk)
+                        remaining -= len(chunk)
+                else:
+                    decompress_stream(source=source, destination=destination, codec=codec, length=length)
+
+        self._read_located(object_hash=object_hash, codec=codec, function=read_object)
+        os.replace(temporary_path, destination_path)
+
+    def delete(self,
+               object_hash: str,
+               codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> None:
+        """
+        Does nothing, objects are not removed from packs individually. The object stays readable and
+        keeps occupying its pack until repack() rewrites the packs without it.
+
+        :param object_hash:
+        :param codec:
+        :return:
+        """
+        pass
+
+    def open(self,
+             object_hash: str,
+             codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE,
+             access_mode: ObjectAccessModes = ObjectAccessModes.FILE):
+        """
+
+        :param object_hash:
+        :param codec:
+        :param access_mode:
+        :return:
+        """
+        def open_object(pack_path: Path,
+                        offset: int,
+                        length: int):
+            if codec is not ObjectCompressionCodecs.NONE:
+                with open(pack_path, "rb") as source:
+                    source.seek(offset)
+                    return _open_decompressed(source=source, codec=codec, access_mode=access_mode, length=length)
+
+            if access_mode is ObjectAccessModes.FILE:
+                return io.BufferedReader(PackObjectReader(pack_path=pack_path, offset=offset, length=length))
+
+            return _open_mapped(path=pack_path, access_mode=access_mode, offset=offset, length=length)
+
+        return self._read_located(object_hash=object_hash, codec=codec, function=open_object)
+
+    def get_stored_size(self,
+                        object_hash: str,
+                        codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE) -> int:
+        """
+
+        :param object_hash:
+        :param codec:
+        :return:
+        """
+        pack_path, offset, length = self._locate_existing(object_hash=object_hash, codec=codec)
+        return length
+
+    def remove_unreferenced(self,
+                            referenced_hashes: set) -> None:
+        """
+
+        :param referenced_hashes:
+        :return:
+        """
+        self.repack(referenced_hashes=referenced_hashes)
+
+    def flush(self) -> None:
+        """
+
+        :return:
+        """
+        with self._lock:
+            self._finish_pending_pack()
+            self._is_refreshed = False
+
+    def refresh(self) -> None:
+        """
+
+        :return:
+        """
+        with self._lock:
+            self._refresh_pack_indexes()
+
+    def repack(self,
+               referenced_hashes: set) -> None:
+        """
+        Rewrites all packs so that they only contain the referenced objects. Callers make sure that no
+        other store instance writes meanwhile, readers of removed packs find the objects in the new packs.
+
+        :param referenced_hashes:
+        :return:
+        """
+        with self._lock:
+            self._finish_pending_pack()
+
+            self._refresh_pack_indexes()
+            old_pack_indexes = list(self._pack_indexes)
+            self._pack_indexes = []
+            referenced_digests = {bytes.fromhex(object_hash) for object_hash in referenced_hashes}
+            repacked_keys = set()
+
+            for pack_index in old_pack_indexes:
+                with open(pack_index.path.with_suffix(self.pack_file_extension), "rb") as source:
+                    for digest, codec_value, offset, length in pack_index:
+                        if digest not in referenced_digests or (digest, codec_value) in repacked_keys:
+                            continue
+                        source.seek(offset)
+                        self._append(digest=digest,
+                                     codec=ObjectCompressionCodecs(codec_value),
+                                     source=source,
+                                     length=length)
+                        repacked_keys.add((digest, codec_value))
+
+            self._finish_pending_pack()
+
+            for pack_index in old_pack_indexes:
+                pack_index.close()
+                os.remove(pack_index.path.with_suffix(self.pack_file_extension))
+                os.remove(pack_index.path)
+
+
+def create_object_store(storage_path: Path,
+                        layout: ObjectStorageLayouts = ObjectStorageLayouts.LOOSE,
+                        transfer_mode: ObjectTransferModes = ObjectTransferModes.COPY,
+                        max_pack_size: int = 1024 * 1024 * 1024) -> FileSystemObjectStore:
+    """
+
+    :param storage_path:
+    :param layout:
+    :param transfer_mode:
+    :param max_pack_size:
+    :return:
+    """
+    if layout is ObjectStorageLayouts.PACKED:
+        return PackedFileSystemObjectStore(storage_path=storage_path,
+                                           transfer_mode=transfer_mode,
+                                           max_pack_size=max_pack_size)
+
+    if layout is ObjectStorageLayouts.SHARDED:
+        return ShardedFileSystemObjectStore(storage_path=storage_path,
+                                            transfer_mode=transfer_mode)
+
+    return LooseFileSystemObjectStore(storage_path=storage_path,
+                                      transfer_mode=transfer_mode)
@@ -0,0 +1,196 @@
+"""
+This module
+"""
+
+import contextlib
+import errno
+import os
+import shutil
+import stat
+import uuid
+from enum import Enum
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # not available on windows
+    fcntl = None
+
+# linux ioctl request which clones the extents of one file into another (reflink)
+FICLONE = 0x40049409
+
+# errors which indicate that a transfer mode is not supported for the given files
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+    errno.EMLINK,
+    errno.ENOTSOCK,
+}
+
+
+class ObjectTransferModes(Enum):
+    """
+    This enum
+
+    COPY: copy the file through user space.
+    KERNEL_COPY: copy the file inside the kernel with copy_file_range or sendfile.
+    REFLINK: share the data blocks of the file on copy-on-write file systems (btrfs, xfs, ...).
+    HARDLINK: link the file into place. Only used to pull objects, commits copy with REFLINK instead,
+        because a linked working file would let in place modifications change the stored object.
+        Pulled files share their data with the object storage and are made read-only, they must
+        not be modified in place (e.g. after a chmod), but only replaced by writing a new file.
+
+    Every mode falls back to the next simpler one if the file system does not support it.
+    """
+    COPY = 1
+    KERNEL_COPY = 2
+    REFLINK = 3
+    HARDLINK = 4
+
+
+def _copy(source_path: Path,
+          destination_path: Path) -> None:
+    shutil.copyfile(source_path, destination_path)
+
+
+def _kernel_copy(source_path: Path,
+                 destination_path: Path) -> None:
+    copy_function = getattr(os, "copy_file_range", None) or getattr(os, "sendfile", None)
+    if copy_function is None:
+        raise OSError(errno.ENOSYS, "kernel side copies are not supported")
+
+    with open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+        remaining = os.fstat(source.fileno()).st_size
+        offset = 0
+        while remaining > 0:
+            if copy_function is os.sendfile:
+                copied = os.sendfile(destination.fileno(), source.fileno(), offset, remaining)
+            else:
+                copied = os.copy_file_range(source.fileno(), destination.fileno(), remaining)
+            if copied == 0:
+                break
+            offset += copied
+            remaining -= copied
+
+
+def _reflink(source_path: Path,
+             destination_path: Path) -> None:
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "reflinks are not supported")
+
+    with open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+        fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+
+
+def _hardlink(source_path: Path,
+              destination_path: Path) -> None:
+    os.link(source_path, destination_path)
+    # the file is shared from now on, in place modifications would change every linked copy
+    mode = os.stat(destination_path).st_mode
+    os.chmod(destination_path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+_TRANSFER_FUNCTIONS = {
+    ObjectTransferModes.COPY: (_copy,),
+    ObjectTransferModes.KERNEL_COPY: (_kernel_copy, _copy),
+    ObjectTransferModes.REFLINK: (_reflink, _kernel_copy, _copy),
+    ObjectTransferModes.HARDLINK: (_hardlink, _copy),
+}
+
+
+def get_commit_transfer_mode(transfer_mode: ObjectTransferModes) -> ObjectTransferModes:
+    """
+    Returns the mode used to transfer working files into the object storage. Working files are
+    writable by the user, so they are never linked into the storage.
+
+    :param transfer_mode:
+    :return:
+    """
+    if transfer_mode is ObjectTransferModes.HARDLINK:
+        return ObjectTransferModes.REFLINK
+
+    return transfer_mode
+
+
+def transfer_file(source_path: Path,
+                  destination_path: Path,
+                  transfer_mode: ObjectTransferModes = ObjectTransferModes.COPY) -> None:
+    """
+    Transfers the source file to the destination path, replacing an existing destination atomically.
+
+    :param source_path:
+    :param destination_path:
+    :param transfer_mode:
+    :return:
+    """
+    destination_path = Path(destination_path)
+    temporary_path = Path(destination_path.parent, f".{destination_path.name}.{uuid.uuid4().hex}.tmp")
+
+    transfer_functions = _TRANSFER_FUNCTIONS[transfer_mode]
+    for index, transfer_function in enumerate(transfer_functions):
+        try:
+            transfer_function(source_path, temporary_path)
+            break
+        except OSError as e:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            # the last mode has no fallback
+            if e.errno not in _UNSUPPORTED_ERRNOS or index == len(transfer_functions) - 1:
+                raise
+
+    os.replace(temporary_path, destination_path)
+
+
+@contextlib.contextmanager
+def replacing(path: Path):
+    """
+    Yields a temporary path which is renamed to the path once the block completes, so readers see either
+    the previous or the complete new file, also if the writer is interrupted. Readers which have the
+    previous file open or memory mapped keep a consistent view of it.
+
+    :param path:
+    :return:
+    """
+    path = Path(path)
+    temporary_path = Path(path.parent, f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        yield temporary_path
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+    os.replace(temporary_path, path)
+
+
+def write_replacing(path: Path,
+                    write_function) -> None:
+    """
+
+    :param path:
+    :param write_function: called with the temporary path, see replacing()
+    :return:
+    """
+    with replacing(path=path) as temporary_path:
+        write_function(temporary_path)
+
+
+def write_text_replacing(path: Path,
+                         content: str) -> None:
+    """
+
+    :param path:
+    :param content:
+    :return:
+    """
+    def write(temporary_path: Path) -> None:
+        with open(temporary_path, "w") as f:
+            f.write(content)
+
+    write_replacing(path=path, write_function=write)
@@ -0,0 +1,126 @@
+"""
+This module
+"""
+
+import lzma
+import zlib
+from enum import Enum
+
+try:
+    import zstandard
+except ImportError:
+    # zstd compression is optional
+    zstandard = None
+
+from .Exceptions import CompressionCodecNotAvailableException
+
+
+class ObjectCompressionCodecs(Enum):
+    """
+    This enum
+    """
+    NONE = 0
+    ZLIB = 1
+    LZMA = 2
+    ZSTD = 3
+
+
+# file extension of objects stored with the codec
+CODEC_FILE_EXTENSIONS = {
+    ObjectCompressionCodecs.NONE: "",
+    ObjectCompressionCodecs.ZLIB: ".zlib",
+    ObjectCompressionCodecs.LZMA: ".xz",
+    ObjectCompressionCodecs.ZSTD: ".zst",
+}
+
+# objects with these extensions are already compressed and are stored as they are
+DEFAULT_UNCOMPRESSED_FILE_EXTENSIONS = frozenset({
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".heic", ".jp2",
+    ".mp3", ".aac", ".ogg", ".opus", ".flac", ".mp4", ".mkv", ".webm", ".avi", ".mov",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".lz4", ".zst", ".7z", ".rar",
+    ".parquet", ".npz", ".pdf",
+})
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def is_codec_available(codec: ObjectCompressionCodecs) -> bool:
+    """
+
+    :param codec:
+    :return:
+    """
+    if codec is ObjectCompressionCodecs.ZSTD:
+        return zstandard is not None
+
+    return True
+
+
+def _get_compressor(codec: ObjectCompressionCodecs,
+                    level: int = None):
+    if codec is ObjectCompressionCodecs.ZLIB:
+        return zlib.compressobj(level if level is not None else zlib.Z_DEFAULT_COMPRESSION)
+    if codec is ObjectCompressionCodecs.LZMA:
+        return lzma.LZMACompressor(preset=level)
+    if codec is ObjectCompressionCodecs.ZSTD:
+        if zstandard is None:
+            raise CompressionCodecNotAvailableException(codec_name=codec.name)
+        return zstandard.ZstdCompressor(level=level if level is not None else 3).compressobj()
+
+    raise CompressionCodecNotAvailableException(codec_name=codec.name)
+
+
+def _get_decompressor(codec: ObjectCompressionCodecs):
+    if codec is ObjectCompressionCodecs.ZLIB:
+        return zlib.decompressobj()
+    if codec is ObjectCompressionCodecs.LZMA:
+        return lzma.LZMADecompressor()
+    if codec is ObjectCompressionCodecs.ZSTD:
+        if zstandard is None:
+            raise CompressionCodecNotAvailableException(codec_name=codec.name)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    raise CompressionCodecNotAvailableException(codec_name=codec.name)
+
+
+def compress_stream(source,
+                    destination,
+                    codec: ObjectCompressionCodecs,
+                    level: int = None) -> None:
+    """
+
+    :param source: readable binary file object
+    :param destination: writable binary file object
+    :param codec:
+    :param level:
+    :return:
+    """
+    compressor = _get_compressor(codec=codec, level=level)
+    for chunk in iter(lambda: source.read(COPY_CHUNK_SIZE), b""):
+        destination.write(compressor.compress(chunk))
+    destination.write(compressor.flush())
+
+
+def decompress_stream(source,
+                      destination,
+                      codec: ObjectCompressionCodecs,
+                      length: int = None) -> None:
+    """
+
+    :param source: readable binary file object
+    :param destination: writable binary file object
+    :param codec:
+    :param length: number of compressed bytes to read from the source, everything if None
+    :return:
+    """
+    decompressor = _get_decompressor(codec=codec)
+    remaining = length
+    while remaining is None or remaining > 0:
+        chunk = source.read(COPY_CHUNK_SIZE if remaining is None else min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        destination.write(decompressor.decompress(chunk))
+        if remaining is not None:
+            remaining -= len(chunk)
+    if hasattr(decompressor, "flush"):
+        destination.write(decompressor.flush())
@@ -8,11 +8,15 @@ import uuid
 from pathlib import Path
 
 from .Dataset import Dataset
+from .ObjectDatasetDiff import ObjectDatasetDiff
 from .ObjectDatasetMetadata import ObjectDatasetMetadata
 from .ObjectDatasetRecordData import ObjectDatasetRecordData
 from .ObjectDatasetStorage import ObjectDatasetVersionStorage, ObjectDatasetMetadataStorage, \
-    ObjectDatasetRecordStorage, ObjectDatasetObjectStorage
+    ObjectDatasetRecordStorage, ObjectDatasetObjectStorage, ObjectDatasetRefStorage
+from .Exceptions import RefDoesNotExistException, RefChangedException, PartialRecordDataException, \
+    BranchAmendException
 from .ObjectDatasetVersion import ObjectDatasetVersion
+from .Storage import ObjectAccessModes
 
 
 class ObjectDataset(Dataset):
@@ -30,6 +34,7 @@ class ObjectDataset(Dataset):
                  record_data: ObjectDatasetRecordData,
                  metadata: ObjectDatasetMetadata = None,
                  version: ObjectDatasetVersion = None,
+                 ref_storage: ObjectDatasetRefStorage = None,
                  ):
         self._name = name
         self._version = version
@@ -47,6 +52,15 @@ class ObjectDataset(Dataset):
         self._version_storage = version_storage
         self._metadata_storage = metadata_storage
         self._record_storage = record_storage
+        # branches and tags are optional
+        self._ref_storage = ref_storage
+
+        # branch which is advanced by commits and its head when it was pulled or committed last
+        self._branch = None
+        self._branch_head = None
+
+        # records pulled with a filter or projection are only a part of their version
+        self._is_partial = False
 
     @property
     def record_data(self) -> ObjectDatasetRecordData:
@@ -88,6 +102,14 @@ class ObjectDataset(Dataset):
         """
         return self._metadata
 
+    @property
+    def branch(self) -> str:
+        """
+
+        :return: branch which is advanced by commits, None if no branch was pulled or committed to
+        """
+        return self._branch
+
     def init(self,
              index_dimension_name: str = "id",
              uri_dimension_name: str = "uri"
@@ -100,6 +122,8 @@ class ObjectDataset(Dataset):
         self._metadata_storage.init(dataset_name=self.name)
         self._object_storage.init(dataset_name=self.name)
         self._record_storage.init(dataset_name=self.name)
+        if self._ref_storage is not None:
+            self._ref_storage.init(dataset_name=self.name)
 
     def add(self,
             record_data: ObjectDatasetRecordData = None) -> None:
@@ -112,14 +136,49 @@ class ObjectDataset(Dataset):
 
     def commit(self,
                version: ObjectDatasetVersion = None,
-               amend: bool = False) -> ObjectDatasetVersion:
+               amend: bool = False,
+               branch: str = None,
+               partial: bool = False) -> ObjectDatasetVersion:
         """
+        Commits to a branch if a branch is given or was pulled, otherwise the version is only part of the
+        history of the dataset. Versions on branches are not amended, a new version is committed to the
+        branch instead.
 
         :param version:
-        :param amend:
+        :param amend: replaces the latest version of the dataset, not possible on a branch
+        :param branch: branch which is advanced to the committed version, created if it does not exist
+        :param partial: commits records pulled with a filter or projection as the complete version, the
+            records and dimensions which were not pulled are not part of it
         :return:
         """
 
+        if self._is_partial and not partial:
+            raise PartialRecordDataException(dataset_name=self.name)
+
+        if branch is None:
+            branch = self._branch
+        if branch is not None:
+            if amend:
+                raise BranchAmendException(dataset_name=self.name, ref_name=branch)
+
+            return self._commit_to_branch(version=version,
+                                          branch=branch,
+                                          partial=partial)
+
+        return self._commit_version(version=version,
+                                    amend=amend)
+
+    def _commit_version(self,
+                        version: ObjectDatasetVersion,
+                        amend: bool,
+                        branch: str = None) -> ObjectDatasetVersion:
+        """
+
+        :param version:
+        :param amend:
+        :param branch: branch whose journal the version storage appends the version to
+        :return:
+        """
         if version is None:
             seed = str(uuid.uuid4())
             hash_object = hashlib.sha512(bytes(seed, 'utf-8'))
@@ -128,7 +187,8 @@ class ObjectDataset(Dataset):
 
         committed_version = self._version_storage.commit(dataset_name=self.name,
                                                          dataset_version=version,
-                                                         amend=amend)
+                                                         amend=amend,
+                                                         branch=branch)
 
         self._record_storage.commit(dataset_name=self.name,
                                     dataset_version=committed_version,
@@ -148,16 +208,75 @@ class ObjectDataset(Dataset):
                                       amend=amend)
 
         self._version = committed_version
+        self._is_partial = False
+        return committed_version
+
+    def _commit_to_branch(self,
+                          version: ObjectDatasetVersion,
+                          branch: str,
+                          partial: bool) -> ObjectDatasetVersion:
+        """
+        The version storage appends the version to the journal of the branch and serializes only the
+        assignment of ids, so commits to different branches write their versions, records and objects
+        in parallel.
+
+        :param version:
+        :param branch:
+        :param partial:
+        :return:
+        """
+        ref_storage = self._get_ref_storage()
+
+        # the head is compared with the pulled head, so commits of others to the branch are not overwritten
+        expected_head = self._branch_head if branch == self._branch else \
+            ref_storage.get_branch(dataset_name=self.name, branch_name=branch)
+
+        # fails before anything is written if the branch was already moved
+        current_head = ref_storage.get_branch(dataset_name=self.name, branch_name=branch)
+        if (current_head is None) != (expected_head is None) or \
+                (current_head is not None and current_head.id != expected_head.id):
+            raise RefChangedException(dataset_name=self.name, ref_name=branch)
+
+        # if the branch is moved while the version is written, the version stays available by its id
+        committed_version = self._commit_version(version=version, amend=False, branch=branch)
+
+        ref_storage.update_branch(dataset_name=self.name,
+                                  branch_name=branch,
+                                  dataset_version=committed_version,
+                                  expected_version=expected_head)
+
+        self._branch = branch
+        self._branch_head = committed_version
         return committed_version
 
     def pull(self,
-             version: ObjectDatasetVersion = None) -> None:
+             version: ObjectDatasetVersion = None,
+             record_filter=None,
+             columns: list = None,
+             filters: list = None,
+             ref: str = None) -> None:
         """
+        Pulling a branch makes the following commits advance the branch.
 
         :param version:
+        :param record_filter: pulls only the matching records and their objects. A query string
+            (pandas.DataFrame.query), a callable which returns a boolean mask or a list of index values.
+        :param columns: pulls only these dimensions of the records. The index and uri dimensions are
+            always pulled. Committing a filtered or projected pull requires commit(partial=True).
+        :param filters: pulls only the records matching the row filters in pyarrow DNF form,
+            e.g. [("label", "==", "cat")]. They are evaluated by the parquet reader for PARQUET records.
+        :param ref: branch or tag to pull instead of the version
         :return:
         """
 
+        branch = None
+        if ref is not None:
+            version = self._get_ref_storage().get_branch(dataset_name=self.name, branch_name=ref)
+            if version is not None:
+                branch = ref
+            else:
+                version = self._resolve_tag(ref=ref)
+
         pulled_version = self._version_storage.pull(dataset_name=self.name,
                                                     dataset_version=version)
 
@@ -169,7 +288,10 @@ class ObjectDataset(Dataset):
             dataset_version=pulled_version,
             dataset_metadata=pulled_metadata,
             dataset_record_data=self._record_data,
-            working_directory=self._working_directory
+            working_directory=self._working_directory,
+            record_filter=record_filter,
+            columns=columns,
+            filters=filters
         )
 
         self._object_storage.pull(
@@ -183,6 +305,243 @@ class ObjectDataset(Dataset):
         self._metadata = pulled_metadata
         self._record_data = pulled_records
         self._version = pulled_version
+        self._is_partial = record_filter is not None or columns is not None or filters is not None
+        self._branch = branch
+        self._branch_head = pulled_version if branch is not None else None
+
+    def open_object(self,
+                    uri: str = None,
+                    index=None,
+                    version: ObjectDatasetVersion = None,
+                    access_mode: ObjectAccessModes = ObjectAccessModes.FILE):
+        """
+        Opens a single object by its uri or by the index of its record without pulling the version.
+        Without version the current version of the dataset is used, or the latest one if nothing
+        was committed or pulled yet.
+
+        :param uri:
+        :param index:
+        :param version:
+        :param access_mode:
+        :return: the object as file object, memoryview or mmap depending on the access mode
+        """
+
+        if version is None and self._version.id is not None:
+            version = self._version
+
+        opened_version = self._version_storage.pull(dataset_name=self.name,
+                                                    dataset_version=version)
+
+        opened_metadata = self._metadata_storage.pull(dataset_name=self.name,
+                                                      dataset_version=opened_version)
+
+        if uri is None:
+            # only the record of the index and its uri are read
+            records = self._record_storage.pull(
+                dataset_name=self.name,
+                dataset_version=opened_version,
+                dataset_metadata=opened_metadata,
+                dataset_record_data=self._record_data,
+                working_directory=self._working_directory,
+                record_filter=[index],
+                columns=[opened_metadata.private_metadata.uri_dimension_name]
+            )
+            uri = records.get_value(index=index,
+                                    dimension_name=opened_metadata.private_metadata.uri_dimension_name)
+
+        return self._object_storage.open(
+            dataset_name=self.name,
+            dataset_version=opened_version,
+            dataset_metadata=opened_metadata,
+            uri=uri,
+            access_mode=access_mode
+        )
+
+    def diff(self,
+             version_a: ObjectDatasetVersion,
+             version_b: ObjectDatasetVersion = None) -> ObjectDatasetDiff:
+        """
+        Compares the records and objects of two versions without pulling them. Only the records are read,
+        objects are compared by the fingerprints stored with the version and records by their stored row
+        hashes if both versions have them.
+
+        :param version_a:
+        :param version_b: the latest version if None
+        :return: records and objects added, removed and modified from version a to version b
+        """
+
+        def pull_side(version: ObjectDatasetVersion) -> tuple:
+            pulled_version = self._version_storage.pull(dataset_name=self.name,
+                                                        dataset_version=version)
+
+            pulled_metadata = self._metadata_storage.pull(dataset_name=self.name,
+                                                          dataset_version=pulled_version)
+
+            pulled_records = self._record_storage.pull(
+                dataset_name=self.name,
+                dataset_version=pulled_version,
+                dataset_metadata=pulled_metadata,
+                dataset_record_data=self._record_data,
+                working_directory=self._working_directory
+            )
+
+            row_hashes = self._record_storage.pull_row_hashes(dataset_name=self.name,
+                                                              dataset_version=pulled_version,
+                                                              dataset_metadata=pulled_metadata)
+
+            object_fingerprints = self._object_storage.get_object_fingerprints(
+                dataset_name=self.name,
+                dataset_version=pulled_version,
+                dataset_metadata=pulled_metadata,
+                dataset_record_data=pulled_records
+            )
+
+            return pulled_version, pulled_records, row_hashes, object_fingerprints
+
+        pulled_version_a, records_a, row_hashes_a, object_fingerprints_a = pull_side(version=version_a)
+        pulled_version_b, records_b, row_hashes_b, object_fingerprints_b = pull_side(version=version_b)
+
+        # stored hashes are only compared to stored hashes
+        if row_hashes_a is None or row_hashes_b is None:
+            row_hashes_a, row_hashes_b = None, None
+
+        return ObjectDatasetDiff(version_a=pulled_version_a,
+                                 version_b=pulled_version_b,
+                                 records_a=records_a,
+                                 records_b=records_b,
+                                 object_fingerprints_a=object_fingerprints_a,
+                                 object_fingerprints_b=object_fingerprints_b,
+                                 row_hashes_a=row_hashes_a,
+                                 row_hashes_b=row_hashes_b)
+
+    def log(self,
+            limit: int = None,
+            offset: int = 0,
+            before_version: ObjectDatasetVersion = None) -> list:
+        """
+        Lists the versions of the dataset page by page, e.g. log(limit=50) and
+        log(limit=50, before_version=<last version of the previous page>).
+
+        :param limit: maximal number of versions, all if None
+        :param offset: number of versions to skip
+        :param before_version: only versions older than this version are returned
+        :return: versions, newest first
+        """
+        return self._version_storage.log(dataset_name=self.name,
+                                         limit=limit,
+                                         offset=offset,
+                                         before_version=before_version)
+
+    def find_versions(self,
+                      public_metadata: dict) -> list:
+        """
+        Finds the versions whose public metadata contains all given keys and values.
+
+        :param public_metadata: e.g. {"labeler": "teamB", "split": "train"}
+        :return: versions ordered by id
+        """
+        found_versions = self._metadata_storage.query(dataset_name=self.name,
+                                                      public_metadata=public_metadata)
+
+        return [self._version_storage.pull(dataset_name=self.name,
+                                           dataset_version=version) for version in found_versions]
+
+    def resolve(self,
+                ref: str) -> ObjectDatasetVersion:
+        """
+
+        :param ref: branch or tag
+        :return: head of the branch or tagged version
+        """
+        version = self._get_ref_storage().get_branch(dataset_name=self.name, branch_name=ref)
+        if version is None:
+            version = self._resolve_tag(ref=ref)
+
+        return self._version_storage.pull(dataset_name=self.name,
+                                          dataset_version=version)
+
+    def create_branch(self,
+                      name: str,
+                      version: ObjectDatasetVersion = None) -> None:
+        """
+
+        :param name:
+        :param version: head of the new branch, the current version if None
+        :return:
+        """
+        self._get_ref_storage().update_branch(dataset_name=self.name,
+                                              branch_name=name,
+                                              dataset_version=self._get_ref_version(version=version))
+
+    def delete_branch(self,
+                      name: str) -> None:
+        """
+        The versions of the branch stay available by their ids and tags.
+
+        :param name:
+        :return:
+        """
+        self._get_ref_storage().delete_branch(dataset_name=self.name,
+                                              branch_name=name)
+        if self._branch == name:
+            self._branch = None
+            self._branch_head = None
+
+    def create_tag(self,
+                   name: str,
+                   version: ObjectDatasetVersion = None) -> None:
+        """
+
+        :param name:
+        :param version: tagged version, the current version if None
+        :return:
+        """
+        self._get_ref_storage().create_tag(dataset_name=self.name,
+                                           tag_name=name,
+                                           dataset_version=self._get_ref_version(version=version))
+
+    def list_refs(self) -> tuple:
+        """
+
+        :return: (heads of the branches by name, tagged versions by name), only the ids of the versions are set
+        """
+        return self._get_ref_storage().list_refs(dataset_name=self.name)
+
+    def _get_ref_storage(self) -> ObjectDatasetRefStorage:
+        """
+
+        :return:
+        """
+        if self._ref_storage is None:
+            raise ValueError("Branches and tags need a ref storage.")
+
+        return self._ref_storage
+
+    def _resolve_tag(self,
+                     ref: str) -> ObjectDatasetVersion:
+        """
+
+        :param ref:
+        :return:
+        """
+        version = self._get_ref_storage().get_tag(dataset_name=self.name, tag_name=ref)
+        if version is None:
+            raise RefDoesNotExistException(dataset_name=self.name, ref_name=ref)
+
+        return version
+
+    def _get_ref_version(self,
+                         version: ObjectDatasetVersion = None) -> ObjectDatasetVersion:
+        """
+
+        :param version:
+        :return: the version, the current version if None or the latest version if nothing was pulled or committed
+        """
+        if version is None and self._version.id is not None:
+            version = self._version
+
+        return self._version_storage.pull(dataset_name=self.name,
+                                          dataset_version=version)
 
     def drop(self) -> None:
         """
@@ -194,6 +553,8 @@ class ObjectDataset(Dataset):
         self._metadata_storage.drop(dataset_name=self.name)
         self._object_storage.drop(dataset_name=self.name)
         self._record_storage.drop(dataset_name=self.name)
+        if self._ref_storage is not None:
+            self._ref_storage.drop(dataset_name=self.name)
 
     def __str__(self):
         data = {
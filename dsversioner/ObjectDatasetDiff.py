@@ -0,0 +1,168 @@
+"""
+This module
+"""
+
+import json
+
+import pandas
+
+from .ObjectDatasetRecordData import ObjectDatasetRecordData
+from .ObjectDatasetVersion import ObjectDatasetVersion
+
+
+class ObjectDatasetDiff:
+    """
+    This class
+    Records are compared by the hashes of their rows and objects by the fingerprints stored by the object storage,
+    so neither the objects nor the records of both versions are compared value by value.
+    """
+
+    def __init__(self,
+                 version_a: ObjectDatasetVersion,
+                 version_b: ObjectDatasetVersion,
+                 records_a: ObjectDatasetRecordData,
+                 records_b: ObjectDatasetRecordData,
+                 object_fingerprints_a: dict,
+                 object_fingerprints_b: dict,
+                 row_hashes_a: pandas.Series = None,
+                 row_hashes_b: pandas.Series = None):
+        self._version_a = version_a
+        self._version_b = version_b
+        self._records_a = records_a
+        self._records_b = records_b
+
+        # stored row hashes are used instead of hashing the records
+        if row_hashes_a is None:
+            row_hashes_a = records_a.get_row_hashes()
+        if row_hashes_b is None:
+            row_hashes_b = records_b.get_row_hashes()
+        kept_index = row_hashes_b.index.intersection(row_hashes_a.index, sort=False)
+        is_modified = row_hashes_b.reindex(kept_index).to_numpy() != row_hashes_a.reindex(kept_index).to_numpy()
+
+        self._added_index_values = row_hashes_b.index.difference(row_hashes_a.index, sort=False).tolist()
+        self._removed_index_values = row_hashes_a.index.difference(row_hashes_b.index, sort=False).tolist()
+        self._modified_index_values = kept_index[is_modified].tolist()
+
+        self._added_objects = {uri: fingerprint for uri, fingerprint in object_fingerprints_b.items()
+                               if uri not in object_fingerprints_a}
+        self._removed_objects = {uri: fingerprint for uri, fingerprint in object_fingerprints_a.items()
+                                 if uri not in object_fingerprints_b}
+        self._modified_objects = {uri: (object_fingerprints_a[uri], fingerprint)
+                                  for uri, fingerprint in object_fingerprints_b.items()
+                                  if uri in object_fingerprints_a and object_fingerprints_a[uri] != fingerprint}
+
+    @property
+    def version_a(self) -> ObjectDatasetVersion:
+        """
+
+        :return:
+        """
+        return self._version_a
+
+    @property
+    def version_b(self) -> ObjectDatasetVersion:
+        """
+
+        :return:
+        """
+        return self._version_b
+
+    @property
+    def added_index_values(self) -> list:
+        """
+
+        :return: index values of the records only in version b
+        """
+        return self._added_index_values
+
+    @property
+    def removed_index_values(self) -> list:
+        """
+
+        :return: index values of the records only in version a
+        """
+        return self._removed_index_values
+
+    @property
+    def modified_index_values(self) -> list:
+        """
+
+        :return: index values of the records in both versions with different dimension values
+        """
+        return self._modified_index_values
+
+    @property
+    def added_records(self) -> ObjectDatasetRecordData:
+        """
+
+        :return: records of version b
+        """
+        return self._records_b.filter(record_filter=self._added_index_values)
+
+    @property
+    def removed_records(self) -> ObjectDatasetRecordData:
+        """
+
+        :return: records of version a
+        """
+        return self._records_a.filter(record_filter=self._removed_index_values)
+
+    @property
+    def modified_records(self) -> ObjectDatasetRecordData:
+        """
+
+        :return: records of version b
+        """
+        return self._records_b.filter(record_filter=self._modified_index_values)
+
+    @property
+    def added_objects(self) -> dict:
+        """
+
+        :return: fingerprint by uri of the objects only in version b
+        """
+        return self._added_objects
+
+    @property
+    def removed_objects(self) -> dict:
+        """
+
+        :return: fingerprint by uri of the objects only in version a
+        """
+        return self._removed_objects
+
+    @property
+    def modified_objects(self) -> dict:
+        """
+
+        :return: (fingerprint in version a, fingerprint in version b) by uri of the objects in both versions
+            with different content
+        """
+        return self._modified_objects
+
+    def is_empty(self) -> bool:
+        """
+
+        :return: True if both versions have the same records and objects
+        """
+        return len(self._added_index_values) == 0 and len(self._removed_index_values) == 0 and \
+            len(self._modified_index_values) == 0 and len(self._added_objects) == 0 and \
+            len(self._removed_objects) == 0 and len(self._modified_objects) == 0
+
+    def __str__(self):
+        data = {
+            'version_a': self._version_a.to_json(),
+            'version_b': self._version_b.to_json(),
+            'added_records': len(self._added_index_values),
+            'removed_records': len(self._removed_index_values),
+            'modified_records': len(self._modified_index_values),
+            'added_objects': len(self._added_objects),
+            'removed_objects': len(self._removed_objects),
+            'modified_objects': len(self._modified_objects)
+        }
+
+        return json.dumps(data,
+                          indent=4)
+
+    def __repr__(self):
+        return self.__str__()
@@ -4,17 +4,38 @@ This module
 
 import json
 import os
+import re
 import shutil
+import sqlite3
+import copy
+import itertools
+import threading
+import urllib.parse
+import uuid
 from pathlib import Path
 
-from .Storage import RecordStorageFormats
-from .Exceptions import DatasetExistsException, InvalidRecordStorageFormatException, \
-    DatasetVersionDoesNotExistException
+import pandas
+import pyarrow
+import pyarrow.parquet
+
+from .CatalogCache import CatalogCache, shared_catalog_cache
+from .Storage import RecordStorageFormats, ObjectAccessModes
+from .Exceptions import DatasetExistsException, DatasetDoesNotExistException, InvalidRecordStorageFormatException, \
+    DatasetVersionDoesNotExistException, ObjectDoesNotExistException, ObjectTransferException, \
+    CompressionCodecNotAvailableException, RefExistsException, RefDoesNotExistException, RefChangedException, \
+    BranchAmendException, InvalidRefNameException
+from .FileSystemObjectStore import FileSystemObjectStore, ObjectStorageLayouts, create_object_store, hash_file, \
+    open_path
 from .FileSystemStorage import FileSystemStorage
+from .FileLock import FileLock
+from .FileTransfer import ObjectTransferModes, transfer_file, replacing, write_replacing, write_text_replacing
+from .ObjectCompression import ObjectCompressionCodecs, DEFAULT_UNCOMPRESSED_FILE_EXTENSIONS, is_codec_available
 from .ObjectDatasetMetadata import ObjectDatasetMetadata
 from .ObjectDatasetStorage import ObjectDatasetVersionStorage, ObjectDatasetMetadataStorage, \
-    ObjectDatasetRecordStorage, ObjectDatasetObjectStorage, ObjectDatasetRecordData
+    ObjectDatasetRecordStorage, ObjectDatasetObjectStorage, ObjectDatasetRefStorage, ObjectDatasetRecordData
 from .ObjectDatasetVersion import ObjectDatasetVersion
+from .ParallelExecution import execute_parallel
+from .ReadWriteLock import ReadWriteLock
 from .Serializable import JsonSerializable
 
 
@@ -25,8 +46,12 @@ class FileSystemObjectDatasetVersionStorageSchema(JsonSerializable):
 
     def __init__(self,
                  #versions: list[ObjectDatasetVersion] = None):
-                 versions: list = None):
+                 versions: list = None,
+                 journal_file_name: str = None,
+                 branch_journal_offsets: dict = None):
         self._versions = versions
+        self._journal_file_name = journal_file_name
+        self._branch_journal_offsets = branch_journal_offsets if branch_journal_offsets is not None else {}
 
     @property
     def versions(self) -> list: #list[ObjectDatasetVersion]:
@@ -36,13 +61,31 @@ class FileSystemObjectDatasetVersionStorageSchema(JsonSerializable):
         """
         return self._versions
 
+    @property
+    def journal_file_name(self) -> str:
+        """
+
+        :return: journal of the versions committed after the checkpoint, None if there is none yet
+        """
+        return self._journal_file_name
+
+    @property
+    def branch_journal_offsets(self) -> dict:
+        """
+
+        :return: offsets up to which the versions of the branch journals are in the checkpoint, by journal name
+        """
+        return self._branch_journal_offsets
+
     def to_json(self) -> dict:
         """
 
         :return:
         """
         to_return = {
-            "versions": self._versions
+            "versions": self._versions,
+            "journal_file_name": self._journal_file_name,
+            "branch_journal_offsets": self._branch_journal_offsets
         }
         return to_return
 
@@ -59,18 +102,125 @@ class FileSystemObjectDatasetVersionStorageSchema(JsonSerializable):
         versions = [
             ObjectDatasetVersion.from_json(version) for
             version in json_dict['versions']]
-        return FileSystemObjectDatasetVersionStorageSchema(versions=versions)
+        return FileSystemObjectDatasetVersionStorageSchema(
+            versions=versions,
+            journal_file_name=json_dict.get('journal_file_name'),
+            branch_journal_offsets=json_dict.get('branch_journal_offsets'))
+
+
+class FileSystemObjectDatasetVersionIndex:
+    """
+    This class keeps the versions of a dataset in memory. It knows which checkpoint it was read from
+    and up to which offsets the journals were read, so only entries appended since then have to be read.
+    """
+
+    def __init__(self,
+                 checkpoint_key: tuple = None,
+                 versions: list = None,
+                 journal_file_name: str = None,
+                 branch_journal_offsets: dict = None):
+        self.checkpoint_key = checkpoint_key
+        self.journal_file_name = journal_file_name
+        self.versions = {}
+        self.version_ids_by_name = {}
+        self.max_version_id = 0
+        # end of the last complete journal entry
+        self.journal_offset = 0
+        self.journal_entry_count = 0
+        # ends of the last complete entries of the branch journals by journal name
+        self.branch_journal_offsets = dict(branch_journal_offsets or {})
+        # modification time of the directory of the branch journals when they were listed
+        self.branch_directory_key = None
+
+        for version in versions or []:
+            self.apply(version=version)
+
+    def apply(self,
+              version: ObjectDatasetVersion) -> None:
+        """
+        Adds the version or replaces the version with the same id.
+
+        :param version:
+        :return:
+        """
+        replaced_version = self.versions.get(version.id)
+        if replaced_version is not None and replaced_version.name != version.name:
+            version_ids = self.version_ids_by_name[replaced_version.name]
+            version_ids.discard(version.id)
+            if len(version_ids) == 0:
+                del self.version_ids_by_name[replaced_version.name]
+
+        self.versions[version.id] = version
+        self.version_ids_by_name.setdefault(version.name, set()).add(version.id)
+        self.max_version_id = max(self.max_version_id, version.id)
+
+    def find(self,
+             name: str) -> ObjectDatasetVersion:
+        """
+
+        :param name:
+        :return: the latest version with the name, None if there is none
+        """
+        version_ids = self.version_ids_by_name.get(name)
+        if not version_ids:
+            return None
+
+        return self.versions[max(version_ids)]
+
+    def iter_newest_first(self,
+                          before_version_id: int = None):
+        """
+        Version ids are assigned in ascending order, gaps are only left by interrupted branch commits,
+        so the versions are looked up by id.
+
+        :param before_version_id: only versions with smaller ids are returned
+        :return: iterator of versions
+        """
+        start_version_id = self.max_version_id if before_version_id is None else \
+            min(self.max_version_id, before_version_id - 1)
+        for version_id in range(start_version_id, 0, -1):
+            version = self.versions.get(version_id)
+            if version is not None:
+                yield version
 
 
 class FileSystemObjectDatasetVersionStorage(FileSystemStorage, ObjectDatasetVersionStorage):
     """
     This class
+
+    Versions are appended to a journal with one json line per commit, an amended version is appended again
+    and replaces the earlier line with the same id. Every checkpoint_interval journal entries, all versions
+    are written to the checkpoint file, which names a new empty journal, and the previous journal is removed.
+    Incomplete lines at the end of the journal, e.g. of interrupted commits, are ignored and overwritten by
+    the next commit. Commits of all processes are serialized by a lock file, so every commit reads the
+    entries of the others before it amends a version.
+    Commits to a branch are appended to a journal of the branch instead, which is locked by a lock file of
+    its own. Ids are counted in a separate file, so commits to different branches only wait for each other
+    while an id is assigned. Checkpoints contain the versions of the branch journals up to the offsets
+    they name.
+    Reads take no file lock and need no write access to the storage. The checkpoint is replaced atomically
+    and the journals are only appended to, so a checkpoint with the complete entries of the journals is
+    always a history which existed. Within the process, reads only wait for commits and for reading the
+    entries appended since the last read.
     """
     file_name = "version.json"
+    journal_file_extension = ".jsonl"
+    lock_file_name = "version.lock"
+    id_file_name = "version.id"
+    id_lock_file_name = "version.id.lock"
+    branch_directory_name = "branches"
+    lock_file_extension = ".lock"
 
     def __init__(self,
-                 root_path: Path):
+                 root_path: Path,
+                 checkpoint_interval: int = 1000,
+                 catalog_cache: CatalogCache = None):
         self._root_path = root_path
+        self._checkpoint_interval = checkpoint_interval
+        # parsed checkpoints are shared with other storages
+        self._catalog_cache = catalog_cache if catalog_cache is not None else shared_catalog_cache
+        self._indexes = {}
+        self._lock = ReadWriteLock()
 
     @property
     def root_path(self):
@@ -80,6 +230,22 @@ class FileSystemObjectDatasetVersionStorage(FileSystemStorage, ObjectDatasetVers
         """
         return self._root_path
 
+    @property
+    def checkpoint_interval(self) -> int:
+        """
+
+        :return:
+        """
+        return self._checkpoint_interval
+
+    @property
+    def catalog_cache(self) -> CatalogCache:
+        """
+
+        :return:
+        """
+        return self._catalog_cache
+
     def init(self,
              dataset_name: str) -> None:
 
@@ -98,64 +264,161 @@ class FileSystemObjectDatasetVersionStorage(FileSystemStorage, ObjectDatasetVers
 
         # initial versions schema
         storage_data = FileSystemObjectDatasetVersionStorageSchema(
-            versions=[]
+            versions=[],
+            journal_file_name=self._get_new_journal_file_name()
         )
-        with open(Path(storage_path, self.file_name), "w") as f:
-            f.write(json.dumps(storage_data,
-                               default=lambda obj: obj.to_json(),
-                               indent=4))
+        write_text_replacing(path=Path(storage_path, self.file_name),
+                             content=json.dumps(storage_data,
+                                                default=lambda obj: obj.to_json(),
+                                                indent=4))
 
     def commit(self,
                dataset_name: str,
                dataset_version: ObjectDatasetVersion,
-               amend: bool) -> ObjectDatasetVersion:
+               amend: bool,
+               branch: str = None) -> ObjectDatasetVersion:
 
         """
 
         :param dataset_name:
         :param dataset_version:
         :param amend:
+        :param branch: branch whose journal the version is appended to, versions on branches are not amended
         :return:
         """
 
-        storage_path = Path(self.root_path, dataset_name, self.storage_identifier, self.file_name)
+        if branch is not None:
+            if amend:
+                raise BranchAmendException(dataset_name=dataset_name, ref_name=branch)
 
-        # get data from version storage
-        with open(storage_path, "r") as f:
-            content = f.read()
-            storage_data = FileSystemObjectDatasetVersionStorageSchema.from_json(json.loads(content))
+            return self._commit_to_branch(dataset_name=dataset_name,
+                                          dataset_version=dataset_version,
+                                          branch=branch)
+
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
 
-        # get new version id
-        version_ids = [version.id for version in storage_data.versions]
-        max_version_id = max(version_ids) if len(version_ids) != 0 else 0
+        with self._lock, self._lock_storage(dataset_name=dataset_name):
+            # reads the entries other processes appended since the index was read last
+            index = self._get_index(dataset_name=dataset_name)
 
-        committed_version = None
-        if amend:
-            for index, version in enumerate(storage_data.versions):
-                if version.id == max_version_id:
-                    # replace last version
-                    committed_version = ObjectDatasetVersion(
-                        name=dataset_version.name,
-                        id=version.id
-                    )
-
-                    storage_data.versions[index] = committed_version
-        else:
+            if amend and index.max_version_id == 0:
+                # nothing to amend
+                return None
+
+            # checkpoints of datasets created before versions were journaled do not name a journal
+            if index.journal_file_name is None:
+                self._write_checkpoint(dataset_name=dataset_name,
+                                       index=index)
+
+            # replace last version when amending
             committed_version = ObjectDatasetVersion(
                 name=dataset_version.name,
-                id=max_version_id + 1
+                id=index.max_version_id if amend else self._assign_version_id(dataset_name=dataset_name,
+                                                                              index=index)
             )
 
-            storage_data.versions.append(committed_version)
+            journal_end, entry_size = self._append_to_journal(journal_path=Path(storage_path,
+                                                                                index.journal_file_name),
+                                                              version=committed_version)
+
+            index.apply(version=committed_version)
+            index.journal_entry_count += 1
+            if index.journal_offset == journal_end:
+                index.journal_offset += entry_size
+
+            if index.journal_entry_count >= self._checkpoint_interval:
+                self._write_checkpoint(dataset_name=dataset_name,
+                                       index=index)
+
+        return committed_version
+
+    def _commit_to_branch(self,
+                          dataset_name: str,
+                          dataset_version: ObjectDatasetVersion,
+                          branch: str) -> ObjectDatasetVersion:
+        """
+        Holds only the lock of the branch journal, the storage is locked every checkpoint_interval ids to
+        write a checkpoint.
+
+        :param dataset_name:
+        :param dataset_version:
+        :param branch:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        if not os.path.exists(storage_path):
+            raise DatasetDoesNotExistException(dataset_name=dataset_name)
+
+        branch_path = Path(storage_path, self.branch_directory_name)
+        os.makedirs(branch_path, exist_ok=True)
+        # branch names may contain slashes
+        branch_file_name = urllib.parse.quote(branch, safe="")
 
-        # write new version to version storage
-        with open(storage_path, "w") as f:
-            f.write(json.dumps(storage_data,
-                               default=lambda obj: obj.to_json(),
-                               indent=4))
+        with FileLock(path=Path(branch_path, f"{branch_file_name}{self.lock_file_extension}")):
+            committed_version = ObjectDatasetVersion(name=dataset_version.name,
+                                                     id=self._assign_version_id(dataset_name=dataset_name))
+            self._append_to_journal(
+                journal_path=Path(branch_path, f"{branch_file_name}{self.journal_file_extension}"),
+                version=committed_version)
+
+        # otherwise reads of datasets only committed to on branches read all branch journals completely
+        if committed_version.id % self._checkpoint_interval == 0:
+            self.checkpoint(dataset_name=dataset_name)
 
         return committed_version
 
+    def _assign_version_id(self,
+                           dataset_name: str,
+                           index: FileSystemObjectDatasetVersionIndex = None) -> int:
+        """
+        Counts the id in the id file, which is locked only while it is counted.
+
+        :param dataset_name:
+        :param index: current index if the storage is locked
+        :return: id of the new version
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        id_path = Path(storage_path, self.id_file_name)
+
+        with FileLock(path=Path(storage_path, self.id_lock_file_name)):
+            try:
+                with open(id_path, "r") as f:
+                    last_version_id = int(f.read())
+            except FileNotFoundError:
+                # datasets committed to before ids were counted
+                last_version_id = 0
+                if index is None:
+                    last_version_id = self._read_index(dataset_name=dataset_name,
+                                                       read_function=lambda index: index.max_version_id)
+
+            if index is not None:
+                last_version_id = max(last_version_id, index.max_version_id)
+
+            write_text_replacing(path=id_path,
+                                 content=str(last_version_id + 1))
+
+        return last_version_id + 1
+
+    def _append_to_journal(self,
+                           journal_path: Path,
+                           version: ObjectDatasetVersion) -> tuple:
+        """
+        Needs the lock of the journal.
+
+        :param journal_path:
+        :param version:
+        :return: (offset of the entry, size of the entry)
+        """
+        entry = (json.dumps(version.to_json()) + "\n").encode("utf-8")
+        with open(journal_path, "a+b") as f:
+            # incomplete entry of an interrupted commit, every entry ends with a line break
+            journal_end = self._get_journal_end(f=f)
+            if os.fstat(f.fileno()).st_size > journal_end:
+                f.truncate(journal_end)
+            f.write(entry)
+
+        return journal_end, len(entry)
+
     def pull(self,
              dataset_name: str,
              dataset_version: ObjectDatasetVersion = None) -> ObjectDatasetVersion:
@@ -163,34 +426,363 @@ class FileSystemObjectDatasetVersionStorage(FileSystemStorage, ObjectDatasetVers
         """
 
         :param dataset_name:
+        :param dataset_version: the latest version if None, the latest version with the name if it has no id
+        :return:
+        """
+
+        def find_version(index: FileSystemObjectDatasetVersionIndex) -> ObjectDatasetVersion:
+            if dataset_version is None:
+                # return latest
+                return index.versions.get(index.max_version_id)
+            elif dataset_version.id is None and dataset_version.name is not None:
+                # search for latest version with name
+                return index.find(name=dataset_version.name)
+
+            # search for version with index
+            return index.versions.get(dataset_version.id)
+
+        version = self._read_index(dataset_name=dataset_name,
+                                   read_function=find_version)
+
+        if version is not None:
+            return version
+
+        # did not find anything
+        raise DatasetVersionDoesNotExistException(
+            dataset_name=dataset_name,
+            dataset_version=self._describe_version(dataset_version=dataset_version))
+
+    def log(self,
+            dataset_name: str,
+            limit: int = None,
+            offset: int = 0,
+            before_version: ObjectDatasetVersion = None) -> list:
+        """
+
+        :param dataset_name:
+        :param limit: maximal number of versions, all if None
+        :param offset: number of versions to skip
+        :param before_version: only versions older than this version are returned, e.g. the last version
+            of the previous page
+        :return: versions, newest first
+        """
+
+        def list_versions(index: FileSystemObjectDatasetVersionIndex) -> list:
+            versions = index.iter_newest_first(
+                before_version_id=before_version.id if before_version is not None else None)
+            return list(itertools.islice(versions, offset, None if limit is None else offset + limit))
+
+        return self._read_index(dataset_name=dataset_name,
+                                read_function=list_versions)
+
+    @staticmethod
+    def _describe_version(dataset_version: ObjectDatasetVersion) -> str:
+        """
+
         :param dataset_version:
         :return:
         """
+        if dataset_version is None:
+            return "latest"
+        if dataset_version.id is None and dataset_version.name is not None:
+            return f"name: {dataset_version.name}"
+
+        return f"id: {dataset_version.id}"
+
+    def checkpoint(self,
+                   dataset_name: str) -> None:
+        """
+        Writes all versions, including the versions of the branch journals, to the checkpoint file and
+        starts a new journal.
+
+        :param dataset_name:
+        :return:
+        """
+        with self._lock, self._lock_storage(dataset_name=dataset_name):
+            self._write_checkpoint(dataset_name=dataset_name,
+                                   index=self._get_index(dataset_name=dataset_name))
 
-        storage_path = Path(self.root_path, dataset_name, self.storage_identifier, self.file_name)
+    def _lock_storage(self,
+                      dataset_name: str) -> FileLock:
+        """
+        Commits and checkpoints lock the storage against each other, reads do not lock it.
 
-        # get data from version storage
-        with open(storage_path, "r") as f:
+        :param dataset_name:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        if not os.path.exists(storage_path):
+            raise DatasetDoesNotExistException(dataset_name=dataset_name)
+
+        return FileLock(path=Path(storage_path, self.lock_file_name))
+
+    def _get_new_journal_file_name(self) -> str:
+        """
+
+        :return: name of the journal of a new checkpoint
+        """
+        return f"{Path(self.file_name).stem}.{uuid.uuid4().hex}{self.journal_file_extension}"
+
+    @staticmethod
+    def _get_journal_end(f,
+                         chunk_size: int = 64 * 1024) -> int:
+        """
+        Searches the journal backwards for the line break of the last complete entry.
+
+        :param f: journal opened for binary reading
+        :param chunk_size:
+        :return: offset after the last complete entry
+        """
+        end = os.fstat(f.fileno()).st_size
+        while end > 0:
+            start = max(0, end - chunk_size)
+            f.seek(start)
+            chunk = f.read(end - start)
+            line_break = chunk.rfind(b"\n")
+            if line_break != -1:
+                return start + line_break + 1
+            end = start
+
+        return 0
+
+    def _get_checkpoint_key(self,
+                            dataset_name: str) -> tuple:
+        """
+
+        :param dataset_name:
+        :return: (inode, modification time, size) of the checkpoint, a new checkpoint always has a new inode
+        """
+        checkpoint_path = Path(self.root_path, dataset_name, self.storage_identifier, self.file_name)
+        try:
+            checkpoint_stat = os.stat(checkpoint_path)
+        except FileNotFoundError:
+            raise DatasetDoesNotExistException(dataset_name=dataset_name)
+
+        return checkpoint_stat.st_ino, checkpoint_stat.st_mtime_ns, checkpoint_stat.st_size
+
+    def _read_index(self,
+                    dataset_name: str,
+                    read_function):
+        """
+        Reads hold the lock shared as long as nothing was committed since the index was read last, it is only
+        held exclusively to read the new journal entries.
+
+        :param dataset_name:
+        :param read_function: called with the index, it must not keep references to the index
+        :return: the return value of read_function
+        """
+        with self._lock.shared():
+            index = self._indexes.get(dataset_name)
+            if index is not None and self._is_current(dataset_name=dataset_name, index=index):
+                return read_function(index)
+
+        with self._lock:
+            return read_function(self._get_index(dataset_name=dataset_name))
+
+    def _is_current(self,
+                    dataset_name: str,
+                    index: FileSystemObjectDatasetVersionIndex) -> bool:
+        """
+
+        :param dataset_name:
+        :param index:
+        :return: True if no checkpoint was written and no journal entry appended since the index was read
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+
+        if index.checkpoint_key != self._get_checkpoint_key(dataset_name=dataset_name):
+            return False
+        # journals of new branches change the modification time of the directory
+        if index.branch_directory_key != self._get_branch_directory_key(storage_path=storage_path):
+            return False
+
+        journal_offsets = {Path(self.branch_directory_name, journal_file_name): offset for
+                           journal_file_name, offset in index.branch_journal_offsets.items()}
+        if index.journal_file_name is not None:
+            journal_offsets[Path(index.journal_file_name)] = index.journal_offset
+
+        for journal_path, offset in journal_offsets.items():
+            try:
+                journal_size = os.stat(Path(storage_path, journal_path)).st_size
+            except FileNotFoundError:
+                journal_size = 0
+            if journal_size != offset:
+                return False
+
+        return True
+
+    def _get_branch_directory_key(self,
+                                  storage_path: Path) -> int:
+        """
+
+        :param storage_path:
+        :return: modification time of the directory of the branch journals, None if there is none
+        """
+        try:
+            return os.stat(Path(storage_path, self.branch_directory_name)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _get_index(self,
+                   dataset_name: str) -> FileSystemObjectDatasetVersionIndex:
+        """
+        Reads the journal entries appended since the index was read last. The index is read again
+        if another storage wrote a checkpoint in the meantime. Needs the lock held exclusively.
+
+        :param dataset_name:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        checkpoint_path = Path(storage_path, self.file_name)
+        checkpoint_key = self._get_checkpoint_key(dataset_name=dataset_name)
+
+        index = self._indexes.get(dataset_name)
+        if index is not None and (index.checkpoint_key != checkpoint_key or
+                                  not self._read_journals(storage_path=storage_path, index=index)):
+            index = None
+
+        if index is None:
+            # get data from version storage. The checkpoint may have been replaced since its key was read,
+            # the key of the index then differs from the next key and the index is read again
+            storage_data = self._catalog_cache.get(path=checkpoint_path,
+                                                   load_function=self._read_checkpoint)
+            index = FileSystemObjectDatasetVersionIndex(checkpoint_key=checkpoint_key,
+                                                        versions=storage_data.versions,
+                                                        journal_file_name=storage_data.journal_file_name,
+                                                        branch_journal_offsets=storage_data.branch_journal_offsets)
+            self._read_journals(storage_path=storage_path, index=index)
+
+        self._indexes[dataset_name] = index
+        return index
+
+    @staticmethod
+    def _read_checkpoint(checkpoint_path: Path) -> FileSystemObjectDatasetVersionStorageSchema:
+        """
+
+        :param checkpoint_path:
+        :return:
+        """
+        with open(checkpoint_path, "r") as f:
             content = f.read()
-            storage_data = FileSystemObjectDatasetVersionStorageSchema.from_json(json.loads(content))
+            return FileSystemObjectDatasetVersionStorageSchema.from_json(json.loads(content))
 
-        version_ids = [version.id for version in storage_data.versions]
-        max_version_id = max(version_ids) if len(version_ids) != 0 else 0
+    def _read_journals(self,
+                       storage_path: Path,
+                       index: FileSystemObjectDatasetVersionIndex) -> bool:
+        """
+        Applies the complete entries of the journal and of the branch journals after the offsets of the index.
 
-        if dataset_version is None:
-            # return latest
-            for index, version in enumerate(storage_data.versions):
-                if version.id == max_version_id:
-                    return version
-        else:
-            # search for version with index
-            for index, version in enumerate(storage_data.versions):
-                if version.id == dataset_version.id:
-                    return version
+        :param storage_path:
+        :param index:
+        :return: False if a journal is shorter than its offset in the index
+        """
+        if index.journal_file_name is not None:
+            journal_offset = self._read_journal(journal_path=Path(storage_path, index.journal_file_name),
+                                                offset=index.journal_offset,
+                                                index=index)
+            if journal_offset is None:
+                return False
+            index.journal_offset = journal_offset
+
+        # the key is read before the directory is listed, so journals created meanwhile are listed next time
+        index.branch_directory_key = self._get_branch_directory_key(storage_path=storage_path)
+        if index.branch_directory_key is None:
+            return True
+
+        with os.scandir(Path(storage_path, self.branch_directory_name)) as entries:
+            journal_file_names = [entry.name for entry in entries if entry.name.endswith(self.journal_file_extension)]
+
+        for journal_file_name in journal_file_names:
+            journal_offset = self._read_journal(journal_path=Path(storage_path, self.branch_directory_name,
+                                                                  journal_file_name),
+                                                offset=index.branch_journal_offsets.get(journal_file_name, 0),
+                                                index=index)
+            if journal_offset is None:
+                return False
+            index.branch_journal_offsets[journal_file_name] = journal_offset
+
+        return True
+
+    @staticmethod
+    def _read_journal(journal_path: Path,
+                      offset: int,
+                      index: FileSystemObjectDatasetVersionIndex) -> int:
+        """
+        Applies the complete journal entries after the offset.
 
-        # did not find anything
-        raise DatasetVersionDoesNotExistException(dataset_name=dataset_name,
-                                                  dataset_version=f"id: {dataset_version.id}")
+        :param journal_path:
+        :param offset:
+        :param index:
+        :return: offset after the last complete entry, None if the journal is shorter than the offset
+        """
+        # the journal of a replaced checkpoint is removed, its checkpoint has all its entries
+        try:
+            with open(journal_path, "rb") as f:
+                journal_size = os.fstat(f.fileno()).st_size
+                if journal_size < offset:
+                    return None
+                # nothing was appended
+                if journal_size == offset:
+                    return offset
+
+                f.seek(offset)
+                content = f.read()
+        except FileNotFoundError:
+            return offset if offset == 0 else None
+
+        read_offset = 0
+        while True:
+            end = content.find(b"\n", read_offset)
+            # the rest is an incomplete entry
+            if end == -1:
+                break
+            try:
+                version = ObjectDatasetVersion.from_json(json.loads(content[read_offset:end]))
+            except (ValueError, KeyError, TypeError):
+                # entries after a damaged entry are not trusted
+                break
+
+            index.apply(version=version)
+            index.journal_entry_count += 1
+            read_offset = end + 1
+
+        return offset + read_offset
+
+    def _write_checkpoint(self,
+                          dataset_name: str,
+                          index: FileSystemObjectDatasetVersionIndex) -> None:
+        """
+        Writes the checkpoint with a new journal. The previous journal is removed after the checkpoint
+        replaced the previous one, readers which still read it know all of its entries from the new checkpoint
+        once they read it. The branch journals are kept, they are read from the offsets in the checkpoint.
+
+        :param dataset_name:
+        :param index:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        checkpoint_path = Path(storage_path, self.file_name)
+        previous_journal_file_name = index.journal_file_name
+
+        storage_data = FileSystemObjectDatasetVersionStorageSchema(
+            versions=list(index.versions.values()),
+            journal_file_name=self._get_new_journal_file_name(),
+            branch_journal_offsets=dict(index.branch_journal_offsets)
+        )
+        write_text_replacing(path=checkpoint_path,
+                             content=json.dumps(storage_data,
+                                                default=lambda obj: obj.to_json(),
+                                                indent=4))
+        self._catalog_cache.invalidate(path=checkpoint_path)
+
+        if previous_journal_file_name is not None and \
+                os.path.exists(Path(storage_path, previous_journal_file_name)):
+            os.remove(Path(storage_path, previous_journal_file_name))
+
+        index.checkpoint_key = self._get_checkpoint_key(dataset_name=dataset_name)
+        index.journal_file_name = storage_data.journal_file_name
+        index.journal_offset = 0
+        index.journal_entry_count = 0
 
     def drop(self,
              dataset_name: str) -> None:
@@ -203,6 +795,10 @@ class FileSystemObjectDatasetVersionStorage(FileSystemStorage, ObjectDatasetVers
 
         storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
 
+        with self._lock:
+            self._indexes.pop(dataset_name, None)
+        self._catalog_cache.invalidate(path=Path(storage_path, self.file_name))
+
         if os.path.exists(storage_path):
             shutil.rmtree(storage_path)
 
@@ -268,8 +864,10 @@ class FileSystemObjectDatasetMetadataStorageSchema(JsonSerializable):
 
     def __init__(self,
                  #metadata: list[FileSystemObjectDatasetMetadataStorageContainerSchema] = None):
-                 metadata: list= None):
+                 metadata: list= None,
+                 public_metadata_index: dict = None):
         self._metadata = metadata
+        self._public_metadata_index = public_metadata_index
 
     @property
     def metadata(self) -> list: #list[FileSystemObjectDatasetMetadataStorageContainerSchema]:
@@ -279,13 +877,26 @@ class FileSystemObjectDatasetMetadataStorageSchema(JsonSerializable):
         """
         return self._metadata
 
+    @property
+    def public_metadata_index(self) -> dict:
+        """
+
+        :return: version ids by json of the value by key of the public metadata
+        """
+        return self._public_metadata_index
+
+    @public_metadata_index.setter
+    def public_metadata_index(self, value: dict):
+        self._public_metadata_index = value
+
     def to_json(self) -> dict:
         """
 
         :return:
         """
         to_return = {
-            "metadata": self._metadata
+            "metadata": self._metadata,
+            "public_metadata_index": self._public_metadata_index
         }
         return to_return
 
@@ -303,19 +914,28 @@ class FileSystemObjectDatasetMetadataStorageSchema(JsonSerializable):
         metadata = [
             FileSystemObjectDatasetMetadataStorageContainerSchema.from_json(metadata_container) for
             metadata_container in json_dict['metadata']]
-        return FileSystemObjectDatasetMetadataStorageSchema(metadata=metadata)
+        # not present in metadata of datasets created before the index was stored
+        return FileSystemObjectDatasetMetadataStorageSchema(metadata=metadata,
+                                                            public_metadata_index=json_dict.get('public_metadata_index'))
 
 
 class FileSystemObjectDatasetMetadataStorage(FileSystemStorage, ObjectDatasetMetadataStorage):
     """
     This class
+
+    The metadata file is replaced as a whole on every commit. Commits of all processes are serialized
+    by a lock file.
     """
 
     file_name = "metadata.json"
+    lock_file_name = "metadata.lock"
 
     def __init__(self,
-                 root_path: Path):
+                 root_path: Path,
+                 catalog_cache: CatalogCache = None):
         self._root_path = root_path
+        # parsed metadata files are shared with other storages
+        self._catalog_cache = catalog_cache if catalog_cache is not None else shared_catalog_cache
 
     @property
     def root_path(self) -> Path:
@@ -325,6 +945,14 @@ class FileSystemObjectDatasetMetadataStorage(FileSystemStorage, ObjectDatasetMet
         """
         return self._root_path
 
+    @property
+    def catalog_cache(self) -> CatalogCache:
+        """
+
+        :return:
+        """
+        return self._catalog_cache
+
     def init(self,
              dataset_name: str) -> None:
         """
@@ -342,12 +970,13 @@ class FileSystemObjectDatasetMetadataStorage(FileSystemStorage, ObjectDatasetMet
 
         # initial metadata schema
         storage_data = FileSystemObjectDatasetMetadataStorageSchema(
-            metadata=[]
+            metadata=[],
+            public_metadata_index={}
         )
-        with open(Path(storage_path, self.file_name), "w") as f:
-            f.write(json.dumps(storage_data,
-                               default=lambda obj: obj.to_json(),
-                               indent=4))
+        write_text_replacing(path=Path(storage_path, self.file_name),
+                             content=json.dumps(storage_data,
+                                                default=lambda obj: obj.to_json(),
+                                                indent=4))
 
     def commit(self,
                dataset_name: str,
@@ -366,6 +995,26 @@ class FileSystemObjectDatasetMetadataStorage(FileSystemStorage, ObjectDatasetMet
 
         storage_path = Path(self.root_path, dataset_name, self.storage_identifier, self.file_name)
 
+        # commits of other processes are not lost between reading and replacing the metadata
+        with FileLock(path=Path(storage_path.parent, self.lock_file_name)):
+            self._commit(storage_path=storage_path,
+                         dataset_version=dataset_version,
+                         dataset_metadata=dataset_metadata,
+                         amend=amend)
+
+    def _commit(self,
+                storage_path: Path,
+                dataset_version: ObjectDatasetVersion,
+                dataset_metadata: ObjectDatasetMetadata,
+                amend: bool) -> None:
+        """
+
+        :param storage_path:
+        :param dataset_version:
+        :param dataset_metadata:
+        :param amend:
+        :return:
+        """
         # get data from metadata storage
         with open(storage_path, "r") as f:
             content = f.read()
@@ -376,19 +1025,36 @@ class FileSystemObjectDatasetMetadataStorage(FileSystemStorage, ObjectDatasetMet
             metadata=dataset_metadata
         )
 
+        if storage_data.public_metadata_index is None:
+            storage_data.public_metadata_index = self._build_public_metadata_index(
+                public_metadata_by_version_id={metadata_container.version_id:
+                                               metadata_container.metadata.public_metadata.to_json() for
+                                               metadata_container in storage_data.metadata})
+
         if amend:
             for index, metadata_container in enumerate(storage_data.metadata):
                 if metadata_container.version_id == dataset_version.id:
                     # replace
                     storage_data.metadata[index] = new_metadata_container
+                    self._remove_from_public_metadata_index(
+                        public_metadata_index=storage_data.public_metadata_index,
+                        version_id=dataset_version.id,
+                        public_metadata=metadata_container.metadata.public_metadata.to_json())
+                    self._add_to_public_metadata_index(public_metadata_index=storage_data.public_metadata_index,
+                                                       version_id=dataset_version.id,
+                                                       public_metadata=dataset_metadata.public_metadata.to_json())
         else:
             storage_data.metadata.append(new_metadata_container)
+            self._add_to_public_metadata_index(public_metadata_index=storage_data.public_metadata_index,
+                                               version_id=dataset_version.id,
+                                               public_metadata=dataset_metadata.public_metadata.to_json())
 
-        # write new version to version storage
-        with open(storage_path, "w") as f:
-            f.write(json.dumps(storage_data,
-                               default=lambda obj: obj.to_json(),
-                               indent=4))
+        # write new version to version storage, readers see either the previous or the new file
+        write_text_replacing(path=storage_path,
+                             content=json.dumps(storage_data,
+                                                default=lambda obj: obj.to_json(),
+                                                indent=4))
+        self._catalog_cache.invalidate(path=storage_path)
 
     def pull(self,
              dataset_name: str,
@@ -404,110 +1070,416 @@ class FileSystemObjectDatasetMetadataStorage(FileSystemStorage, ObjectDatasetMet
         storage_path = Path(self.root_path, dataset_name, self.storage_identifier, self.file_name)
 
         # get data from version storage
-        with open(storage_path, "r") as f:
-            content = f.read()
-            storage_data = FileSystemObjectDatasetMetadataStorageSchema.from_json(json.loads(content))
+        metadata_by_version_id, _ = self._catalog_cache.get(path=storage_path,
+                                                            load_function=self._read_storage_data)
 
-        for index, metadata_container in enumerate(storage_data.metadata):
-            if metadata_container.version_id == dataset_version.id:
-                return metadata_container.metadata
+        metadata = metadata_by_version_id.get(dataset_version.id)
+        if metadata is not None:
+            # the cached metadata is shared, the returned metadata may be changed by the caller
+            return ObjectDatasetMetadata.from_json(copy.deepcopy(metadata))
 
         # did not find anything
         raise DatasetVersionDoesNotExistException(dataset_name=dataset_name,
                                                   dataset_version=f"id: {dataset_version.id}")
 
-    def drop(self, dataset_name: str) -> None:
+    def query(self,
+              dataset_name: str,
+              public_metadata: dict) -> list:
         """
+        Looks the versions up in the index of the public metadata, the metadata of the versions is not read.
 
         :param dataset_name:
-        :return:
+        :param public_metadata: keys and values which the public metadata of the versions contains
+        :return: versions ordered by id, only their ids are set
         """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier, self.file_name)
 
-        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        metadata_by_version_id, public_metadata_index = self._catalog_cache.get(path=storage_path,
+                                                                                load_function=self._read_storage_data)
 
-        if os.path.exists(storage_path):
-            shutil.rmtree(storage_path)
+        # without conditions every version matches
+        version_ids = set(metadata_by_version_id)
+        for key, value in public_metadata.items():
+            version_ids &= set(public_metadata_index.get(key, {}).get(self._get_index_value(value=value), []))
 
+        return [ObjectDatasetVersion.from_id(id=version_id) for version_id in sorted(version_ids)]
 
-class FileSystemObjectDatasetRecordStorage(FileSystemStorage, ObjectDatasetRecordStorage):
-    """
-    This class
-    """
+    @classmethod
+    def _read_storage_data(cls,
+                           storage_path: Path) -> tuple:
+        """
+        The metadata is kept as json, only the metadata of the pulled version is parsed.
 
-    def __init__(self,
-                 root_path: Path,
-                 storage_format: RecordStorageFormats = RecordStorageFormats.CSV):
+        :param storage_path:
+        :return: (json of the metadata by version id, index of the public metadata)
+        """
+        with open(storage_path, "r") as f:
+            content = json.loads(f.read())
 
-        self._root_path = root_path
-        self._storage_format = storage_format
+        metadata_by_version_id = {metadata_container["version_id"]: metadata_container["metadata"] for
+                                  metadata_container in content["metadata"]}
 
-    @property
-    def root_path(self) -> Path:
+        public_metadata_index = content.get("public_metadata_index")
+        if public_metadata_index is None:
+            public_metadata_index = cls._build_public_metadata_index(
+                public_metadata_by_version_id={version_id: metadata["public_metadata"] for
+                                               version_id, metadata in metadata_by_version_id.items()})
+
+        return metadata_by_version_id, public_metadata_index
+
+    @staticmethod
+    def _get_index_value(value) -> str:
         """
 
-        :return:
+        :param value:
+        :return: json of the value, keys of objects are sorted
         """
-        return self._root_path
+        return json.dumps(value, sort_keys=True)
 
-    def init(self,
-             dataset_name: str) -> None:
+    @classmethod
+    def _build_public_metadata_index(cls,
+                                     public_metadata_by_version_id: dict) -> dict:
         """
 
-        :param dataset_name:
+        :param public_metadata_by_version_id:
         :return:
         """
+        public_metadata_index = {}
+        for version_id, public_metadata in public_metadata_by_version_id.items():
+            cls._add_to_public_metadata_index(public_metadata_index=public_metadata_index,
+                                              version_id=version_id,
+                                              public_metadata=public_metadata)
 
-        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        return public_metadata_index
 
-        if os.path.exists(storage_path):
-            raise DatasetExistsException(dataset_name=dataset_name)
+    @classmethod
+    def _add_to_public_metadata_index(cls,
+                                      public_metadata_index: dict,
+                                      version_id: int,
+                                      public_metadata: dict) -> None:
+        """
 
-        os.makedirs(storage_path)
+        :param public_metadata_index:
+        :param version_id:
+        :param public_metadata:
+        :return:
+        """
+        for key, value in (public_metadata or {}).items():
+            version_ids = public_metadata_index.setdefault(key, {}).setdefault(cls._get_index_value(value=value), [])
+            if version_id not in version_ids:
+                version_ids.append(version_id)
 
-    def commit(self,
-               dataset_name: str,
-               dataset_version: ObjectDatasetVersion,
-               dataset_record_data: ObjectDatasetRecordData,
-               dataset_metadata: ObjectDatasetMetadata,
-               working_directory: Path) -> None:
+    @classmethod
+    def _remove_from_public_metadata_index(cls,
+                                           public_metadata_index: dict,
+                                           version_id: int,
+                                           public_metadata: dict) -> None:
+        """
+
+        :param public_metadata_index:
+        :param version_id:
+        :param public_metadata:
+        :return:
+        """
+        for key, value in (public_metadata or {}).items():
+            values = public_metadata_index.get(key, {})
+            index_value = cls._get_index_value(value=value)
+            if version_id in values.get(index_value, []):
+                values[index_value].remove(version_id)
+                if len(values[index_value]) == 0:
+                    del values[index_value]
+            if len(values) == 0:
+                public_metadata_index.pop(key, None)
 
+    def drop(self, dataset_name: str) -> None:
         """
 
         :param dataset_name:
-        :param dataset_version:
-        :param dataset_record_data:
-        :param dataset_metadata:
-        :param working_directory:
         :return:
         """
 
-        file_name = f"{dataset_name}_{str(dataset_version.id)}"
         storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        self._catalog_cache.invalidate(path=Path(storage_path, self.file_name))
 
-        if self._storage_format is RecordStorageFormats.CSV:
-            file_extension = ".csv"
-            dataset_record_data.to_csv(
-                path=Path(storage_path, f"{file_name}{file_extension}"),
-                write_header=True,
-                write_index_dimension=True,
-                index_dimension_name=dataset_metadata.private_metadata.index_dimension_name
-            )
-        elif self._storage_format is RecordStorageFormats.PARQUET:
-            file_extension = ".parquet"
-            dataset_record_data.to_parquet(
-                path=Path(storage_path, f"{file_name}{file_extension}")
-            )
-        else:
-            raise InvalidRecordStorageFormatException(dataset_name=dataset_name)
+        if os.path.exists(storage_path):
+            shutil.rmtree(storage_path)
+
+
+class FileSystemObjectDatasetRecordStorageDeltaSchema(JsonSerializable):
+    """
+    This class describes a version which is stored as delta against its parent version.
+    A delta without parent stores all records of the version.
+    """
+
+    def __init__(self,
+                 parent: str = None,
+                 chain_length: int = 0,
+                 upserted_records: str = None,
+                 deleted_index_values: list = None,
+                 index_order: list = None,
+                 record_schema: dict = None):
+        self._parent = parent
+        self._chain_length = chain_length
+        self._upserted_records = upserted_records
+        self._deleted_index_values = deleted_index_values
+        self._index_order = index_order
+        self._record_schema = record_schema
+
+    @property
+    def parent(self) -> str:
+        """
+
+        :return: location of the records of the parent version
+        """
+        return self._parent
+
+    @property
+    def chain_length(self) -> int:
+        """
+
+        :return: number of deltas between the version and the complete records it is based on
+        """
+        return self._chain_length
+
+    @property
+    def upserted_records(self) -> str:
+        """
+
+        :return: file name of the inserted and updated records
+        """
+        return self._upserted_records
+
+    @property
+    def deleted_index_values(self) -> list:
+        """
+
+        :return:
+        """
+        return self._deleted_index_values
+
+    @property
+    def index_order(self) -> list:
+        """
+
+        :return: index values in the order of the records, None if the inserted records are appended
+        """
+        return self._index_order
+
+    @property
+    def record_schema(self) -> dict:
+        """
 
-        dataset_metadata.private_metadata.record_storage_data_location = f"{file_name}{file_extension}"
+        :return:
+        """
+        return self._record_schema
+
+    def to_json(self) -> dict:
+        """
+
+        :return:
+        """
+        to_return = {
+            "parent": self._parent,
+            "chain_length": self._chain_length,
+            "upserted_records": self._upserted_records,
+            "deleted_index_values": self._deleted_index_values,
+            "index_order": self._index_order,
+            "record_schema": self._record_schema
+        }
+        return to_return
+
+    @classmethod
+    def from_json(cls, json_dict: dict):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param json_dict:
+        :return:
+        """
+        if json_dict is None:
+            return FileSystemObjectDatasetRecordStorageDeltaSchema()
+
+        return FileSystemObjectDatasetRecordStorageDeltaSchema(parent=json_dict["parent"],
+                                                               chain_length=json_dict["chain_length"],
+                                                               upserted_records=json_dict["upserted_records"],
+                                                               deleted_index_values=json_dict["deleted_index_values"],
+                                                               index_order=json_dict.get("index_order"),
+                                                               record_schema=json_dict.get("record_schema"))
+
+
+class FileSystemObjectDatasetRecordStorage(FileSystemStorage, ObjectDatasetRecordStorage):
+    """
+    This class
+
+    With delta storage, a version is stored as the records which were inserted or updated since the
+    version it was pulled from and the index values which were deleted. Versions whose parent is
+    already max_delta_chain_length deltas away from complete records are stored completely.
+
+    With row hashes, a hash of every record is stored next to the records of a version. Deltas against a
+    version with row hashes are found by comparing the hashes, without reading the records of the version.
+    """
+
+    delta_file_extension = ".delta.json"
+    upserted_records_file_suffix = ".upserted"
+    row_hashes_file_suffix = ".hashes.parquet"
+
+    def __init__(self,
+                 root_path: Path,
+                 storage_format: RecordStorageFormats = RecordStorageFormats.CSV,
+                 delta_storage: bool = False,
+                 max_delta_chain_length: int = 16,
+                 store_row_hashes: bool = False):
+
+        self._root_path = root_path
+        self._storage_format = storage_format
+        self._delta_storage = delta_storage
+        self._max_delta_chain_length = max_delta_chain_length
+        self._store_row_hashes = store_row_hashes
+
+    @property
+    def root_path(self) -> Path:
+        """
+
+        :return:
+        """
+        return self._root_path
+
+    @property
+    def delta_storage(self) -> bool:
+        """
+
+        :return:
+        """
+        return self._delta_storage
+
+    @property
+    def store_row_hashes(self) -> bool:
+        """
+
+        :return:
+        """
+        return self._store_row_hashes
+
+    def init(self,
+             dataset_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+
+        if os.path.exists(storage_path):
+            raise DatasetExistsException(dataset_name=dataset_name)
+
+        os.makedirs(storage_path)
+
+    def commit(self,
+               dataset_name: str,
+               dataset_version: ObjectDatasetVersion,
+               dataset_record_data: ObjectDatasetRecordData,
+               dataset_metadata: ObjectDatasetMetadata,
+               working_directory: Path) -> None:
+
+        """
+
+        :param dataset_name:
+        :param dataset_version:
+        :param dataset_record_data:
+        :param dataset_metadata:
+        :param working_directory:
+        :return:
+        """
+
+        file_name = f"{dataset_name}_{str(dataset_version.id)}"
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        file_extension = self._get_file_extension(dataset_name=dataset_name)
+
+        records_name = f"{file_name}{file_extension}"
+        delta_name = f"{file_name}{self.delta_file_extension}"
+        upserted_records_name = f"{file_name}{self.upserted_records_file_suffix}{file_extension}"
+        row_hashes_name = f"{file_name}{self.row_hashes_file_suffix}"
+        parent_location = dataset_metadata.private_metadata.record_storage_data_location
+
+        # amending the version which the records were pulled from, the delta is taken against its parent
+        if parent_location in (records_name, delta_name):
+            parent_location = self._read_delta(delta_path=Path(storage_path, delta_name)).parent if \
+                parent_location == delta_name else None
+
+        parent_row_hashes, parent_record_schema = None, None
+        if self._store_row_hashes and parent_location is not None:
+            parent_row_hashes, parent_record_schema = self._read_row_hashes(
+                path=Path(storage_path, self._get_row_hashes_name(location=parent_location)))
+
+        delta = self._get_delta(dataset_name=dataset_name,
+                                dataset_version=dataset_version,
+                                dataset_metadata=dataset_metadata,
+                                dataset_record_data=dataset_record_data,
+                                parent_location=parent_location,
+                                parent_row_hashes=parent_row_hashes,
+                                parent_record_schema=parent_record_schema)
+
+        if delta is not None:
+            upserted_records, deleted_index_values, index_order, chain_length = delta
+            self._write_records(dataset_name=dataset_name,
+                                path=Path(storage_path, upserted_records_name),
+                                dataset_metadata=dataset_metadata,
+                                dataset_record_data=upserted_records)
+            self._write_delta(delta_path=Path(storage_path, delta_name),
+                              delta=FileSystemObjectDatasetRecordStorageDeltaSchema(
+                                  parent=parent_location,
+                                  chain_length=chain_length,
+                                  upserted_records=upserted_records_name,
+                                  deleted_index_values=deleted_index_values,
+                                  index_order=index_order,
+                                  record_schema=dataset_record_data.get_schema(
+                                      index_dimension_name=dataset_metadata.private_metadata.index_dimension_name)))
+            written_names = {delta_name, upserted_records_name}
+            location = delta_name
+        else:
+            self._write_records(dataset_name=dataset_name,
+                                path=Path(storage_path, records_name),
+                                dataset_metadata=dataset_metadata,
+                                dataset_record_data=dataset_record_data)
+            written_names = {records_name}
+            location = records_name
+
+        # csv files do not store the types of the dimensions
+        record_schema = dataset_record_data.get_schema(
+            index_dimension_name=dataset_metadata.private_metadata.index_dimension_name)
+
+        if self._store_row_hashes:
+            # the hashes of a delta are the hashes of its parent with the hashes of the upserted records
+            if delta is not None and parent_row_hashes is not None:
+                upserted_records, deleted_index_values, index_order, _ = delta
+                row_hashes = self._apply_row_hashes_delta(parent_row_hashes=parent_row_hashes,
+                                                          upserted_row_hashes=upserted_records.get_row_hashes(),
+                                                          deleted_index_values=deleted_index_values,
+                                                          index_order=index_order)
+            else:
+                row_hashes = dataset_record_data.get_row_hashes()
+            self._write_row_hashes(path=Path(storage_path, row_hashes_name),
+                                   row_hashes=row_hashes,
+                                   record_schema=record_schema)
+            written_names.add(row_hashes_name)
+
+        # records of the amended version which are not used anymore
+        for name in (records_name, delta_name, upserted_records_name, row_hashes_name):
+            if name not in written_names and os.path.exists(Path(storage_path, name)):
+                os.remove(Path(storage_path, name))
+
+        dataset_metadata.private_metadata.record_storage_data_location = location
+        dataset_metadata.private_metadata.record_schema = record_schema
 
     def pull(self,
              dataset_name: str,
              dataset_version: ObjectDatasetVersion,
              dataset_metadata: ObjectDatasetMetadata,
              dataset_record_data: ObjectDatasetRecordData,
-             working_directory: Path) -> ObjectDatasetRecordData:
+             working_directory: Path,
+             record_filter=None,
+             columns: list = None,
+             filters: list = None) -> ObjectDatasetRecordData:
 
         """
 
@@ -516,53 +1488,700 @@ class FileSystemObjectDatasetRecordStorage(FileSystemStorage, ObjectDatasetRecor
         :param dataset_version:
         :param dataset_metadata:
         :param working_directory:
+        :param record_filter: query string, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index and uri dimensions are always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
         :return:
         """
 
-        storage_path = Path(self.root_path, dataset_name, self.storage_identifier,
-                            dataset_metadata.private_metadata.record_storage_data_location)
+        location = dataset_metadata.private_metadata.record_storage_data_location
+
+        # the object storage needs the uri of every record
+        uri_dimension_name = dataset_metadata.private_metadata.uri_dimension_name
+        if columns is not None and uri_dimension_name not in columns:
+            columns = [uri_dimension_name, *columns]
+
+        if location.endswith(self.delta_file_extension):
+            # updates may move records in and out of the filters, they are applied to the merged records
+            to_return, _ = self._read_delta_records(dataset_name=dataset_name,
+                                                    dataset_version=dataset_version,
+                                                    dataset_metadata=dataset_metadata,
+                                                    dataset_record_data=dataset_record_data,
+                                                    location=location,
+                                                    columns=columns)
+            if filters is not None:
+                to_return = to_return.filter(record_filter=pyarrow.parquet.filters_to_expression(filters))
+
+            return to_return.filter(record_filter=record_filter)
+
+        return self._read_records(dataset_name=dataset_name,
+                                  dataset_version=dataset_version,
+                                  path=Path(self.root_path, dataset_name, self.storage_identifier, location),
+                                  dataset_metadata=dataset_metadata,
+                                  dataset_record_data=dataset_record_data,
+                                  record_schema=dataset_metadata.private_metadata.record_schema,
+                                  record_filter=record_filter,
+                                  columns=columns,
+                                  filters=filters)
+
+    def pull_row_hashes(self,
+                        dataset_name: str,
+                        dataset_version: ObjectDatasetVersion,
+                        dataset_metadata: ObjectDatasetMetadata) -> pandas.Series:
+        """
+
+        :param dataset_name:
+        :param dataset_version:
+        :param dataset_metadata:
+        :return: hash of every record of the version by index value, None if the version has no row hashes
+        """
+        location = dataset_metadata.private_metadata.record_storage_data_location
+        row_hashes, _ = self._read_row_hashes(path=Path(self.root_path, dataset_name, self.storage_identifier,
+                                                        self._get_row_hashes_name(location=location)))
+
+        return row_hashes
+
+    def drop(self, dataset_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+
+        if os.path.exists(storage_path):
+            shutil.rmtree(storage_path)
+
+    def _get_file_extension(self,
+                            dataset_name: str) -> str:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+        if self._storage_format is RecordStorageFormats.CSV:
+            return ".csv"
+        elif self._storage_format is RecordStorageFormats.PARQUET:
+            return ".parquet"
+        elif self._storage_format is RecordStorageFormats.FEATHER:
+            return ".feather"
+
+        raise InvalidRecordStorageFormatException(dataset_name=dataset_name)
+
+    def _write_records(self,
+                       dataset_name: str,
+                       path: Path,
+                       dataset_metadata: ObjectDatasetMetadata,
+                       dataset_record_data: ObjectDatasetRecordData) -> None:
+        """
+
+        :param dataset_name:
+        :param path:
+        :param dataset_metadata:
+        :param dataset_record_data:
+        :return:
+        """
+        # the record data writes the file under a temporary name and renames it into place, later versions
+        # stored as delta depend on it, so an interrupted commit must not leave incomplete records behind
+        if self._storage_format is RecordStorageFormats.CSV:
+            dataset_record_data.to_csv(
+                path=path,
+                write_header=True,
+                write_index_dimension=True,
+                index_dimension_name=dataset_metadata.private_metadata.index_dimension_name
+            )
+        elif self._storage_format is RecordStorageFormats.PARQUET:
+            dataset_record_data.to_parquet(
+                path=path
+            )
+        elif self._storage_format is RecordStorageFormats.FEATHER:
+            dataset_record_data.to_feather(
+                path=path
+            )
+        else:
+            raise InvalidRecordStorageFormatException(dataset_name=dataset_name)
+
+    def _read_records(self,
+                      dataset_name: str,
+                      dataset_version: ObjectDatasetVersion,
+                      path: Path,
+                      dataset_metadata: ObjectDatasetMetadata,
+                      dataset_record_data: ObjectDatasetRecordData,
+                      record_schema: dict = None,
+                      record_filter=None,
+                      columns: list = None,
+                      filters: list = None) -> ObjectDatasetRecordData:
+        """
 
+        :param dataset_name:
+        :param dataset_version:
+        :param path:
+        :param dataset_metadata:
+        :param dataset_record_data:
+        :param record_schema:
+        :param record_filter:
+        :param columns:
+        :param filters:
+        :return:
+        """
         if self._storage_format is RecordStorageFormats.CSV:
             to_return = dataset_record_data.from_csv(
-                path=storage_path,
+                path=path,
                 # use first row as header
                 header_rows=0,
-                index_dimension_name=dataset_metadata.private_metadata.index_dimension_name
+                index_dimension_name=dataset_metadata.private_metadata.index_dimension_name,
+                record_filter=record_filter,
+                columns=columns,
+                filters=filters,
+                record_schema=record_schema
             )
 
             return to_return
 
         elif self._storage_format is RecordStorageFormats.PARQUET:
             to_return = dataset_record_data.from_parquet(
-                path=storage_path
+                path=path,
+                record_filter=record_filter,
+                columns=columns,
+                filters=filters,
+                index_dimension_name=dataset_metadata.private_metadata.index_dimension_name
             )
 
             return to_return
 
-        # did not find anything
-        raise DatasetVersionDoesNotExistException(dataset_name=dataset_name,
-                                                  dataset_version=f"id: {dataset_version.id}")
+        elif self._storage_format is RecordStorageFormats.FEATHER:
+            to_return = dataset_record_data.from_feather(
+                path=path,
+                record_filter=record_filter,
+                columns=columns,
+                filters=filters,
+                index_dimension_name=dataset_metadata.private_metadata.index_dimension_name
+            )
+
+            return to_return
+
+        # did not find anything
+        raise DatasetVersionDoesNotExistException(dataset_name=dataset_name,
+                                                  dataset_version=f"id: {dataset_version.id}")
+
+    def _read_delta_records(self,
+                            dataset_name: str,
+                            dataset_version: ObjectDatasetVersion,
+                            dataset_metadata: ObjectDatasetMetadata,
+                            dataset_record_data: ObjectDatasetRecordData,
+                            location: str,
+                            columns: list = None) -> tuple:
+        """
+        Reads the complete records the location is based on and applies the deltas of the chain to them.
+
+        :param dataset_name:
+        :param dataset_version:
+        :param dataset_metadata:
+        :param dataset_record_data:
+        :param location:
+        :param columns:
+        :return: (records, chain length of the location)
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+
+        deltas = []
+        while location is not None and location.endswith(self.delta_file_extension):
+            deltas.append(self._read_delta(delta_path=Path(storage_path, location)))
+            location = deltas[-1].parent
+
+        # all deltas of a chain have the same dimensions
+        record_schema = deltas[0].record_schema if len(deltas) != 0 else \
+            dataset_metadata.private_metadata.record_schema
+
+        def read(name: str) -> ObjectDatasetRecordData:
+            return self._read_records(dataset_name=dataset_name,
+                                      dataset_version=dataset_version,
+                                      path=Path(storage_path, name),
+                                      dataset_metadata=dataset_metadata,
+                                      dataset_record_data=dataset_record_data,
+                                      record_schema=record_schema,
+                                      columns=columns)
+
+        if location is None:
+            # a delta without parent stores all records
+            records = read(name=deltas.pop().upserted_records)
+        else:
+            records = read(name=location)
+
+        chain_length = len(deltas)
+        for delta in reversed(deltas):
+            records = records.apply_delta(upserted_records=read(name=delta.upserted_records),
+                                          deleted_index_values=delta.deleted_index_values,
+                                          index_order=delta.index_order)
+
+        return records, chain_length
+
+    def _get_delta(self,
+                   dataset_name: str,
+                   dataset_version: ObjectDatasetVersion,
+                   dataset_metadata: ObjectDatasetMetadata,
+                   dataset_record_data: ObjectDatasetRecordData,
+                   parent_location: str,
+                   parent_row_hashes: pandas.Series = None,
+                   parent_record_schema: dict = None):
+        """
+
+        :param dataset_name:
+        :param dataset_version:
+        :param dataset_metadata:
+        :param dataset_record_data:
+        :param parent_location:
+        :param parent_row_hashes: if given, the records of the parent are not read
+        :param parent_record_schema: schema of the records the parent row hashes were computed from
+        :return: (upserted records, deleted index values, index order, chain length),
+            None if the records are stored completely
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        if not self._delta_storage or not dataset_record_data.supports_delta or parent_location is None or \
+                not os.path.exists(Path(storage_path, parent_location)):
+            return None
+
+        # long chains are compacted, the version is stored completely
+        parent_chain_length = self._read_delta(delta_path=Path(storage_path, parent_location)).chain_length if \
+            parent_location.endswith(self.delta_file_extension) else 0
+        if parent_chain_length >= self._max_delta_chain_length:
+            return None
+
+        if parent_row_hashes is not None:
+            delta = dataset_record_data.get_delta(parent_row_hashes=parent_row_hashes)
+            # hashes of records with other dimensions can not be compared
+            if delta is not None and dataset_record_data.get_schema(
+                    index_dimension_name=dataset_metadata.private_metadata.index_dimension_name) != \
+                    parent_record_schema:
+                return None
+        else:
+            parent_records, _ = self._read_delta_records(dataset_name=dataset_name,
+                                                         dataset_version=dataset_version,
+                                                         dataset_metadata=dataset_metadata,
+                                                         dataset_record_data=dataset_record_data,
+                                                         location=parent_location)
+            delta = dataset_record_data.get_delta(parent_record_data=parent_records)
+        if delta is None:
+            return None
+
+        upserted_records, deleted_index_values, index_order = delta
+        try:
+            # index values which can not be stored as json
+            json.dumps([deleted_index_values, index_order])
+        except TypeError:
+            return None
+
+        return upserted_records, deleted_index_values, index_order, parent_chain_length + 1
+
+    def _get_row_hashes_name(self,
+                             location: str) -> str:
+        """
+
+        :param location: records or delta of a version
+        :return:
+        """
+        if location.endswith(self.delta_file_extension):
+            return f"{location[:-len(self.delta_file_extension)]}{self.row_hashes_file_suffix}"
+
+        return f"{Path(location).with_suffix('')}{self.row_hashes_file_suffix}"
+
+    @staticmethod
+    def _read_row_hashes(path: Path) -> tuple:
+        """
+
+        :param path:
+        :return: (row hashes, schema of the records they were computed from), (None, None) if they do not exist
+        """
+        if not os.path.exists(path):
+            return None, None
+
+        table = pyarrow.parquet.read_table(path)
+        record_schema = json.loads(table.schema.metadata[b"record_schema"])
+
+        return table.to_pandas()["row_hash"], record_schema
+
+    @staticmethod
+    def _write_row_hashes(path: Path,
+                          row_hashes: pandas.Series,
+                          record_schema: dict) -> None:
+        """
+
+        :param path:
+        :param row_hashes:
+        :param record_schema:
+        :return:
+        """
+        table = pyarrow.Table.from_pandas(row_hashes.rename("row_hash").to_frame())
+        table = table.replace_schema_metadata({**table.schema.metadata,
+                                               b"record_schema": json.dumps(record_schema)})
+        write_replacing(path=path,
+                        write_function=lambda temporary_path: pyarrow.parquet.write_table(table, temporary_path))
+
+    @staticmethod
+    def _apply_row_hashes_delta(parent_row_hashes: pandas.Series,
+                                upserted_row_hashes: pandas.Series,
+                                deleted_index_values: list,
+                                index_order: list = None) -> pandas.Series:
+        """
+
+        :param parent_row_hashes:
+        :param upserted_row_hashes:
+        :param deleted_index_values:
+        :param index_order: index values in the order of the records, inserted records are appended if None
+        :return:
+        """
+        kept_row_hashes = parent_row_hashes[~parent_row_hashes.index.isin(deleted_index_values)]
+        is_inserted = ~upserted_row_hashes.index.isin(kept_row_hashes.index)
+        row_hashes = pandas.concat([kept_row_hashes[~kept_row_hashes.index.isin(upserted_row_hashes.index)],
+                                    upserted_row_hashes])
+
+        if index_order is None:
+            order = kept_row_hashes.index.append(upserted_row_hashes.index[is_inserted])
+        else:
+            order = pandas.Index(index_order, name=parent_row_hashes.index.name, dtype=parent_row_hashes.index.dtype)
+
+        return row_hashes.reindex(order)
+
+    @staticmethod
+    def _read_delta(delta_path: Path) -> FileSystemObjectDatasetRecordStorageDeltaSchema:
+        """
+
+        :param delta_path:
+        :return:
+        """
+        with open(delta_path, "r") as f:
+            content = f.read()
+            return FileSystemObjectDatasetRecordStorageDeltaSchema.from_json(json.loads(content))
+
+    @staticmethod
+    def _write_delta(delta_path: Path,
+                     delta: FileSystemObjectDatasetRecordStorageDeltaSchema) -> None:
+        """
+
+        :param delta_path:
+        :param delta:
+        :return:
+        """
+        write_text_replacing(path=delta_path,
+                             content=json.dumps(delta, default=lambda obj: obj.to_json()))
+
+
+class FileSystemObjectDatasetObjectStorageManifestEntrySchema(JsonSerializable):
+    """
+    This class
+    The timestamps are only set in the index of a working directory, they describe the file the hash was
+    computed from.
+    """
+
+    def __init__(self,
+                 hash: str = None,
+                 size: int = None,
+                 mtime_ns: int = None,
+                 codec: str = None,
+                 stored_size: int = None,
+                 ctime_ns: int = None):
+        self._hash = hash
+        self._size = size
+        self._mtime_ns = mtime_ns
+        self._codec = codec
+        self._stored_size = stored_size
+        self._ctime_ns = ctime_ns
+
+    @property
+    def hash(self) -> str:
+        """
+
+        :return:
+        """
+        return self._hash
+
+    @property
+    def size(self) -> int:
+        """
+
+        :return:
+        """
+        return self._size
+
+    @property
+    def mtime_ns(self) -> int:
+        """
+
+        :return:
+        """
+        return self._mtime_ns
+
+    @property
+    def codec(self) -> str:
+        """
+
+        :return:
+        """
+        return self._codec
+
+    @property
+    def stored_size(self) -> int:
+        """
+
+        :return:
+        """
+        return self._stored_size
+
+    @property
+    def ctime_ns(self) -> int:
+        """
+
+        :return:
+        """
+        return self._ctime_ns
+
+    def to_json(self) -> dict:
+        """
+
+        :return:
+        """
+        to_return = {
+            "hash": self._hash,
+            "size": self._size,
+            "mtime_ns": self._mtime_ns,
+            "codec": self._codec,
+            "stored_size": self._stored_size,
+            "ctime_ns": self._ctime_ns
+        }
+        return to_return
+
+    @classmethod
+    def from_json(cls, json_dict: dict):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param json_dict:
+        :return:
+        """
+        if json_dict is None:
+            return FileSystemObjectDatasetObjectStorageManifestEntrySchema()
+
+        return FileSystemObjectDatasetObjectStorageManifestEntrySchema(hash=json_dict["hash"],
+                                                                       size=json_dict["size"],
+                                                                       mtime_ns=json_dict.get("mtime_ns"),
+                                                                       codec=json_dict.get("codec"),
+                                                                       stored_size=json_dict.get("stored_size"),
+                                                                       ctime_ns=json_dict.get("ctime_ns"))
+
+
+class FileSystemObjectDatasetObjectStorageManifest:
+    """
+    This class maps the object uris of one dataset version to the hashes of the stored objects.
+    It is also used for the index of the objects which were pulled into a working directory.
+
+    The entries are kept in a SQLite database, so commits and pulls look up and add one entry at a time
+    instead of holding all entries in memory. A manifest is written under a temporary name and renamed
+    into place, it is never changed afterwards. Threads share the connection, accesses are serialized.
+    """
+
+    fetch_size = 10000
+
+    def __init__(self,
+                 connection: sqlite3.Connection):
+        self._connection = connection
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls,
+               path: Path = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param path: a private temporary database, which is removed when it is closed, if None
+        :return:
+        """
+        connection = sqlite3.connect("" if path is None else str(path), check_same_thread=False)
+        # the database is renamed into place once it is complete, so it needs no rollback journal
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("CREATE TABLE objects (uri TEXT PRIMARY KEY, hash TEXT, size INTEGER, mtime_ns INTEGER, "
+                           "codec TEXT, stored_size INTEGER, ctime_ns INTEGER) WITHOUT ROWID")
+        connection.execute("CREATE TABLE statistics (name TEXT PRIMARY KEY, value)")
+
+        return cls(connection=connection)
+
+    @classmethod
+    def open(cls,
+             path: Path):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+        Opens a manifest for reading. Manifests are never changed in place, so they are read without locks
+        and from read-only storage.
+
+        :param path:
+        :return:
+        """
+        return cls(connection=sqlite3.connect(f"{Path(path).absolute().as_uri()}?mode=ro&immutable=1",
+                                              uri=True,
+                                              check_same_thread=False))
+
+    def get(self,
+            uri: str) -> FileSystemObjectDatasetObjectStorageManifestEntrySchema:
+        """
+
+        :param uri:
+        :return: None if the manifest has no entry for the uri
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT hash, size, mtime_ns, codec, stored_size, ctime_ns "
+                                           "FROM objects WHERE uri = ?", (uri,)).fetchone()
+
+        return None if row is None or row[0] is None else self._to_entry(row=row)
+
+    def add(self,
+            uri: str) -> bool:
+        """
+        Adds the uri without entry, set() adds the entry later.
+
+        :param uri:
+        :return: False if the manifest already contains the uri
+        """
+        with self._lock:
+            return self._connection.execute("INSERT OR IGNORE INTO objects (uri) VALUES (?)", (uri,)).rowcount == 1
+
+    def set(self,
+            uri: str,
+            entry: FileSystemObjectDatasetObjectStorageManifestEntrySchema) -> None:
+        """
+
+        :param uri:
+        :param entry:
+        :return:
+        """
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     (uri, entry.hash, entry.size, entry.mtime_ns, entry.codec, entry.stored_size,
+                                      entry.ctime_ns))
+
+    def items(self):
+        """
+
+        :return: iterator of (uri, entry) tuples, read in batches of fetch_size entries
+        """
+        for row in self._iter_rows(query="SELECT uri, hash, size, mtime_ns, codec, stored_size, ctime_ns "
+                                         "FROM objects WHERE hash IS NOT NULL ORDER BY uri"):
+            yield row[0], self._to_entry(row=row[1:])
+
+    def iter_hashes(self):
+        """
+
+        :return: iterator of the distinct hashes of the objects
+        """
+        for row in self._iter_rows(query="SELECT DISTINCT hash FROM objects WHERE hash IS NOT NULL"):
+            yield row[0]
+
+    @property
+    def statistics(self) -> dict:
+        """
+
+        :return: statistics of the committed objects, empty for indexes of working directories
+        """
+        with self._lock:
+            return dict(self._connection.execute("SELECT name, value FROM statistics").fetchall())
 
-    def drop(self, dataset_name: str) -> None:
+    def set_statistics(self,
+                       statistics: dict) -> None:
         """
 
-        :param dataset_name:
+        :param statistics:
         :return:
         """
-        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO statistics VALUES (?, ?)", statistics.items())
 
-        if os.path.exists(storage_path):
-            shutil.rmtree(storage_path)
+    def close(self) -> None:
+        """
+        Persists added entries and closes the database.
+
+        :return:
+        """
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _iter_rows(self,
+                   query: str):
+        with self._lock:
+            cursor = self._connection.execute(query)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(self.fetch_size)
+            if len(rows) == 0:
+                return
+            yield from rows
+
+    @staticmethod
+    def _to_entry(row: tuple) -> FileSystemObjectDatasetObjectStorageManifestEntrySchema:
+        object_hash, size, mtime_ns, codec, stored_size, ctime_ns = row
+        return FileSystemObjectDatasetObjectStorageManifestEntrySchema(hash=object_hash,
+                                                                       size=size,
+                                                                       mtime_ns=mtime_ns,
+                                                                       codec=codec,
+                                                                       stored_size=stored_size,
+                                                                       ctime_ns=ctime_ns)
 
 
 class FileSystemObjectDatasetObjectStorage(FileSystemStorage, ObjectDatasetObjectStorage):
     """
-    This class
+    This class stores objects content-addressed in a FileSystemObjectStore. Every version
+    keeps a manifest which maps the object uris of the version to the hashes of the objects.
+
+    Objects are never removed by commits, also not the objects an amend stops referencing: another commit
+    may already reference them without having written its manifest yet. gc() removes the objects which no
+    manifest references, it locks the storage against commits while it runs.
     """
 
+    manifest_file_extension = ".sqlite"
+    working_directory_index_directory_name = ".dsversioner"
+    lock_file_name = "objects.lock"
+
     def __init__(self,
-                 root_path: Path):
+                 root_path: Path,
+                 transfer_mode: ObjectTransferModes = ObjectTransferModes.COPY,
+                 max_workers: int = None,
+                 max_pending_transfers: int = None,
+                 layout: ObjectStorageLayouts = ObjectStorageLayouts.LOOSE,
+                 max_pack_size: int = 1024 * 1024 * 1024,
+                 compression_codec: ObjectCompressionCodecs = ObjectCompressionCodecs.NONE,
+                 compression_level: int = None,
+                 uncompressed_file_extensions: frozenset = DEFAULT_UNCOMPRESSED_FILE_EXTENSIONS):
+        """
+
+        :param root_path:
+        :param transfer_mode: only used for uncompressed objects, HARDLINK is only used to pull objects
+        :param max_workers: number of objects transferred in parallel, 1 disables the thread pool
+        :param max_pending_transfers: number of objects queued for the workers at any time
+        :param layout: layout of newly committed objects, pulls use the layout stored with the version
+        :param max_pack_size: size in bytes after which a new pack is started, only used by the packed layout
+        :param compression_codec: codec of newly committed objects, pulls use the codec stored with each object
+        :param compression_level:
+        :param uncompressed_file_extensions: objects with these (lower case) extensions are never compressed
+        """
+        if not is_codec_available(codec=compression_codec):
+            raise CompressionCodecNotAvailableException(codec_name=compression_codec.name)
+
         self._root_path = root_path
+        self._transfer_mode = transfer_mode
+        self._max_workers = max_workers
+        self._max_pending_transfers = max_pending_transfers
+        self._layout = layout
+        self._max_pack_size = max_pack_size
+        self._compression_codec = compression_codec
+        self._compression_level = compression_level
+        self._uncompressed_file_extensions = uncompressed_file_extensions
+
+        # manifests and object stores used by open(), which is called many times for the same version
+        self._open_lock = threading.Lock()
+        self._open_manifests = {}
+        self._open_object_stores = {}
 
     @property
     def root_path(self) -> Path:
@@ -572,6 +2191,38 @@ class FileSystemObjectDatasetObjectStorage(FileSystemStorage, ObjectDatasetObjec
         """
         return self._root_path
 
+    @property
+    def transfer_mode(self) -> ObjectTransferModes:
+        """
+
+        :return:
+        """
+        return self._transfer_mode
+
+    @property
+    def max_workers(self) -> int:
+        """
+
+        :return:
+        """
+        return self._max_workers
+
+    @property
+    def layout(self) -> ObjectStorageLayouts:
+        """
+
+        :return:
+        """
+        return self._layout
+
+    @property
+    def compression_codec(self) -> ObjectCompressionCodecs:
+        """
+
+        :return:
+        """
+        return self._compression_codec
+
     def init(self,
              dataset_name: str) -> None:
         """
@@ -605,22 +2256,91 @@ class FileSystemObjectDatasetObjectStorage(FileSystemStorage, ObjectDatasetObjec
         """
 
         container_name = f"{dataset_name}_{str(dataset_version.id)}"
-        container_storage_path = Path(self.root_path, dataset_name, self.storage_identifier, container_name)
-
-        # clear and create storage path
-        if os.path.exists(container_storage_path):
-            shutil.rmtree(container_storage_path)
-        os.makedirs(container_storage_path)
-
-        object_locations = dataset_record_data.record_data[
-            dataset_metadata.private_metadata.uri_dimension_name].values.tolist()
-        object_locations = [Path(object_location) for object_location in object_locations]
-
-        for object_location in object_locations:
-            shutil.copyfile(Path(working_directory, object_location),
-                            Path(container_storage_path, object_location.name))
-
-        dataset_metadata.private_metadata.object_storage_data_location = container_name
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        manifest_name = f"{container_name}{self.manifest_file_extension}"
+        object_store = self._create_object_store(storage_path=storage_path, layout=self._layout)
+
+        # the index of the working directory describes files whose hashes are already known, unchanged
+        # objects are neither read nor written again. Timestamps recorded in other working directories,
+        # e.g. in the manifest of the parent version, say nothing about the files of this one
+        index_path = self._get_working_directory_index_path(dataset_name=dataset_name,
+                                                            working_directory=working_directory)
+        index, index_mtime_ns = self._read_working_directory_index(index_path=index_path)
+
+        def commit_object(object_location: Path) -> tuple:
+            source_path = Path(working_directory, object_location)
+            source_stat = os.stat(source_path)
+
+            object_hash = self._get_indexed_hash(path_stat=source_stat,
+                                                 index_entry=index.get(uri=object_location.as_posix()),
+                                                 index_mtime_ns=index_mtime_ns)
+            if object_hash is None:
+                object_hash = hash_file(path=source_path)
+
+            # only objects that are not yet in the store are written, with any codec
+            codec = object_store.locate_codec(object_hash=object_hash)
+            is_written = codec is None
+            if is_written:
+                codec = self._get_codec(object_location=object_location)
+                object_store.write(object_hash=object_hash,
+                                   source_path=source_path,
+                                   codec=codec,
+                                   compression_level=self._compression_level)
+
+            return object_location.as_posix(), FileSystemObjectDatasetObjectStorageManifestEntrySchema(
+                hash=object_hash,
+                size=source_stat.st_size,
+                codec=codec.name,
+                stored_size=object_store.get_stored_size(object_hash=object_hash, codec=codec)
+            ), is_written, self._get_index_entry(object_hash=object_hash, path_stat=source_stat)
+
+        statistics = dict.fromkeys(["object_count", "size", "stored_size",
+                                    "written_object_count", "written_size", "written_stored_size"], 0)
+
+        def add_object(result: tuple) -> None:
+            uri, manifest_entry, is_written, index_entry = result
+            manifest.set(uri=uri, entry=manifest_entry)
+            new_index.set(uri=uri, entry=index_entry)
+
+            statistics["object_count"] += 1
+            statistics["size"] += manifest_entry.size
+            statistics["stored_size"] += manifest_entry.stored_size
+            if is_written:
+                statistics["written_object_count"] += 1
+                statistics["written_size"] += manifest_entry.size
+                statistics["written_stored_size"] += manifest_entry.stored_size
+
+        # objects found in the store must not be removed by gc() until the manifest references them.
+        # Amending replaces the manifest, objects which only the amended version referenced are left for gc()
+        with self._lock_storage(dataset_name=dataset_name, shared=True), \
+                replacing(path=Path(storage_path, manifest_name)) as manifest_path, \
+                replacing(path=index_path) as new_index_path, \
+                index, \
+                FileSystemObjectDatasetObjectStorageManifest.create(path=manifest_path) as manifest, \
+                FileSystemObjectDatasetObjectStorageManifest.create(path=new_index_path) as new_index:
+            try:
+                self._transfer_objects(dataset_name=dataset_name,
+                                       transfer_function=commit_object,
+                                       object_locations=self._iter_object_locations(
+                                           dataset_name=dataset_name,
+                                           dataset_record_data=dataset_record_data,
+                                           dataset_metadata=dataset_metadata,
+                                           seen_manifest=manifest),
+                                       result_function=add_object)
+            finally:
+                object_store.flush()
+
+            stored_size = statistics["stored_size"]
+            statistics["compression_ratio"] = statistics["size"] / stored_size if stored_size != 0 else None
+            manifest.set_statistics(statistics=statistics)
+
+        # amending a version committed with the container layout
+        legacy_container_storage_path = Path(storage_path, container_name)
+        if os.path.isdir(legacy_container_storage_path):
+            shutil.rmtree(legacy_container_storage_path)
+
+        dataset_metadata.private_metadata.object_storage_data_location = manifest_name
+        dataset_metadata.private_metadata.object_storage_layout = self._layout.name
 
     def pull(self,
              dataset_name: str,
@@ -639,21 +2359,427 @@ class FileSystemObjectDatasetObjectStorage(FileSystemStorage, ObjectDatasetObjec
         :return:
         """
 
-        container_name = dataset_metadata.private_metadata.object_storage_data_location
-        container_storage_path = Path(self.root_path, dataset_name, self.storage_identifier, container_name)
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        location_path = Path(storage_path, dataset_metadata.private_metadata.object_storage_data_location)
+
+        # did not find anything
+        if not os.path.exists(location_path):
+            raise DatasetVersionDoesNotExistException(dataset_name=dataset_name,
+                                                      dataset_version=f"id:{dataset_version.id}")
+
+        # versions committed with the container layout store a plain copy of every object
+        if os.path.isdir(location_path):
+            def pull_object(object_location: Path) -> None:
+                transfer_file(source_path=Path(location_path, object_location.name),
+                              destination_path=Path(working_directory, object_location),
+                              transfer_mode=self._transfer_mode)
+
+            with FileSystemObjectDatasetObjectStorageManifest.create() as seen_manifest:
+                self._transfer_objects(dataset_name=dataset_name,
+                                       transfer_function=pull_object,
+                                       object_locations=self._iter_object_locations(
+                                           dataset_name=dataset_name,
+                                           dataset_record_data=dataset_record_data,
+                                           dataset_metadata=dataset_metadata,
+                                           seen_manifest=seen_manifest))
+            return
+
+        object_store = self._create_object_store(storage_path=storage_path,
+                                                 layout=self._get_layout(dataset_metadata=dataset_metadata))
+
+        # objects which were pulled or committed from this working directory before
+        index_path = self._get_working_directory_index_path(dataset_name=dataset_name,
+                                                            working_directory=working_directory)
+        index, index_mtime_ns = self._read_working_directory_index(index_path=index_path)
+
+        def pull_object(object_location: Path) -> tuple:
+            uri = object_location.as_posix()
+            manifest_entry = manifest.get(uri=uri)
+            destination_path = Path(working_directory, object_location)
+
+            # identical objects already in the working directory are not transferred again
+            if self._get_file_hash(path=destination_path,
+                                   index_entry=index.get(uri=uri),
+                                   index_mtime_ns=index_mtime_ns,
+                                   size=manifest_entry.size) != manifest_entry.hash:
+                object_store.read(object_hash=manifest_entry.hash,
+                                  destination_path=destination_path,
+                                  codec=ObjectCompressionCodecs[manifest_entry.codec])
+
+            return uri, self._get_index_entry(object_hash=manifest_entry.hash,
+                                              path_stat=os.stat(destination_path))
+
+        with index, \
+                FileSystemObjectDatasetObjectStorageManifest.open(path=location_path) as manifest, \
+                replacing(path=index_path) as new_index_path, \
+                FileSystemObjectDatasetObjectStorageManifest.create(path=new_index_path) as new_index:
+            self._transfer_objects(dataset_name=dataset_name,
+                                   transfer_function=pull_object,
+                                   object_locations=self._iter_object_locations(
+                                       dataset_name=dataset_name,
+                                       dataset_record_data=dataset_record_data,
+                                       dataset_metadata=dataset_metadata,
+                                       seen_manifest=new_index,
+                                       manifest=manifest),
+                                   result_function=lambda result: new_index.set(uri=result[0], entry=result[1]))
+
+            # remove objects of the previous version which the pulled version does not reference,
+            # objects that were modified after the previous pull are left in place
+            for uri, index_entry in index.items():
+                if new_index.get(uri=uri) is not None:
+                    continue
+
+                path = Path(working_directory, uri)
+                if self._get_file_hash(path=path,
+                                       index_entry=index_entry,
+                                       index_mtime_ns=index_mtime_ns,
+                                       size=index_entry.size) == index_entry.hash:
+                    os.remove(path)
+
+    def _get_referenced_hashes(self,
+                               storage_path: Path) -> set:
+        """
+
+        :param storage_path:
+        :return: hashes of all objects referenced by the manifests of the dataset
+        """
+        referenced_hashes = set()
+        for manifest_path in Path(storage_path).glob(f"*{self.manifest_file_extension}"):
+            with FileSystemObjectDatasetObjectStorageManifest.open(path=manifest_path) as manifest:
+                referenced_hashes.update(manifest.iter_hashes())
+
+        return referenced_hashes
+
+    def _get_working_directory_index_path(self,
+                                          dataset_name: str,
+                                          working_directory: Path) -> Path:
+        """
+
+        :param dataset_name:
+        :param working_directory:
+        :return:
+        """
+        index_path = Path(working_directory, self.working_directory_index_directory_name,
+                          f"{dataset_name}{self.manifest_file_extension}")
+        os.makedirs(index_path.parent, exist_ok=True)
+        return index_path
+
+    def _read_working_directory_index(self,
+                                      index_path: Path) -> tuple:
+        """
+
+        :param index_path:
+        :return: (index, time the index was written), an empty index if the working directory has none.
+            The index has to be closed
+        """
+        # the index is replaced, never changed, so the time read before opening it belongs to the opened index
+        try:
+            index_mtime_ns = os.stat(index_path).st_mtime_ns
+            return FileSystemObjectDatasetObjectStorageManifest.open(path=index_path), index_mtime_ns
+        except (FileNotFoundError, sqlite3.OperationalError):
+            if os.path.exists(index_path):
+                raise
+            return FileSystemObjectDatasetObjectStorageManifest.create(), None
+
+    @staticmethod
+    def _get_index_entry(object_hash: str,
+                         path_stat: os.stat_result) -> FileSystemObjectDatasetObjectStorageManifestEntrySchema:
+        """
+
+        :param object_hash:
+        :param path_stat: stat of the file in the working directory after it was hashed or written
+        :return:
+        """
+        return FileSystemObjectDatasetObjectStorageManifestEntrySchema(hash=object_hash,
+                                                                       size=path_stat.st_size,
+                                                                       mtime_ns=path_stat.st_mtime_ns,
+                                                                       ctime_ns=path_stat.st_ctime_ns)
+
+    @staticmethod
+    def _get_indexed_hash(path_stat: os.stat_result,
+                          index_entry: FileSystemObjectDatasetObjectStorageManifestEntrySchema,
+                          index_mtime_ns: int) -> str:
+        """
+        The hash of the index entry is used if the file still has the size and timestamps it had when it was
+        indexed. The change time can not be set by the user, so files restored with their old modification
+        time are hashed again. Like in git, entries whose timestamps are not older than the index are not
+        trusted: the file may have been changed again within the resolution of the file system clock.
+
+        :param path_stat:
+        :param index_entry:
+        :param index_mtime_ns: time the index was written
+        :return: hash of the file or None if it has to be hashed
+        """
+        if index_entry is None or index_mtime_ns is None or \
+                index_entry.size != path_stat.st_size or \
+                index_entry.mtime_ns != path_stat.st_mtime_ns or \
+                index_entry.ctime_ns != path_stat.st_ctime_ns or \
+                path_stat.st_mtime_ns >= index_mtime_ns or \
+                path_stat.st_ctime_ns >= index_mtime_ns:
+            return None
+
+        return index_entry.hash
+
+    @classmethod
+    def _get_file_hash(cls,
+                       path: Path,
+                       index_entry: FileSystemObjectDatasetObjectStorageManifestEntrySchema,
+                       index_mtime_ns: int,
+                       size: int) -> str:
+        """
+
+        :param path:
+        :param index_entry:
+        :param index_mtime_ns: time the index was written
+        :param size: expected size, files of another size are not hashed
+        :return: hash of the file, None if it does not exist or does not have the expected size
+        """
+        try:
+            path_stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        if path_stat.st_size != size:
+            return None
+
+        object_hash = cls._get_indexed_hash(path_stat=path_stat,
+                                            index_entry=index_entry,
+                                            index_mtime_ns=index_mtime_ns)
+        if object_hash is None:
+            object_hash = hash_file(path=path)
+
+        return object_hash
+
+    def open(self,
+             dataset_name: str,
+             dataset_version: ObjectDatasetVersion,
+             dataset_metadata: ObjectDatasetMetadata,
+             uri: str,
+             access_mode: ObjectAccessModes = ObjectAccessModes.FILE):
+        """
+        Opens a single object of the version without transferring it to a working directory.
+
+        :param dataset_name:
+        :param dataset_version:
+        :param dataset_metadata:
+        :param uri:
+        :param access_mode:
+        :return: the object as file object, memoryview or mmap depending on the access mode
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        location_path = Path(storage_path, dataset_metadata.private_metadata.object_storage_data_location)
+        uri = Path(uri)
+
+        # did not find anything
+        if not os.path.exists(location_path):
+            raise DatasetVersionDoesNotExistException(dataset_name=dataset_name,
+                                                      dataset_version=f"id:{dataset_version.id}")
+
+        # versions committed with the container layout store a plain copy of every object
+        if os.path.isdir(location_path):
+            object_path = Path(location_path, uri.name)
+            if not os.path.exists(object_path):
+                raise ObjectDoesNotExistException(dataset_name=dataset_name, object_uri=uri.as_posix())
+            return open_path(path=object_path, access_mode=access_mode)
+
+        manifest_entry = self._get_open_manifest(manifest_path=location_path).get(uri=uri.as_posix())
+        if manifest_entry is None:
+            raise ObjectDoesNotExistException(dataset_name=dataset_name, object_uri=uri.as_posix())
+
+        layout = self._get_layout(dataset_metadata=dataset_metadata)
+        codec = ObjectCompressionCodecs[manifest_entry.codec]
+        with self._open_lock:
+            object_store = self._open_object_stores.get((storage_path, layout))
+            if object_store is None:
+                object_store = self._create_object_store(storage_path=storage_path, layout=layout)
+                self._open_object_stores[(storage_path, layout)] = object_store
+
+        return object_store.open(object_hash=manifest_entry.hash, codec=codec, access_mode=access_mode)
+
+    def get_object_fingerprints(self,
+                                dataset_name: str,
+                                dataset_version: ObjectDatasetVersion,
+                                dataset_metadata: ObjectDatasetMetadata,
+                                dataset_record_data: ObjectDatasetRecordData) -> dict:
+        """
+        Reads the content hashes of the objects of the version from its manifest without reading the objects.
+
+        :param dataset_name:
+        :param dataset_version:
+        :param dataset_metadata:
+        :param dataset_record_data:
+        :return: sha256 of every object of the version by uri
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        location_path = Path(storage_path, dataset_metadata.private_metadata.object_storage_data_location)
 
         # did not find anything
-        if not os.path.exists(container_storage_path):
+        if not os.path.exists(location_path):
             raise DatasetVersionDoesNotExistException(dataset_name=dataset_name,
                                                       dataset_version=f"id:{dataset_version.id}")
 
-        object_locations = dataset_record_data.record_data[
-            dataset_metadata.private_metadata.uri_dimension_name].values.tolist()
-        object_locations = [Path(object_location) for object_location in object_locations]
+        # versions committed with the container layout do not store hashes, so the copies are hashed
+        if os.path.isdir(location_path):
+            with FileSystemObjectDatasetObjectStorageManifest.create() as seen_manifest:
+                return {object_location.as_posix(): hash_file(path=Path(location_path, object_location.name))
+                        for object_location in self._iter_object_locations(dataset_name=dataset_name,
+                                                                           dataset_record_data=dataset_record_data,
+                                                                           dataset_metadata=dataset_metadata,
+                                                                           seen_manifest=seen_manifest)}
+
+        manifest = self._get_open_manifest(manifest_path=location_path)
+        return {uri: manifest_entry.hash for uri, manifest_entry in manifest.items()}
+
+    def _get_open_manifest(self,
+                           manifest_path: Path) -> FileSystemObjectDatasetObjectStorageManifest:
+        """
+
+        :param manifest_path:
+        :return: the open manifest, it stays open while other threads may read it
+        """
+        manifest_stat = os.stat(manifest_path)
+        key = (manifest_stat.st_mtime_ns, manifest_stat.st_size)
+
+        with self._open_lock:
+            cached = self._open_manifests.get(manifest_path)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+        manifest = FileSystemObjectDatasetObjectStorageManifest.open(path=manifest_path)
+        with self._open_lock:
+            # keep the manifests of a few versions only
+            if len(self._open_manifests) >= 8:
+                self._open_manifests.pop(next(iter(self._open_manifests)))
+            self._open_manifests[manifest_path] = (key, manifest)
+
+        return manifest
+
+    def gc(self,
+           dataset_name: str) -> None:
+        """
+        Removes the objects which no version references, e.g. objects dropped by amended versions, from
+        every layout. Packs are rewritten with the referenced objects. Commits wait until gc() is done.
+
+        :param dataset_name:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+
+        with self._lock_storage(dataset_name=dataset_name):
+            referenced_hashes = self._get_referenced_hashes(storage_path=storage_path)
+            for layout in ObjectStorageLayouts:
+                object_store = self._create_object_store(storage_path=storage_path, layout=layout)
+                object_store.remove_unreferenced(referenced_hashes=referenced_hashes)
+
+    def _lock_storage(self,
+                      dataset_name: str,
+                      shared: bool = False) -> FileLock:
+        """
+        Commits lock the storage shared, so they run concurrently, gc() locks it exclusively.
+
+        :param dataset_name:
+        :param shared:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+        if not os.path.exists(storage_path):
+            raise DatasetDoesNotExistException(dataset_name=dataset_name)
+
+        return FileLock(path=Path(storage_path, self.lock_file_name),
+                        shared=shared)
+
+    def _create_object_store(self,
+                             storage_path: Path,
+                             layout: ObjectStorageLayouts) -> FileSystemObjectStore:
+        """
+
+        :param storage_path:
+        :param layout:
+        :return:
+        """
+        return create_object_store(storage_path=storage_path,
+                                   layout=layout,
+                                   transfer_mode=self._transfer_mode,
+                                   max_pack_size=self._max_pack_size)
+
+    def _get_codec(self,
+                   object_location: Path) -> ObjectCompressionCodecs:
+        """
+
+        :param object_location:
+        :return: codec for a newly committed object
+        """
+        if object_location.suffix.lower() in self._uncompressed_file_extensions:
+            return ObjectCompressionCodecs.NONE
+
+        return self._compression_codec
+
+    @staticmethod
+    def _get_layout(dataset_metadata: ObjectDatasetMetadata) -> ObjectStorageLayouts:
+        """
+
+        :param dataset_metadata:
+        :return:
+        """
+        # versions committed before the layout was stored use loose objects
+        if dataset_metadata.private_metadata.object_storage_layout is None:
+            return ObjectStorageLayouts.LOOSE
+
+        return ObjectStorageLayouts[dataset_metadata.private_metadata.object_storage_layout]
+
+    @staticmethod
+    def _iter_object_locations(dataset_name: str,
+                               dataset_record_data: ObjectDatasetRecordData,
+                               dataset_metadata: ObjectDatasetMetadata,
+                               seen_manifest: FileSystemObjectDatasetObjectStorageManifest,
+                               manifest: FileSystemObjectDatasetObjectStorageManifest = None):
+        """
+        Reads the uris of the records batch by batch. Objects referenced by several records are returned once.
+
+        :param dataset_name:
+        :param dataset_record_data:
+        :param dataset_metadata:
+        :param seen_manifest: the uris are added to it, uris it already contains are skipped
+        :param manifest: if given, every uri must be in the manifest
+        :return: iterator of object locations
+        """
+        for uris in dataset_record_data.iter_dimension_values(
+                dimension_name=dataset_metadata.private_metadata.uri_dimension_name):
+            for uri in uris.tolist():
+                object_location = Path(uri)
+                if not seen_manifest.add(uri=object_location.as_posix()):
+                    continue
+
+                if manifest is not None and manifest.get(uri=object_location.as_posix()) is None:
+                    raise ObjectDoesNotExistException(dataset_name=dataset_name,
+                                                      object_uri=object_location.as_posix())
+                yield object_location
+
+    def _transfer_objects(self,
+                          dataset_name: str,
+                          transfer_function,
+                          object_locations,
+                          result_function=None) -> list:
+        """
+
+        :param dataset_name:
+        :param transfer_function:
+        :param object_locations: iterable, consumed lazily
+        :param result_function: called with every result instead of collecting the results
+        :return:
+        """
+        results, errors = execute_parallel(function=transfer_function,
+                                           items=object_locations,
+                                           max_workers=self._max_workers,
+                                           max_pending_items=self._max_pending_transfers,
+                                           result_function=result_function)
 
-        for object_location in object_locations:
-            shutil.copyfile(Path(container_storage_path, object_location.name),
-                            Path(working_directory, object_location))
+        if len(errors) != 0:
+            raise ObjectTransferException(dataset_name=dataset_name,
+                                          errors={object_location.as_posix(): error for
+                                                  object_location, error in errors})
+
+        return results
 
     def drop(self,
              dataset_name: str) -> None:
@@ -667,3 +2793,266 @@ class FileSystemObjectDatasetObjectStorage(FileSystemStorage, ObjectDatasetObjec
 
         if os.path.exists(storage_path):
             shutil.rmtree(storage_path)
+
+
+class FileSystemObjectDatasetRefStorage(FileSystemStorage, ObjectDatasetRefStorage):
+    """
+    This class
+    Every branch and tag is a small file with the id of its version, so resolving a ref reads one file
+    and commits to different branches do not touch the same file. A branch is moved by writing the new
+    id to a lock file next to it, comparing the current head with the expected one and renaming the
+    lock file over the branch.
+    """
+
+    branch_directory_name = "heads"
+    tag_directory_name = "tags"
+    lock_file_extension = ".lock"
+
+    # names like main, relabel-2026q3 or team/experiment
+    ref_name_pattern = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]*(/[A-Za-z0-9_-][A-Za-z0-9._-]*)*")
+
+    def __init__(self,
+                 root_path: Path):
+        self._root_path = root_path
+
+    @property
+    def root_path(self) -> Path:
+        """
+
+        :return:
+        """
+        return self._root_path
+
+    def init(self,
+             dataset_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+
+        if os.path.exists(storage_path):
+            raise DatasetExistsException(dataset_name=dataset_name)
+
+        os.makedirs(Path(storage_path, self.branch_directory_name))
+        os.makedirs(Path(storage_path, self.tag_directory_name))
+
+    def get_branch(self,
+                   dataset_name: str,
+                   branch_name: str) -> ObjectDatasetVersion:
+        """
+
+        :param dataset_name:
+        :param branch_name:
+        :return: head of the branch, only its id is set. None if the branch does not exist
+        """
+        return self._read_ref(ref_path=self._get_ref_path(dataset_name=dataset_name,
+                                                          directory_name=self.branch_directory_name,
+                                                          ref_name=branch_name))
+
+    def update_branch(self,
+                      dataset_name: str,
+                      branch_name: str,
+                      dataset_version: ObjectDatasetVersion,
+                      expected_version: ObjectDatasetVersion = None) -> None:
+        """
+
+        :param dataset_name:
+        :param branch_name:
+        :param dataset_version: new head of the branch
+        :param expected_version: current head of the branch, None if the branch is created
+        :return:
+        """
+        if self.get_tag(dataset_name=dataset_name, tag_name=branch_name) is not None:
+            raise RefExistsException(dataset_name=dataset_name, ref_name=branch_name)
+
+        self._write_ref(dataset_name=dataset_name,
+                        ref_path=self._get_ref_path(dataset_name=dataset_name,
+                                                    directory_name=self.branch_directory_name,
+                                                    ref_name=branch_name),
+                        ref_name=branch_name,
+                        dataset_version=dataset_version,
+                        expected_version=expected_version)
+
+    def delete_branch(self,
+                      dataset_name: str,
+                      branch_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :param branch_name:
+        :return:
+        """
+        ref_path = self._get_ref_path(dataset_name=dataset_name,
+                                      directory_name=self.branch_directory_name,
+                                      ref_name=branch_name)
+        try:
+            os.remove(ref_path)
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            raise RefDoesNotExistException(dataset_name=dataset_name, ref_name=branch_name)
+
+        # empty directories of deleted refs would prevent refs with their names, e.g. a after a/b was deleted
+        directory_path = Path(self.root_path, dataset_name, self.storage_identifier, self.branch_directory_name)
+        for parent_path in ref_path.parents:
+            if parent_path == directory_path:
+                break
+            try:
+                os.rmdir(parent_path)
+            except OSError:
+                break
+
+    def get_tag(self,
+                dataset_name: str,
+                tag_name: str) -> ObjectDatasetVersion:
+        """
+
+        :param dataset_name:
+        :param tag_name:
+        :return: tagged version, only its id is set. None if the tag does not exist
+        """
+        return self._read_ref(ref_path=self._get_ref_path(dataset_name=dataset_name,
+                                                          directory_name=self.tag_directory_name,
+                                                          ref_name=tag_name))
+
+    def create_tag(self,
+                   dataset_name: str,
+                   tag_name: str,
+                   dataset_version: ObjectDatasetVersion) -> None:
+        """
+
+        :param dataset_name:
+        :param tag_name:
+        :param dataset_version:
+        :return:
+        """
+        if self.get_branch(dataset_name=dataset_name, branch_name=tag_name) is not None:
+            raise RefExistsException(dataset_name=dataset_name, ref_name=tag_name)
+
+        # tags are never moved, so they are only created
+        self._write_ref(dataset_name=dataset_name,
+                        ref_path=self._get_ref_path(dataset_name=dataset_name,
+                                                    directory_name=self.tag_directory_name,
+                                                    ref_name=tag_name),
+                        ref_name=tag_name,
+                        dataset_version=dataset_version,
+                        expected_version=None)
+
+    def list_refs(self,
+                  dataset_name: str) -> tuple:
+        """
+
+        :param dataset_name:
+        :return: (heads of the branches by name, tagged versions by name), only the ids of the versions are set
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+
+        refs = []
+        for directory_name in (self.branch_directory_name, self.tag_directory_name):
+            directory_path = Path(storage_path, directory_name)
+            versions = {}
+            for ref_path in sorted(directory_path.rglob("*")):
+                if ref_path.is_file() and ref_path.suffix != self.lock_file_extension:
+                    version = self._read_ref(ref_path=ref_path)
+                    if version is not None:
+                        versions[ref_path.relative_to(directory_path).as_posix()] = version
+            refs.append(versions)
+
+        return tuple(refs)
+
+    def drop(self,
+             dataset_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+
+        if os.path.exists(storage_path):
+            shutil.rmtree(storage_path)
+
+    def _get_ref_path(self,
+                      dataset_name: str,
+                      directory_name: str,
+                      ref_name: str) -> Path:
+        """
+
+        :param dataset_name:
+        :param directory_name:
+        :param ref_name:
+        :return:
+        """
+        if self.ref_name_pattern.fullmatch(ref_name) is None or ref_name.endswith(self.lock_file_extension):
+            raise InvalidRefNameException(dataset_name=dataset_name, ref_name=ref_name)
+
+        return Path(self.root_path, dataset_name, self.storage_identifier, directory_name, ref_name)
+
+    @staticmethod
+    def _read_ref(ref_path: Path) -> ObjectDatasetVersion:
+        """
+
+        :param ref_path:
+        :return: None if the ref does not exist
+        """
+        try:
+            with open(ref_path, "r") as f:
+                return ObjectDatasetVersion.from_id(id=int(f.read()))
+        # a ref named like a directory of the path, e.g. a for a/b, or refs below the path, e.g. a/b for a
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return None
+
+    def _write_ref(self,
+                   dataset_name: str,
+                   ref_path: Path,
+                   ref_name: str,
+                   dataset_version: ObjectDatasetVersion,
+                   expected_version: ObjectDatasetVersion = None) -> None:
+        """
+
+        :param dataset_name:
+        :param ref_path:
+        :param ref_name:
+        :param dataset_version:
+        :param expected_version: current version of the ref, None if the ref is created
+        :return:
+        """
+        overlap_message = "A branch or tag overlaps the name, e.g. a and a/b."
+        try:
+            os.makedirs(ref_path.parent, exist_ok=True)
+        except (FileExistsError, NotADirectoryError):
+            raise RefExistsException(dataset_name=dataset_name, ref_name=ref_name, message=overlap_message)
+        if os.path.isdir(ref_path):
+            raise RefExistsException(dataset_name=dataset_name, ref_name=ref_name, message=overlap_message)
+
+        lock_path = Path(ref_path.parent, f"{ref_path.name}{self.lock_file_extension}")
+
+        # the lock file exists only while the ref is written, it is left behind by crashed writers only
+        try:
+            file_descriptor = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            raise RefChangedException(dataset_name=dataset_name,
+                                      ref_name=ref_name,
+                                      message=f"The branch or tag is written by another commit. "
+                                              f"Remove {lock_path} if no commit is running.")
+
+        try:
+            with os.fdopen(file_descriptor, "w") as f:
+                f.write(str(dataset_version.id))
+
+            current_version = self._read_ref(ref_path=ref_path)
+            if expected_version is None and current_version is not None:
+                raise RefExistsException(dataset_name=dataset_name, ref_name=ref_name)
+            if expected_version is not None and (current_version is None or
+                                                 current_version.id != expected_version.id):
+                raise RefChangedException(dataset_name=dataset_name, ref_name=ref_name)
+
+            try:
+                os.replace(lock_path, ref_path)
+            except IsADirectoryError:
+                # refs below the path were created meanwhile
+                raise RefExistsException(dataset_name=dataset_name, ref_name=ref_name, message=overlap_message)
+        except BaseException:
+            if os.path.exists(lock_path):
+                os.remove(lock_path)
+            raise
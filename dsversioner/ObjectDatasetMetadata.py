@@ -15,12 +15,16 @@ class PrivateObjectDatasetMetadata(PrivateDatasetMetadata, JsonSerializable):
                  index_dimension_name: str = None,
                  uri_dimension_name: str = None,
                  record_storage_data_location: str = None,
-                 object_storage_data_location: str = None
+                 object_storage_data_location: str = None,
+                 object_storage_layout: str = None,
+                 record_schema: dict = None
                  ):
         self._index_dimension_name = index_dimension_name
         self._uri_dimension_name = uri_dimension_name
         self._record_storage_data_location = record_storage_data_location
         self._object_storage_data_location = object_storage_data_location
+        self._object_storage_layout = object_storage_layout
+        self._record_schema = record_schema
 
     @property
     def index_dimension_name(self) -> str:
@@ -94,12 +98,50 @@ class PrivateObjectDatasetMetadata(PrivateDatasetMetadata, JsonSerializable):
         """
         self._object_storage_data_location = object_storage_data_location
 
+    @property
+    def object_storage_layout(self) -> str:
+        """
+
+        :return:
+        """
+        return self._object_storage_layout
+
+    @object_storage_layout.setter
+    def object_storage_layout(self,
+                              object_storage_layout: str) -> None:
+        """
+
+        :param object_storage_layout:
+        :return:
+        """
+        self._object_storage_layout = object_storage_layout
+
+    @property
+    def record_schema(self) -> dict:
+        """
+
+        :return: types of the dimensions of the committed records
+        """
+        return self._record_schema
+
+    @record_schema.setter
+    def record_schema(self,
+                      record_schema: dict) -> None:
+        """
+
+        :param record_schema:
+        :return:
+        """
+        self._record_schema = record_schema
+
     def to_json(self) -> dict:
         to_return = {
             "index_dimension_name": self._index_dimension_name,
             "uri_dimension_name": self._uri_dimension_name,
             "record_storage_data_location": self._record_storage_data_location,
-            "object_storage_data_location": self._object_storage_data_location
+            "object_storage_data_location": self._object_storage_data_location,
+            "object_storage_layout": self._object_storage_layout,
+            "record_schema": self._record_schema
         }
         return to_return
 
@@ -114,7 +156,11 @@ class PrivateObjectDatasetMetadata(PrivateDatasetMetadata, JsonSerializable):
             index_dimension_name=json_dict['index_dimension_name'],
             uri_dimension_name=json_dict['uri_dimension_name'],
             record_storage_data_location=json_dict['record_storage_data_location'],
-            object_storage_data_location=json_dict['object_storage_data_location'])
+            object_storage_data_location=json_dict['object_storage_data_location'],
+            # not present in metadata of datasets created before the layout was stored
+            object_storage_layout=json_dict.get('object_storage_layout'),
+            # not present in metadata of datasets created before the schema was stored
+            record_schema=json_dict.get('record_schema'))
 
 
 class PublicKeyValueObjectDatasetMetadata(PublicKeyValueDatasetMetadata, JsonSerializable):
@@ -2,15 +2,26 @@
 This module...
 """
 import abc
+import itertools
 from pathlib import Path
 
+import numpy
 import pandas
+import pyarrow
+import pyarrow.compute
+import pyarrow.csv
+import pyarrow.dataset
+import pyarrow.feather
+import pyarrow.ipc
+import pyarrow.parquet
+import pyarrow.types
 
-from .DatasetRecordData import DatasetRecordData, PandasDatasetRecordData
-from .Serializable import CSVSerializable, ParquetSerializable
+from .DatasetRecordData import DatasetRecordData, PandasDatasetRecordData, ArrowDatasetRecordData
+from .FileTransfer import write_replacing
+from .Serializable import CSVSerializable, ParquetSerializable, FeatherSerializable
 
 
-class ObjectDatasetRecordData(DatasetRecordData, CSVSerializable, ParquetSerializable):
+class ObjectDatasetRecordData(DatasetRecordData, CSVSerializable, ParquetSerializable, FeatherSerializable):
     """
     This class
     """
@@ -27,7 +38,8 @@ class ObjectDatasetRecordData(DatasetRecordData, CSVSerializable, ParquetSeriali
 
     @classmethod
     @abc.abstractmethod
-    def from_csv(cls, path: Path, header_rows: int = 0, index_dimension_name: str = 'id'):
+    def from_csv(cls, path: Path, header_rows: int = 0, index_dimension_name: str = 'id', record_filter=None,
+                 columns: list = None, filters: list = None, record_schema: dict = None):
         pass
 
     @abc.abstractmethod
@@ -36,15 +48,346 @@ class ObjectDatasetRecordData(DatasetRecordData, CSVSerializable, ParquetSeriali
 
     @classmethod
     @abc.abstractmethod
-    def from_parquet(cls, path: Path):
+    def from_parquet(cls, path: Path, record_filter=None, columns: list = None, filters: list = None,
+                     index_dimension_name: str = None):
         pass
 
+    @abc.abstractmethod
+    def to_feather(self, path: Path) -> None:
+        pass
+
+    @classmethod
+    @abc.abstractmethod
+    def from_feather(cls, path: Path, record_filter=None, columns: list = None, filters: list = None,
+                     index_dimension_name: str = None):
+        pass
+
+    @abc.abstractmethod
+    def get_value(self, index, dimension_name: str):
+        pass
+
+    @abc.abstractmethod
+    def get_dimension_values(self, dimension_name: str):
+        pass
+
+    @abc.abstractmethod
+    def iter_dimension_values(self, dimension_name: str):
+        pass
+
+    @abc.abstractmethod
+    def filter(self, record_filter):
+        pass
+
+    @abc.abstractmethod
+    def get_schema(self, index_dimension_name: str) -> dict:
+        pass
+
+    @property
+    def supports_delta(self) -> bool:
+        """
+
+        :return: False if get_delta never returns a delta, so the records are always stored completely
+        """
+        return True
+
+    @abc.abstractmethod
+    def get_delta(self, parent_record_data=None, parent_row_hashes: pandas.Series = None):
+        pass
+
+    @abc.abstractmethod
+    def apply_delta(self, upserted_records, deleted_index_values: list, index_order: list = None):
+        pass
+
+    @abc.abstractmethod
+    def get_row_hashes(self) -> pandas.Series:
+        pass
+
+
+def _add_index_filter(filters: list,
+                      index_dimension_name: str,
+                      index_values) -> list:
+    """
+    Adds a filter which selects the given index values to row filters in pyarrow DNF form.
+
+    :param filters:
+    :param index_dimension_name:
+    :param index_values:
+    :return:
+    """
+    index_filter = (index_dimension_name, "in", list(index_values))
+    if filters is None:
+        return [index_filter]
+    if len(filters) > 0 and isinstance(filters[0], list):
+        # disjunction of conjunctions
+        return [[*conjunction, index_filter] for conjunction in filters]
+    return [*filters, index_filter]
+
+
+def _get_projected_dimension_names(index_dimension_name: str,
+                                   columns: list) -> list:
+    """
+
+    :param index_dimension_name:
+    :param columns:
+    :return: the index dimension followed by the selected dimensions
+    """
+    return [index_dimension_name, *[column for column in columns if column != index_dimension_name]]
+
+
+def _get_read_dimension_names(index_dimension_name: str,
+                              columns: list,
+                              filters: list) -> list:
+    """
+    Readers which can not filter on dimensions outside the projection read the union of both and drop
+    the dimensions which are only filtered on afterwards.
+
+    :param index_dimension_name:
+    :param columns:
+    :param filters: row filters in pyarrow DNF form
+    :return: the projected dimensions followed by the other dimensions of the filters, None if all are read
+    """
+    if columns is None:
+        return None
+
+    dimension_names = _get_projected_dimension_names(index_dimension_name=index_dimension_name, columns=columns)
+    conjunctions = [] if filters is None else \
+        filters if len(filters) > 0 and isinstance(filters[0], list) else [filters]
+    for conjunction in conjunctions:
+        for dimension_name, operator, value in conjunction:
+            if dimension_name not in dimension_names:
+                dimension_names.append(dimension_name)
+
+    return dimension_names
+
+
+def _get_arrow_dimension_schema(field: pyarrow.Field,
+                                categories: list = None) -> dict:
+    """
+
+    :param field:
+    :param categories: levels of a dictionary encoded dimension, taken from the data if None
+    :return:
+    """
+    if pyarrow.types.is_dictionary(field.type):
+        return {"name": field.name,
+                "type": str(field.type.value_type),
+                "categories": categories,
+                "ordered": field.type.ordered}
+
+    return {"name": field.name,
+            "type": str(field.type)}
+
+
+def _get_arrow_types(record_schema: dict) -> dict:
+    """
+
+    :param record_schema:
+    :return: arrow types by dimension name. Dimensions whose type has no alias are left out and inferred.
+    """
+    arrow_types = {}
+    for dimension in record_schema["dimensions"]:
+        if dimension.get("type") is None:
+            continue
+        try:
+            arrow_type = pyarrow.type_for_alias(dimension["type"])
+        except (ValueError, KeyError):
+            continue
+
+        if "categories" in dimension and (pyarrow.types.is_string(arrow_type) or
+                                          pyarrow.types.is_large_string(arrow_type)):
+            arrow_type = pyarrow.dictionary(pyarrow.int32(), arrow_type, ordered=bool(dimension.get("ordered")))
+        arrow_types[dimension["name"]] = arrow_type
+
+    return arrow_types
+
+
+def _apply_arrow_categories(records,
+                            record_schema: dict):
+    """
+    Dictionary encodes the categorical dimensions with their committed levels. The csv reader only finds
+    the levels which occur in the file, in the order in which they occur.
+
+    :param records: pyarrow.Table or pyarrow.RecordBatch
+    :param record_schema:
+    :return:
+    """
+    for dimension in record_schema["dimensions"]:
+        if dimension.get("categories") is None or dimension["name"] not in records.column_names:
+            continue
+
+        position = records.schema.get_field_index(dimension["name"])
+        column = records.column(position)
+        value_type = column.type.value_type if pyarrow.types.is_dictionary(column.type) else column.type
+        categories = pyarrow.array(dimension["categories"], type=value_type)
+
+        def encode(array: pyarrow.Array) -> pyarrow.DictionaryArray:
+            if pyarrow.types.is_dictionary(array.type):
+                array = array.dictionary_decode()
+            return pyarrow.DictionaryArray.from_arrays(pyarrow.compute.index_in(array, value_set=categories),
+                                                       categories,
+                                                       ordered=bool(dimension.get("ordered")))
+
+        if isinstance(column, pyarrow.ChunkedArray):
+            encoded = pyarrow.chunked_array([encode(chunk) for chunk in column.chunks],
+                                            type=pyarrow.dictionary(pyarrow.int32(), value_type,
+                                                                    ordered=bool(dimension.get("ordered"))))
+        else:
+            encoded = encode(column)
+        records = records.set_column(position, dimension["name"], encoded)
+
+    return records
+
+
+def _get_pandas_read_types(record_schema: dict) -> dict:
+    """
+
+    :param record_schema:
+    :return: dtypes by dimension name which pandas.read_csv can parse directly
+    """
+    return {dimension["name"]: dimension["pandas_type"] for dimension in record_schema["dimensions"]
+            if dimension.get("pandas_type") is not None and "categories" not in dimension
+            and not dimension["pandas_type"].startswith("datetime")}
+
+
+def _apply_pandas_types(df: pandas.DataFrame,
+                        record_schema: dict) -> pandas.DataFrame:
+    """
+    Restores the dtypes and categorical levels of the committed records.
+
+    :param df:
+    :param record_schema:
+    :return:
+    """
+    for dimension in record_schema["dimensions"]:
+        if "categories" in dimension:
+            dtype = "category" if dimension["categories"] is None else \
+                pandas.CategoricalDtype(categories=dimension["categories"], ordered=bool(dimension.get("ordered")))
+        elif dimension.get("pandas_type") is not None:
+            dtype = dimension["pandas_type"]
+        else:
+            continue
+
+        if dimension["name"] == df.index.name:
+            if df.index.dtype != dtype:
+                df.index = df.index.astype(dtype)
+        elif dimension["name"] in df.columns and df[dimension["name"]].dtype != dtype:
+            df[dimension["name"]] = df[dimension["name"]].astype(dtype)
+
+    return df
+
+
+def _get_stored_index_name(schema: pyarrow.Schema,
+                           index_dimension_name: str) -> str:
+    """
+    Files written by the pandas record data may store an unnamed index under a generated name.
+
+    :param schema:
+    :param index_dimension_name:
+    :return: name of the index dimension in the file
+    """
+    if index_dimension_name in schema.names:
+        return index_dimension_name
+
+    pandas_metadata = schema.pandas_metadata or {}
+    index_columns = [column for column in pandas_metadata.get('index_columns', []) if isinstance(column, str)]
+    if len(index_columns) == 1:
+        return index_columns[0]
+
+    return index_dimension_name
+
+
+def _iter_batches_with_schema(batches,
+                              schema: pyarrow.Schema):
+    """
+    Yields an empty batch of the schema if there are no batches, so the dimensions of records without
+    batches are still known, e.g. when they are written again.
+
+    :param batches:
+    :param schema:
+    :return:
+    """
+    is_empty = True
+    for batch in batches:
+        is_empty = False
+        yield batch
+
+    if is_empty:
+        yield pyarrow.RecordBatch.from_pylist([], schema=schema)
+
+
+def _get_row_hashes(df: pandas.DataFrame) -> pandas.Series:
+    """
+    Row hash of all record data implementations: pandas.util.hash_pandas_object of the dimensions without
+    the index. Records without dimensions have nothing to hash, all of them hash to 0.
+
+    :param df:
+    :return: uint64 hash of every record by index value
+    """
+    if len(df.columns) == 0:
+        return pandas.Series(numpy.zeros(len(df), dtype=numpy.uint64), index=df.index, dtype="uint64")
+
+    return pandas.util.hash_pandas_object(df, index=False)
+
+
+def _get_arrow_row_hashes(table: pyarrow.Table,
+                          index_dimension_name: str,
+                          chunk_size: int) -> pandas.Series:
+    """
+    Converts the records to pandas chunk by chunk to hash them, so only one chunk is held as pandas at once.
+
+    :param table:
+    :param index_dimension_name:
+    :param chunk_size: number of records converted at once
+    :return: uint64 hash of every record by index value
+    """
+    hashes = [_get_row_hashes(df=ArrowObjectDatasetRecordData(
+        record_data=table.slice(offset=offset, length=chunk_size),
+        index_dimension_name=index_dimension_name
+    ).to_pandas().record_data) for offset in range(0, table.num_rows, chunk_size)]
+    if len(hashes) == 0:
+        return pandas.Series([], dtype="uint64", index=pandas.Index([], name=index_dimension_name))
+
+    return pandas.concat(hashes)
+
+
+def _get_arrow_updated_mask(table: pyarrow.Table,
+                            parent_table: pyarrow.Table,
+                            index_dimension_name: str) -> pyarrow.Array:
+    """
+    Compares two tables with the same records row by row. Missing values are equal to each other.
+
+    :param table:
+    :param parent_table:
+    :param index_dimension_name:
+    :return: boolean mask of the rows with different values
+    """
+    is_updated = pyarrow.array(numpy.zeros(table.num_rows, dtype=bool))
+    for dimension_name in table.column_names:
+        if dimension_name == index_dimension_name:
+            continue
+        values = table.column(dimension_name)
+        parent_values = parent_table.column(dimension_name)
+        if pyarrow.types.is_dictionary(values.type):
+            values = values.cast(values.type.value_type)
+            parent_values = parent_values.cast(parent_values.type.value_type)
+
+        is_missing = pyarrow.compute.is_null(values, nan_is_null=True)
+        is_parent_missing = pyarrow.compute.is_null(parent_values, nan_is_null=True)
+        is_different = pyarrow.compute.fill_null(pyarrow.compute.not_equal(values, parent_values), True)
+        is_updated = pyarrow.compute.or_(is_updated, pyarrow.compute.and_(
+            is_different, pyarrow.compute.invert(pyarrow.compute.and_(is_missing, is_parent_missing))))
+
+    return is_updated
+
 
 class PandasObjectDatasetRecordData(PandasDatasetRecordData, ObjectDatasetRecordData):
     """
     This class
     """
 
+    # number of rows read at once when records are filtered while reading
+    read_chunk_size = 100000
+
     def __init__(self,
                  record_data: pandas.DataFrame = None):
         self._record_data = record_data
@@ -70,30 +413,96 @@ class PandasObjectDatasetRecordData(PandasDatasetRecordData, ObjectDatasetRecord
         :param index_dimension_name:
         :return:
         """
-        self._record_data.to_csv(
-            path_or_buf=path,
-            header=write_header,
-            index=write_index_dimension,
-            index_label=index_dimension_name
-        )
+        write_replacing(path=path,
+                        write_function=lambda temporary_path: self._record_data.to_csv(
+                            path_or_buf=temporary_path,
+                            header=write_header,
+                            index=write_index_dimension,
+                            index_label=index_dimension_name
+                        ))
 
     @classmethod
     def from_csv(cls,
                  path: Path,
                  header_rows: int = 1,
-                 index_dimension_name: str = 'id'):  # TODO: uncomment after migration to python 3.11 -> Self:
+                 index_dimension_name: str = 'id',
+                 record_filter=None,
+                 columns: list = None,
+                 filters: list = None,
+                 record_schema: dict = None):  # TODO: uncomment after migration to python 3.11 -> Self:
         """
 
         :param path:
         :param header_rows:
         :param index_dimension_name:
+        :param record_filter: query string, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index dimension is always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
+        :param record_schema: types of the dimensions, inferred from the file if None
         :return:
         """
-        df = pandas.read_csv(
+        # csv files can not skip columns without parsing them, but unused columns are not kept in memory
+        use_columns = _get_read_dimension_names(index_dimension_name=index_dimension_name,
+                                                columns=columns,
+                                                filters=filters)
+
+        if record_filter is None and filters is None and record_schema is not None:
+            # the types are known, so the multithreaded arrow reader can parse the file
+            records = ArrowObjectDatasetRecordData.from_csv(path=path,
+                                                            header_rows=header_rows,
+                                                            index_dimension_name=index_dimension_name,
+                                                            columns=columns,
+                                                            record_schema=record_schema)
+            df = _apply_pandas_types(df=records.to_pandas().record_data, record_schema=record_schema)
+            return PandasObjectDatasetRecordData(record_data=df)
+
+        read_types = None if record_schema is None else _get_pandas_read_types(record_schema=record_schema)
+
+        if record_filter is None and filters is None:
+            df = pandas.read_csv(
+                filepath_or_buffer=path,
+                header=header_rows,
+                index_col=index_dimension_name,
+                usecols=use_columns
+            )
+            return PandasObjectDatasetRecordData(record_data=df)
+
+        filter_expression = None if filters is None else pyarrow.parquet.filters_to_expression(filters)
+
+        # filter while reading, so only the matching records are held in memory
+        chunks = pandas.read_csv(
             filepath_or_buffer=path,
             header=header_rows,
-            index_col=index_dimension_name
+            index_col=index_dimension_name,
+            usecols=use_columns,
+            dtype=read_types,
+            chunksize=cls.read_chunk_size
         )
+        filtered_chunks = []
+        for chunk in chunks:
+            if filter_expression is not None:
+                chunk = pyarrow.Table.from_pandas(chunk, preserve_index=True).filter(filter_expression).to_pandas()
+            filtered_chunks.append(
+                PandasObjectDatasetRecordData(record_data=chunk).filter(record_filter=record_filter).record_data)
+
+        # keeps the columns and dtypes of the file if no record matches
+        if len(filtered_chunks) == 0:
+            df = pandas.read_csv(filepath_or_buffer=path,
+                                 header=header_rows,
+                                 index_col=index_dimension_name,
+                                 usecols=use_columns,
+                                 dtype=read_types,
+                                 nrows=0)
+        else:
+            df = pandas.concat(filtered_chunks)
+
+        # dimensions which were only read for the filters
+        if columns is not None:
+            df = df[[column for column in columns if column != index_dimension_name]]
+
+        if record_schema is not None:
+            df = _apply_pandas_types(df=df, record_schema=record_schema)
+
         return PandasObjectDatasetRecordData(record_data=df)
 
     def to_parquet(self,
@@ -103,19 +512,1229 @@ class PandasObjectDatasetRecordData(PandasDatasetRecordData, ObjectDatasetRecord
         :param path:
         :return:
         """
-        self._record_data.to_parquet(
-            path=path,
-            index=True)
+        write_replacing(path=path,
+                        write_function=lambda temporary_path: self._record_data.to_parquet(
+                            path=temporary_path,
+                            index=True))
 
     @classmethod
     def from_parquet(cls,
-                     path: Path):  # TODO: uncomment after migration to python 3.11 -> Self:
+                     path: Path,
+                     record_filter=None,
+                     columns: list = None,
+                     filters: list = None,
+                     index_dimension_name: str = None):  # TODO: uncomment after migration to python 3.11 -> Self:
         """
 
         :param path:
+        :param record_filter: query string, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index dimension is always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
+        :param index_dimension_name: needed to push a list of index values down to the parquet reader
         :return:
         """
+        # a list of index values can be evaluated by the parquet reader with the row group statistics
+        if (record_filter is not None and index_dimension_name is not None
+                and not isinstance(record_filter, str) and not callable(record_filter)):
+            filters = _add_index_filter(filters=filters,
+                                        index_dimension_name=index_dimension_name,
+                                        index_values=record_filter)
+            record_filter = None
+
+        # only the selected columns and the row groups which can match the filters are decoded
         df = pandas.read_parquet(
-            path=path)
+            path=path,
+            columns=columns,
+            filters=filters)
+
+        # files written by the arrow record data store the index as a regular dimension
+        if index_dimension_name is not None and index_dimension_name in df.columns:
+            df = df.set_index(index_dimension_name)
+
+        return PandasObjectDatasetRecordData(record_data=df).filter(record_filter=record_filter)
+
+    def to_feather(self,
+                   path: Path) -> None:
+        """
+
+        :param path:
+        :return:
+        """
+        # pandas.DataFrame.to_feather does not store the index
+        table = pyarrow.Table.from_pandas(self._record_data, preserve_index=True)
+        write_replacing(path=path,
+                        write_function=lambda temporary_path: pyarrow.feather.write_feather(
+                            df=table,
+                            dest=str(temporary_path),
+                            compression="uncompressed"))
+
+    @classmethod
+    def from_feather(cls,
+                     path: Path,
+                     record_filter=None,
+                     columns: list = None,
+                     filters: list = None,
+                     index_dimension_name: str = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param path:
+        :param record_filter: query string, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index dimension is always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
+        :param index_dimension_name:
+        :return:
+        """
+        # projection and filters are applied to the memory mapped table, only the result is converted
+        index_values = None
+        if record_filter is not None and not isinstance(record_filter, str) and not callable(record_filter):
+            index_values, record_filter = record_filter, None
+
+        records = ArrowObjectDatasetRecordData.from_feather(path=path,
+                                                            record_filter=index_values,
+                                                            columns=columns,
+                                                            filters=filters,
+                                                            index_dimension_name=index_dimension_name)
+
+        return records.to_pandas().filter(record_filter=record_filter)
+
+    def get_value(self,
+                  index,
+                  dimension_name: str):
+        """
+
+        :param index: value of the index dimension of the record
+        :param dimension_name:
+        :return:
+        """
+        return self._record_data.at[index, dimension_name]
+
+    def get_dimension_values(self,
+                             dimension_name: str):
+        """
+
+        :param dimension_name:
+        :return: numpy array
+        """
+        return self._record_data[dimension_name].values
+
+    def iter_dimension_values(self,
+                              dimension_name: str):
+        """
+
+        :param dimension_name:
+        :return: iterator of numpy arrays
+        """
+        yield self.get_dimension_values(dimension_name=dimension_name)
+
+    def filter(self,
+               record_filter):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param record_filter: query string (pandas.DataFrame.query), pyarrow.compute.Expression, callable
+            which takes the DataFrame and returns a boolean mask, or list of index values
+        :return:
+        """
+        if record_filter is None:
+            return self
+
+        if isinstance(record_filter, str):
+            df = self._record_data.query(record_filter)
+        elif isinstance(record_filter, pyarrow.compute.Expression):
+            df = pyarrow.Table.from_pandas(self._record_data, preserve_index=True).filter(record_filter).to_pandas()
+        elif callable(record_filter):
+            df = self._record_data[record_filter(self._record_data)]
+        else:
+            df = self._record_data[self._record_data.index.isin(list(record_filter))]
 
         return PandasObjectDatasetRecordData(record_data=df)
+
+    def get_schema(self,
+                   index_dimension_name: str) -> dict:
+        """
+
+        :param index_dimension_name:
+        :return: arrow and pandas types of the dimensions, levels of categorical dimensions
+        """
+        df = self._record_data
+        dimensions = []
+        for name, series in [(index_dimension_name, df.index.to_series()), *df.items()]:
+            dimension = {"name": name,
+                         "pandas_type": str(series.dtype)}
+
+            if isinstance(series.dtype, pandas.CategoricalDtype):
+                dimension["categories"] = series.cat.categories.tolist()
+                dimension["ordered"] = bool(series.cat.ordered)
+                values = series.cat.categories
+            else:
+                values = series
+
+            try:
+                if values.dtype == object:
+                    arrow_type = pyarrow.infer_type(values, from_pandas=True)
+                else:
+                    arrow_type = pyarrow.Array.from_pandas(values[:0]).type
+                dimension["type"] = str(arrow_type)
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError):
+                # mixed types, left to inference
+                dimension["type"] = None
+
+            dimensions.append(dimension)
+
+        return {"index_dimension_name": index_dimension_name,
+                "dimensions": dimensions}
+
+    def get_delta(self,
+                  parent_record_data=None,
+                  parent_row_hashes: pandas.Series = None):
+        """
+        With the row hashes of the parent, updated records are found by their hashes and the records of the
+        parent are not needed. The caller makes sure that the parent has the same dimensions.
+
+        :param parent_record_data:
+        :param parent_row_hashes: hash of every record of the parent by index value
+        :return: (upserted records, deleted index values, index order or None if the order follows from the
+            parent) or None if the records can not be stored as delta, or more than half of them changed
+        """
+        df = self._record_data
+        parent_index = parent_record_data.record_data.index if parent_row_hashes is None else parent_row_hashes.index
+
+        if not df.index.is_unique or not parent_index.is_unique or df.index.dtype != parent_index.dtype:
+            return None
+
+        is_inserted = ~df.index.isin(parent_index)
+        is_deleted = ~parent_index.isin(df.index)
+
+        if parent_row_hashes is not None:
+            is_updated = self.get_row_hashes()[~is_inserted].to_numpy() != \
+                parent_row_hashes.reindex(df.index[~is_inserted]).to_numpy()
+        else:
+            parent_df = parent_record_data.record_data
+            if list(df.columns) != list(parent_df.columns) or not df.dtypes.equals(parent_df.dtypes):
+                return None
+
+            # compares the kept records column by column, missing values are equal to each other
+            kept_df = df[~is_inserted]
+            kept_parent_df = parent_df.loc[kept_df.index]
+            is_updated = ((kept_df != kept_parent_df).fillna(True) &
+                          ~(kept_df.isna() & kept_parent_df.isna())).any(axis=1).to_numpy(dtype=bool)
+
+        is_upserted = is_inserted.copy()
+        is_upserted[~is_inserted] = is_updated
+        if is_upserted.sum() + is_deleted.sum() > len(df) // 2:
+            return None
+
+        natural_order = parent_index[~is_deleted].append(df.index[is_inserted])
+        index_order = None if df.index.equals(natural_order) else df.index.tolist()
+
+        return PandasObjectDatasetRecordData(record_data=df[is_upserted]), \
+            parent_index[is_deleted].tolist(), index_order
+
+    def apply_delta(self,
+                    upserted_records,
+                    deleted_index_values: list,
+                    index_order: list = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param upserted_records: inserted and updated records
+        :param deleted_index_values:
+        :param index_order: index values in the order of the records, inserted records are appended if None
+        :return:
+        """
+        df = self._record_data
+        upserted_df = upserted_records.record_data
+
+        # categorical dimensions read without their levels only know the levels which occur
+        for column in df.columns:
+            if isinstance(df[column].dtype, pandas.CategoricalDtype) and df[column].dtype != upserted_df[column].dtype:
+                categories = df[column].cat.categories.union(upserted_df[column].astype("category").cat.categories,
+                                                             sort=False)
+                dtype = pandas.CategoricalDtype(categories=categories, ordered=df[column].cat.ordered)
+                df = df.astype({column: dtype})
+                upserted_df = upserted_df.astype({column: dtype})
+
+        kept_df = df[~df.index.isin(deleted_index_values)]
+        is_inserted = ~upserted_df.index.isin(kept_df.index)
+        combined_df = pandas.concat([kept_df[~kept_df.index.isin(upserted_df.index)], upserted_df])
+
+        if index_order is None:
+            order = kept_df.index.append(upserted_df.index[is_inserted])
+        else:
+            order = pandas.Index(index_order, name=df.index.name, dtype=df.index.dtype)
+
+        return PandasObjectDatasetRecordData(record_data=combined_df.reindex(order))
+
+    def get_row_hashes(self) -> pandas.Series:
+        """
+        Hashes all dimensions of every record at once. Categorical dimensions are hashed by their values,
+        so records read with different levels have the same hash.
+
+        :return: uint64 hash of every record by index value
+        """
+        return _get_row_hashes(df=self._record_data)
+
+
+class ArrowObjectDatasetRecordData(ArrowDatasetRecordData, ObjectDatasetRecordData):
+    """
+    This class
+
+    Keeps the records in a pyarrow.Table which is read and written without conversion to pandas.
+    The index is a regular dimension of the table.
+    """
+
+    hash_chunk_size = 100000
+
+    def __init__(self,
+                 record_data: pyarrow.Table = None,
+                 index_dimension_name: str = 'id'):
+        self._record_data = record_data
+        self._index_dimension_name = index_dimension_name
+
+    @property
+    def record_data(self) -> pyarrow.Table:
+        """
+
+        :return:
+        """
+        return self._record_data
+
+    @property
+    def index_dimension_name(self) -> str:
+        """
+
+        :return:
+        """
+        return self._index_dimension_name
+
+    def to_csv(self,
+               path: Path,
+               write_header: bool = True,
+               write_index_dimension: bool = True,
+               index_dimension_name: str = 'id') -> None:
+        """
+
+        :param path:
+        :param write_header:
+        :param write_index_dimension:
+        :param index_dimension_name:
+        :return:
+        """
+        table = self._record_data
+        if not write_index_dimension:
+            table = table.drop([self._index_dimension_name])
+        elif index_dimension_name != self._index_dimension_name:
+            table = table.rename_columns([index_dimension_name if name == self._index_dimension_name else name
+                                          for name in table.column_names])
+
+        write_replacing(path=path,
+                        write_function=lambda temporary_path: pyarrow.csv.write_csv(
+                            data=table,
+                            output_file=str(temporary_path),
+                            write_options=pyarrow.csv.WriteOptions(include_header=write_header)
+                        ))
+
+    @classmethod
+    def from_csv(cls,
+                 path: Path,
+                 header_rows: int = 0,
+                 index_dimension_name: str = 'id',
+                 record_filter=None,
+                 columns: list = None,
+                 filters: list = None,
+                 record_schema: dict = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param path:
+        :param header_rows:
+        :param index_dimension_name:
+        :param record_filter: pyarrow.compute.Expression, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index dimension is always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
+        :param record_schema: types of the dimensions, inferred from the file if None
+        :return:
+        """
+        convert_options = pyarrow.csv.ConvertOptions()
+        if columns is not None:
+            convert_options.include_columns = _get_read_dimension_names(index_dimension_name=index_dimension_name,
+                                                                        columns=columns,
+                                                                        filters=filters)
+        if record_schema is not None:
+            convert_options.column_types = _get_arrow_types(record_schema=record_schema)
+
+        table = pyarrow.csv.read_csv(
+            input_file=str(path),
+            read_options=pyarrow.csv.ReadOptions(skip_rows=header_rows),
+            convert_options=convert_options
+        )
+        if record_schema is not None:
+            table = _apply_arrow_categories(records=table, record_schema=record_schema)
+        if filters is not None:
+            table = table.filter(pyarrow.parquet.filters_to_expression(filters))
+        # dimensions which were only read for the filters
+        if columns is not None:
+            table = table.select(_get_projected_dimension_names(index_dimension_name=index_dimension_name,
+                                                                columns=columns))
+
+        return ArrowObjectDatasetRecordData(record_data=table,
+                                            index_dimension_name=index_dimension_name).filter(record_filter=record_filter)
+
+    def to_parquet(self,
+                   path: Path) -> None:
+        """
+
+        :param path:
+        :return:
+        """
+        write_replacing(path=path,
+                        write_function=lambda temporary_path: pyarrow.parquet.write_table(
+                            table=self._record_data,
+                            where=str(temporary_path)))
+
+    @classmethod
+    def from_parquet(cls,
+                     path: Path,
+                     record_filter=None,
+                     columns: list = None,
+                     filters: list = None,
+                     index_dimension_name: str = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param path:
+        :param record_filter: pyarrow.compute.Expression, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index dimension is always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
+        :param index_dimension_name:
+        :return:
+        """
+        if index_dimension_name is None:
+            index_dimension_name = 'id'
+
+        stored_index_name = _get_stored_index_name(schema=pyarrow.parquet.read_schema(str(path)),
+                                                   index_dimension_name=index_dimension_name)
+
+        if (record_filter is not None and not isinstance(record_filter, pyarrow.compute.Expression)
+                and not callable(record_filter)):
+            filters = _add_index_filter(filters=filters,
+                                        index_dimension_name=stored_index_name,
+                                        index_values=record_filter)
+            record_filter = None
+
+        if columns is not None:
+            columns = [stored_index_name, *[column for column in columns if column != index_dimension_name]]
+
+        # only the selected columns and the row groups which can match the filters are decoded
+        table = pyarrow.parquet.read_table(
+            source=str(path),
+            columns=columns,
+            filters=filters)
+
+        if stored_index_name != index_dimension_name:
+            table = table.rename_columns([index_dimension_name if name == stored_index_name else name
+                                          for name in table.column_names])
+
+        return ArrowObjectDatasetRecordData(record_data=table,
+                                            index_dimension_name=index_dimension_name).filter(record_filter=record_filter)
+
+    def to_feather(self,
+                   path: Path) -> None:
+        """
+
+        :param path:
+        :return:
+        """
+        # uncompressed, so the file can be memory mapped instead of decoded
+        write_replacing(path=path,
+                        write_function=lambda temporary_path: pyarrow.feather.write_feather(
+                            df=self._record_data,
+                            dest=str(temporary_path),
+                            compression="uncompressed"))
+
+    @classmethod
+    def from_feather(cls,
+                     path: Path,
+                     record_filter=None,
+                     columns: list = None,
+                     filters: list = None,
+                     index_dimension_name: str = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+        The returned table references the memory mapped file, pages are loaded on access and shared
+        with other processes reading the same file.
+
+        :param path:
+        :param record_filter: pyarrow.compute.Expression, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index dimension is always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
+        :param index_dimension_name:
+        :return:
+        """
+        if index_dimension_name is None:
+            index_dimension_name = 'id'
+
+        table = pyarrow.feather.read_table(source=str(path), memory_map=True)
+
+        stored_index_name = _get_stored_index_name(schema=table.schema,
+                                                   index_dimension_name=index_dimension_name)
+        if stored_index_name != index_dimension_name:
+            table = table.rename_columns([index_dimension_name if name == stored_index_name else name
+                                          for name in table.column_names])
+
+        if columns is not None:
+            table = table.select(_get_read_dimension_names(index_dimension_name=index_dimension_name,
+                                                           columns=columns,
+                                                           filters=filters))
+        if filters is not None:
+            table = table.filter(pyarrow.parquet.filters_to_expression(filters))
+        # dimensions which were only selected for the filters
+        if columns is not None:
+            table = table.select(_get_projected_dimension_names(index_dimension_name=index_dimension_name,
+                                                                columns=columns))
+
+        return ArrowObjectDatasetRecordData(record_data=table,
+                                            index_dimension_name=index_dimension_name).filter(record_filter=record_filter)
+
+    def get_value(self,
+                  index,
+                  dimension_name: str):
+        """
+
+        :param index: value of the index dimension of the record
+        :param dimension_name:
+        :return:
+        """
+        records = self._record_data.filter(pyarrow.compute.field(self._index_dimension_name) == index)
+        if records.num_rows == 0:
+            raise KeyError(index)
+
+        return records.column(dimension_name)[0].as_py()
+
+    def get_dimension_values(self,
+                             dimension_name: str):
+        """
+
+        :param dimension_name:
+        :return: pyarrow.Array
+        """
+        return self._record_data.column(dimension_name).combine_chunks()
+
+    def iter_dimension_values(self,
+                              dimension_name: str):
+        """
+
+        :param dimension_name:
+        :return: iterator of pyarrow.Array
+        """
+        yield from self._record_data.column(dimension_name).chunks
+
+    def filter(self,
+               record_filter):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param record_filter: pyarrow.compute.Expression, callable which takes the pyarrow.Table and returns
+            a boolean mask, or list of index values
+        :return:
+        """
+        if record_filter is None:
+            return self
+
+        if isinstance(record_filter, str):
+            raise TypeError("Query strings need pandas record data. Use a pyarrow.compute.Expression instead.")
+
+        if isinstance(record_filter, pyarrow.compute.Expression) or callable(record_filter):
+            mask = record_filter if isinstance(record_filter, pyarrow.compute.Expression) \
+                else record_filter(self._record_data)
+        else:
+            mask = pyarrow.compute.is_in(self._record_data.column(self._index_dimension_name),
+                                         value_set=pyarrow.array(list(record_filter)))
+
+        return ArrowObjectDatasetRecordData(record_data=self._record_data.filter(mask),
+                                            index_dimension_name=self._index_dimension_name)
+
+    def get_schema(self,
+                   index_dimension_name: str) -> dict:
+        """
+
+        :param index_dimension_name:
+        :return: arrow types of the dimensions, levels of dictionary encoded dimensions
+        """
+        dimensions = []
+        for field in self._record_data.schema:
+            categories = None
+            if pyarrow.types.is_dictionary(field.type):
+                categories = list(dict.fromkeys(value for chunk in self._record_data.column(field.name).chunks
+                                                for value in chunk.dictionary.to_pylist()))
+            dimensions.append(_get_arrow_dimension_schema(field=field, categories=categories))
+
+        return {"index_dimension_name": index_dimension_name,
+                "dimensions": dimensions}
+
+    def get_delta(self,
+                  parent_record_data=None,
+                  parent_row_hashes: pandas.Series = None):
+        """
+        Records are matched with the parent by looking up their index values in the index of the parent,
+        the records are not converted to pandas. The caller makes sure that the parent has the same dimensions.
+
+        :param parent_record_data:
+        :param parent_row_hashes: hash of every record of the parent by index value
+        :return: (upserted records, deleted index values, index order or None if the order follows from the
+            parent) or None if the records can not be stored as delta, or more than half of them changed
+        """
+        table = self._record_data
+        index = table.column(self._index_dimension_name).combine_chunks()
+
+        parent_table = None
+        if parent_row_hashes is not None:
+            try:
+                parent_index = pyarrow.array(parent_row_hashes.index, type=index.type)
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, TypeError):
+                return None
+        else:
+            if isinstance(parent_record_data, PandasObjectDatasetRecordData):
+                parent_record_data = self.from_pandas(record_data=parent_record_data,
+                                                      index_dimension_name=self._index_dimension_name)
+            parent_table = parent_record_data.record_data
+            parent_index = parent_table.column(self._index_dimension_name).combine_chunks()
+
+        if index.type != parent_index.type or \
+                pyarrow.compute.count_distinct(index, mode="all").as_py() != len(index) or \
+                pyarrow.compute.count_distinct(parent_index, mode="all").as_py() != len(parent_index):
+            return None
+
+        # position of every record in the parent, null for inserted records
+        parent_positions = pyarrow.compute.index_in(index, value_set=parent_index)
+        is_inserted = parent_positions.is_null().to_numpy(zero_copy_only=False)
+        is_deleted = pyarrow.compute.invert(pyarrow.compute.is_in(parent_index, value_set=index))
+        kept_parent_positions = parent_positions.filter(pyarrow.array(~is_inserted))
+
+        if parent_row_hashes is not None:
+            is_updated = self.get_row_hashes().to_numpy()[~is_inserted] != \
+                parent_row_hashes.to_numpy()[kept_parent_positions.to_numpy()]
+        else:
+            if parent_table.schema.names != table.schema.names or parent_table.schema.types != table.schema.types:
+                return None
+
+            is_updated = _get_arrow_updated_mask(table=table.filter(pyarrow.array(~is_inserted)),
+                                                 parent_table=parent_table.take(kept_parent_positions),
+                                                 index_dimension_name=self._index_dimension_name
+                                                 ).to_numpy(zero_copy_only=False)
+
+        is_upserted = is_inserted.copy()
+        is_upserted[~is_inserted] = is_updated
+        if is_upserted.sum() + pyarrow.compute.sum(is_deleted).as_py() > len(index) // 2:
+            return None
+
+        natural_order = pyarrow.concat_arrays([parent_index.filter(pyarrow.compute.invert(is_deleted)),
+                                               index.filter(pyarrow.array(is_inserted))])
+        index_order = None if index.equals(natural_order) else index.to_pylist()
+
+        return ArrowObjectDatasetRecordData(record_data=table.filter(pyarrow.array(is_upserted)),
+                                            index_dimension_name=self._index_dimension_name), \
+            parent_index.filter(is_deleted).to_pylist(), index_order
+
+    def apply_delta(self,
+                    upserted_records,
+                    deleted_index_values: list,
+                    index_order: list = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param upserted_records: inserted and updated records
+        :param deleted_index_values:
+        :param index_order: index values in the order of the records, inserted records are appended if None
+        :return:
+        """
+        table = self._record_data
+        index_type = table.schema.field(self._index_dimension_name).type
+
+        if isinstance(upserted_records, PandasObjectDatasetRecordData):
+            upserted_records = self.from_pandas(record_data=upserted_records,
+                                                index_dimension_name=self._index_dimension_name)
+        upserted_table = upserted_records.record_data.select(table.schema.names)
+        if not upserted_table.schema.equals(table.schema, check_metadata=False):
+            upserted_table = upserted_table.cast(table.schema)
+        upserted_table = upserted_table.replace_schema_metadata(table.schema.metadata)
+
+        kept_table = table.filter(pyarrow.compute.invert(pyarrow.compute.is_in(
+            table.column(self._index_dimension_name),
+            value_set=pyarrow.array(deleted_index_values, type=index_type))))
+        kept_index = kept_table.column(self._index_dimension_name).combine_chunks()
+        upserted_index = upserted_table.column(self._index_dimension_name).combine_chunks()
+
+        combined_table = pyarrow.concat_tables([
+            kept_table.filter(pyarrow.compute.invert(pyarrow.compute.is_in(kept_index, value_set=upserted_index))),
+            upserted_table])
+
+        if index_order is None:
+            is_inserted = pyarrow.compute.invert(pyarrow.compute.is_in(upserted_index, value_set=kept_index))
+            order = pyarrow.concat_arrays([kept_index, upserted_index.filter(is_inserted)])
+        else:
+            order = pyarrow.array(index_order, type=index_type)
+
+        positions = pyarrow.compute.index_in(order, value_set=combined_table.column(self._index_dimension_name))
+
+        return ArrowObjectDatasetRecordData(record_data=combined_table.take(positions),
+                                            index_dimension_name=self._index_dimension_name)
+
+    def get_row_hashes(self) -> pandas.Series:
+        """
+        The records are hashed like pandas record data, the table is converted in chunks of hash_chunk_size records.
+
+        :return: uint64 hash of every record by index value
+        """
+        return _get_arrow_row_hashes(table=self._record_data,
+                                     index_dimension_name=self._index_dimension_name,
+                                     chunk_size=self.hash_chunk_size)
+
+    @classmethod
+    def from_pandas(cls,
+                    record_data: PandasObjectDatasetRecordData,
+                    index_dimension_name: str = 'id'):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param record_data:
+        :param index_dimension_name:
+        :return:
+        """
+        df = record_data.record_data.rename_axis(index_dimension_name).reset_index()
+
+        return ArrowObjectDatasetRecordData(record_data=pyarrow.Table.from_pandas(df, preserve_index=False),
+                                            index_dimension_name=index_dimension_name)
+
+    def to_pandas(self) -> PandasObjectDatasetRecordData:
+        """
+        Converts the records to pandas. Numeric dimensions without nulls are not copied.
+
+        :return:
+        """
+        df = self._record_data.to_pandas(split_blocks=True)
+        # tables read from files written by pandas restore the index from their metadata
+        if self._index_dimension_name in df.columns:
+            df = df.set_index(self._index_dimension_name)
+
+        return PandasObjectDatasetRecordData(record_data=df)
+
+
+class StreamingObjectDatasetRecordData(ObjectDatasetRecordData):
+    """
+    This class
+
+    Keeps the records as a stream of pyarrow.RecordBatch which are read and written one at a time,
+    so the records do not have to fit into memory. The index is a regular dimension of the batches.
+    Records read from a file can be iterated several times. Records given as a one-shot iterator
+    are read back from the file they were written to, after they were written. Files are written
+    under a temporary name, so the records of a version can be streamed into its amendment.
+    """
+
+    # number of rows per batch when reading parquet and feather files
+    read_batch_size = 65536
+    # number of bytes per batch when reading csv files. The types of the dimensions are inferred from
+    # the first batch.
+    read_block_size = 16 * 1024 * 1024
+
+    def __init__(self,
+                 record_data=None,
+                 index_dimension_name: str = 'id'):
+        """
+
+        :param record_data: iterable of pyarrow.RecordBatch, pyarrow.Table or pandas.DataFrame, or a callable
+            which returns a new such iterable on every call
+        :param index_dimension_name:
+        """
+        self._index_dimension_name = index_dimension_name
+        # schema of the batches written last
+        self._schema = None
+        if record_data is None or callable(record_data):
+            self._batch_source = record_data
+        else:
+            self._batch_source = lambda: record_data
+
+    @property
+    def record_data(self):
+        """
+
+        :return: iterator of pyarrow.RecordBatch
+        """
+        if self._batch_source is None:
+            return iter(())
+
+        return self._iter_batches()
+
+    @property
+    def index_dimension_name(self) -> str:
+        """
+
+        :return:
+        """
+        return self._index_dimension_name
+
+    def _iter_batches(self):
+        for batch in self._batch_source():
+            if isinstance(batch, pandas.DataFrame):
+                batch = pyarrow.Table.from_pandas(batch.rename_axis(self._index_dimension_name).reset_index(),
+                                                  preserve_index=False)
+            if isinstance(batch, pyarrow.Table):
+                yield from batch.to_batches()
+            else:
+                yield batch
+
+    @staticmethod
+    def _rename_dimension(batch: pyarrow.RecordBatch,
+                          dimension_name: str,
+                          new_dimension_name: str) -> pyarrow.RecordBatch:
+        return pyarrow.RecordBatch.from_arrays(
+            batch.columns,
+            names=[new_dimension_name if name == dimension_name else name for name in batch.schema.names])
+
+    @staticmethod
+    def _select_dimensions(batch: pyarrow.RecordBatch,
+                           dimension_names: list) -> pyarrow.RecordBatch:
+        return pyarrow.RecordBatch.from_arrays(
+            [batch.column(dimension_name) for dimension_name in dimension_names],
+            names=dimension_names)
+
+    def _get_written_batches(self) -> tuple:
+        """
+        Records without batches are written with the schema of the batches written last, or with the
+        index dimension only, so readers of the file still find its dimensions.
+
+        :return: (schema, iterator of the batches to write)
+        """
+        batches = self.record_data
+        first_batch = next(batches, None)
+        if first_batch is not None:
+            self._schema = first_batch.schema
+            return self._schema, itertools.chain([first_batch], batches)
+
+        if self._schema is None:
+            self._schema = pyarrow.schema([(self._index_dimension_name, pyarrow.null())])
+        return self._schema, batches
+
+    @classmethod
+    def _from_batch_source(cls,
+                           batch_source,
+                           index_dimension_name: str,
+                           stored_index_name: str = None,
+                           columns: list = None,
+                           filters: list = None,
+                           record_filter=None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+        Applies renaming of the index, projection and filters lazily to every batch of the source.
+
+        :param batch_source: callable which returns an iterator of pyarrow.RecordBatch
+        :param index_dimension_name:
+        :param stored_index_name:
+        :param columns:
+        :param filters:
+        :param record_filter:
+        :return:
+        """
+        read_dimension_names = _get_read_dimension_names(index_dimension_name=index_dimension_name,
+                                                         columns=columns,
+                                                         filters=filters)
+
+        def prepared_batch_source():
+            for batch in batch_source():
+                if stored_index_name is not None and stored_index_name != index_dimension_name:
+                    batch = cls._rename_dimension(batch=batch,
+                                                  dimension_name=stored_index_name,
+                                                  new_dimension_name=index_dimension_name)
+                if read_dimension_names is not None:
+                    batch = cls._select_dimensions(batch=batch, dimension_names=read_dimension_names)
+                yield batch
+
+        records = StreamingObjectDatasetRecordData(record_data=prepared_batch_source,
+                                                   index_dimension_name=index_dimension_name)
+        if filters is not None:
+            records = records.filter(record_filter=pyarrow.parquet.filters_to_expression(filters))
+
+        # dimensions which were only read for the filters
+        dimension_names = None if columns is None else \
+            _get_projected_dimension_names(index_dimension_name=index_dimension_name, columns=columns)
+        if dimension_names != read_dimension_names:
+            filtered_records = records
+
+            def projected_batch_source():
+                for batch in filtered_records.record_data:
+                    yield cls._select_dimensions(batch=batch, dimension_names=dimension_names)
+
+            records = StreamingObjectDatasetRecordData(record_data=projected_batch_source,
+                                                       index_dimension_name=index_dimension_name)
+
+        return records.filter(record_filter=record_filter)
+
+    def to_csv(self,
+               path: Path,
+               write_header: bool = True,
+               write_index_dimension: bool = True,
+               index_dimension_name: str = 'id') -> None:
+        """
+
+        :param path:
+        :param write_header:
+        :param write_index_dimension:
+        :param index_dimension_name:
+        :return:
+        """
+        schema, batches = self._get_written_batches()
+
+        def prepare(batch: pyarrow.RecordBatch) -> pyarrow.RecordBatch:
+            if not write_index_dimension:
+                return self._select_dimensions(batch=batch,
+                                               dimension_names=[name for name in batch.schema.names
+                                                                if name != self._index_dimension_name])
+            return self._rename_dimension(batch=batch,
+                                          dimension_name=self._index_dimension_name,
+                                          new_dimension_name=index_dimension_name)
+
+        written_schema = prepare(pyarrow.RecordBatch.from_pylist([], schema=schema)).schema
+
+        def write(temporary_path: Path) -> None:
+            with pyarrow.csv.CSVWriter(str(temporary_path), written_schema,
+                                       write_options=pyarrow.csv.WriteOptions(include_header=write_header)) as writer:
+                for batch in batches:
+                    writer.write_batch(prepare(batch))
+
+        write_replacing(path=path, write_function=write)
+
+        if write_header and write_index_dimension:
+            self._schema = written_schema
+            self._batch_source = self.from_csv(path=path,
+                                               header_rows=0,
+                                               index_dimension_name=index_dimension_name,
+                                               record_schema=self.get_schema(
+                                                   index_dimension_name=index_dimension_name))._batch_source
+            self._index_dimension_name = index_dimension_name
+
+    @classmethod
+    def from_csv(cls,
+                 path: Path,
+                 header_rows: int = 0,
+                 index_dimension_name: str = 'id',
+                 record_filter=None,
+                 columns: list = None,
+                 filters: list = None,
+                 record_schema: dict = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param path:
+        :param header_rows:
+        :param index_dimension_name:
+        :param record_filter: pyarrow.compute.Expression, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index dimension is always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
+        :param record_schema: types of the dimensions, inferred from the first batch if None
+        :return:
+        """
+        convert_options = pyarrow.csv.ConvertOptions()
+        if columns is not None:
+            convert_options.include_columns = _get_read_dimension_names(index_dimension_name=index_dimension_name,
+                                                                        columns=columns,
+                                                                        filters=filters)
+        if record_schema is not None:
+            convert_options.column_types = _get_arrow_types(record_schema=record_schema)
+
+        def batch_source():
+            reader = pyarrow.csv.open_csv(
+                input_file=str(path),
+                read_options=pyarrow.csv.ReadOptions(skip_rows=header_rows, block_size=cls.read_block_size),
+                convert_options=convert_options
+            )
+            for batch in _iter_batches_with_schema(batches=reader, schema=reader.schema):
+                yield batch if record_schema is None else \
+                    _apply_arrow_categories(records=batch, record_schema=record_schema)
+
+        return cls._from_batch_source(batch_source=batch_source,
+                                      index_dimension_name=index_dimension_name,
+                                      columns=columns,
+                                      filters=filters,
+                                      record_filter=record_filter)
+
+    def to_parquet(self,
+                   path: Path) -> None:
+        """
+
+        :param path:
+        :return:
+        """
+        schema, batches = self._get_written_batches()
+
+        def write(temporary_path: Path) -> None:
+            with pyarrow.parquet.ParquetWriter(str(temporary_path), schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+
+        write_replacing(path=path, write_function=write)
+
+        self._batch_source = self.from_parquet(path=path,
+                                               index_dimension_name=self._index_dimension_name)._batch_source
+
+    @classmethod
+    def from_parquet(cls,
+                     path: Path,
+                     record_filter=None,
+                     columns: list = None,
+                     filters: list = None,
+                     index_dimension_name: str = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param path:
+        :param record_filter: pyarrow.compute.Expression, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index dimension is always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
+        :param index_dimension_name:
+        :return:
+        """
+        if index_dimension_name is None:
+            index_dimension_name = 'id'
+
+        stored_index_name = _get_stored_index_name(schema=pyarrow.parquet.read_schema(str(path)),
+                                                   index_dimension_name=index_dimension_name)
+
+        if (record_filter is not None and not isinstance(record_filter, pyarrow.compute.Expression)
+                and not callable(record_filter)):
+            filters = _add_index_filter(filters=filters,
+                                        index_dimension_name=stored_index_name,
+                                        index_values=record_filter)
+            record_filter = None
+
+        if columns is not None:
+            columns = [stored_index_name, *[column for column in columns if column != index_dimension_name]]
+        expression = None if filters is None else pyarrow.parquet.filters_to_expression(filters)
+
+        # only the selected columns and the row groups which can match the filters are decoded
+        def batch_source():
+            scanner = pyarrow.dataset.dataset(source=str(path), format="parquet").scanner(
+                columns=columns,
+                filter=expression,
+                batch_size=cls.read_batch_size
+            )
+            yield from _iter_batches_with_schema(batches=scanner.to_batches(), schema=scanner.projected_schema)
+
+        return cls._from_batch_source(batch_source=batch_source,
+                                      index_dimension_name=index_dimension_name,
+                                      stored_index_name=stored_index_name,
+                                      record_filter=record_filter)
+
+    def to_feather(self,
+                   path: Path) -> None:
+        """
+
+        :param path:
+        :return:
+        """
+        schema, batches = self._get_written_batches()
+
+        def write(temporary_path: Path) -> None:
+            # uncompressed, so the file can be memory mapped instead of decoded
+            with pyarrow.ipc.new_file(str(temporary_path), schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+
+        write_replacing(path=path, write_function=write)
+
+        self._batch_source = self.from_feather(path=path,
+                                               index_dimension_name=self._index_dimension_name)._batch_source
+
+    @classmethod
+    def from_feather(cls,
+                     path: Path,
+                     record_filter=None,
+                     columns: list = None,
+                     filters: list = None,
+                     index_dimension_name: str = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param path:
+        :param record_filter: pyarrow.compute.Expression, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index dimension is always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
+        :param index_dimension_name:
+        :return:
+        """
+        if index_dimension_name is None:
+            index_dimension_name = 'id'
+
+        def batch_source():
+            # the batches reference the memory mapped file
+            reader = pyarrow.ipc.open_file(pyarrow.memory_map(str(path)))
+            yield from _iter_batches_with_schema(batches=(reader.get_batch(batch_index) for
+                                                          batch_index in range(reader.num_record_batches)),
+                                                 schema=reader.schema)
+
+        return cls._from_batch_source(batch_source=batch_source,
+                                      index_dimension_name=index_dimension_name,
+                                      stored_index_name=_get_stored_index_name(
+                                          schema=pyarrow.ipc.open_file(pyarrow.memory_map(str(path))).schema,
+                                          index_dimension_name=index_dimension_name),
+                                      columns=columns,
+                                      filters=filters,
+                                      record_filter=record_filter)
+
+    def get_value(self,
+                  index,
+                  dimension_name: str):
+        """
+        Scans the batches until the record is found.
+
+        :param index: value of the index dimension of the record
+        :param dimension_name:
+        :return:
+        """
+        for batch in self.record_data:
+            position = pyarrow.compute.index(batch.column(self._index_dimension_name), index).as_py()
+            if position != -1:
+                return batch.column(dimension_name)[position].as_py()
+
+        raise KeyError(index)
+
+    def get_dimension_values(self,
+                             dimension_name: str):
+        """
+        Collects the dimension of all batches, iter_dimension_values keeps the memory bounded.
+
+        :param dimension_name:
+        :return: pyarrow.Array
+        """
+        values = list(self.iter_dimension_values(dimension_name=dimension_name))
+        if len(values) == 0:
+            return pyarrow.array([])
+
+        return pyarrow.concat_arrays(values)
+
+    def iter_dimension_values(self,
+                              dimension_name: str):
+        """
+
+        :param dimension_name:
+        :return: iterator of pyarrow.Array
+        """
+        for batch in self.record_data:
+            yield batch.column(dimension_name)
+
+    def filter(self,
+               record_filter):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+        The filter is applied lazily to every batch.
+
+        :param record_filter: pyarrow.compute.Expression, callable which takes a pyarrow.RecordBatch and returns
+            a boolean mask, or list of index values
+        :return:
+        """
+        if record_filter is None:
+            return self
+
+        if isinstance(record_filter, str):
+            raise TypeError("Query strings need pandas record data. Use a pyarrow.compute.Expression instead.")
+
+        index_values = None
+        if not isinstance(record_filter, pyarrow.compute.Expression) and not callable(record_filter):
+            index_values = pyarrow.array(list(record_filter))
+
+        def filtered_batch_source():
+            empty_batch = None
+            is_empty = True
+            for batch in self.record_data:
+                if isinstance(record_filter, pyarrow.compute.Expression):
+                    mask = record_filter
+                elif index_values is not None:
+                    mask = pyarrow.compute.is_in(batch.column(self._index_dimension_name), value_set=index_values)
+                else:
+                    mask = record_filter(batch)
+                for filtered_batch in pyarrow.Table.from_batches([batch]).filter(mask).to_batches():
+                    is_empty = False
+                    yield filtered_batch
+                empty_batch = batch.slice(0, 0)
+
+            # records without matches keep the dimensions of the filtered records
+            if is_empty and empty_batch is not None:
+                yield empty_batch
+
+        return StreamingObjectDatasetRecordData(record_data=filtered_batch_source,
+                                                index_dimension_name=self._index_dimension_name)
+
+    def get_schema(self,
+                   index_dimension_name: str) -> dict:
+        """
+
+        :param index_dimension_name:
+        :return: arrow types of the dimensions, taken from the first batch if nothing was written yet
+        """
+        schema = self._schema
+        if schema is None:
+            first_batch = next(self.record_data, None)
+            if first_batch is None:
+                return None
+            schema = first_batch.schema
+
+        return {"index_dimension_name": index_dimension_name,
+                "dimensions": [_get_arrow_dimension_schema(field=field) for field in schema]}
+
+    @property
+    def supports_delta(self) -> bool:
+        """
+        Streamed records are always stored completely, finding the changed records would need all of them at once.
+
+        :return:
+        """
+        return False
+
+    def get_delta(self,
+                  parent_record_data=None,
+                  parent_row_hashes: pandas.Series = None):
+        """
+
+        :param parent_record_data:
+        :param parent_row_hashes:
+        :return: None, streamed records are always stored completely
+        """
+        return None
+
+    def apply_delta(self,
+                    upserted_records,
+                    deleted_index_values: list,
+                    index_order: list = None):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+        Versions stored as delta are collected into one table to apply the delta, they are not streamed.
+
+        :param upserted_records: inserted and updated records
+        :param deleted_index_values:
+        :param index_order: index values in the order of the records, inserted records are appended if None
+        :return:
+        """
+        batches = list(self.record_data)
+        upserted_batches = list(upserted_records.record_data)
+        if len(batches) == 0 and len(upserted_batches) == 0:
+            return self
+        table = pyarrow.Table.from_batches(batches) if len(batches) != 0 else None
+        upserted_table = pyarrow.Table.from_batches(upserted_batches) if len(upserted_batches) != 0 else None
+        if table is None:
+            table = upserted_table.schema.empty_table()
+        if upserted_table is None or upserted_table.schema != table.schema:
+            upserted_table = table.schema.empty_table() if upserted_table is None else \
+                upserted_table.select(table.schema.names).cast(table.schema)
+
+        records = ArrowObjectDatasetRecordData(
+            record_data=table,
+            index_dimension_name=self._index_dimension_name
+        ).apply_delta(
+            upserted_records=ArrowObjectDatasetRecordData(
+                record_data=upserted_table,
+                index_dimension_name=self._index_dimension_name),
+            deleted_index_values=deleted_index_values,
+            index_order=index_order)
+
+        return StreamingObjectDatasetRecordData(record_data=records.record_data.to_batches,
+                                                index_dimension_name=self._index_dimension_name)
+
+    def get_row_hashes(self) -> pandas.Series:
+        """
+        The records are hashed batch by batch, only the hashes are collected.
+
+        :return: uint64 hash of every record by index value
+        """
+        hashes = [ArrowObjectDatasetRecordData(
+            record_data=pyarrow.Table.from_batches([batch]),
+            index_dimension_name=self._index_dimension_name
+        ).get_row_hashes() for batch in self.record_data]
+        if len(hashes) == 0:
+            return pandas.Series([], dtype="uint64", index=pandas.Index([], name=self._index_dimension_name))
+
+        return pandas.concat(hashes)
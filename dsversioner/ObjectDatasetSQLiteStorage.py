@@ -0,0 +1,472 @@
+"""
+This module
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+
+from .Exceptions import DatasetExistsException, DatasetDoesNotExistException, DatasetVersionDoesNotExistException, \
+    BranchAmendException
+from .FileSystemStorage import FileSystemStorage
+from .FileTransfer import write_replacing
+from .ObjectDatasetMetadata import ObjectDatasetMetadata
+from .ObjectDatasetStorage import ObjectDatasetVersionStorage, ObjectDatasetMetadataStorage
+from .ObjectDatasetVersion import ObjectDatasetVersion
+
+
+class SQLiteStorage(FileSystemStorage):
+    """
+    This class keeps the catalog of a dataset in a SQLite database in the storage directory of the dataset.
+    The database is in WAL mode, so pulls of other processes are not blocked by commits. Every thread
+    uses a connection of its own.
+    """
+
+    file_name = None
+    schema = None
+
+    def __init__(self,
+                 root_path: Path):
+        self._root_path = root_path
+        self._connections = threading.local()
+
+    @property
+    def root_path(self) -> Path:
+        """
+
+        :return:
+        """
+        return self._root_path
+
+    def _get_database_path(self,
+                           dataset_name: str) -> Path:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+        return Path(self.root_path, dataset_name, self.storage_identifier, self.file_name)
+
+    def _get_thread_connections(self) -> dict:
+        """
+
+        :return: connections of the current thread by database path
+        """
+        connections = getattr(self._connections, "connections", None)
+        if connections is None:
+            connections = {}
+            self._connections.connections = connections
+
+        return connections
+
+    def _connect(self,
+                 dataset_name: str) -> sqlite3.Connection:
+        """
+
+        :param dataset_name:
+        :return: connection of the current thread
+        """
+        database_path = self._get_database_path(dataset_name=dataset_name)
+        connections = self._get_thread_connections()
+
+        connection = connections.get(database_path)
+        if connection is None:
+            # mode=rw does not create missing databases
+            try:
+                connection = sqlite3.connect(f"{database_path.absolute().as_uri()}?mode=rw",
+                                             uri=True,
+                                             isolation_level=None)
+            except sqlite3.OperationalError:
+                raise DatasetDoesNotExistException(dataset_name=dataset_name)
+            # commits are durable after a checkpoint of the WAL, which is enough to survive application crashes
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            connections[database_path] = connection
+
+        return connection
+
+    def _close(self,
+               dataset_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+        connection = self._get_thread_connections().pop(self._get_database_path(dataset_name=dataset_name), None)
+        if connection is not None:
+            connection.close()
+
+    def init(self,
+             dataset_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+
+        if os.path.exists(storage_path):
+            raise DatasetExistsException(dataset_name=dataset_name)
+
+        os.makedirs(storage_path)
+
+        self._create_database(dataset_name=dataset_name)
+
+    def import_dataset(self,
+                       dataset_name: str,
+                       storage) -> None:
+        """
+        Copies the catalog of the dataset from another storage of the same kind, e.g. the file system storage
+        the dataset was created with, into a new database. The other storage is not changed, the database
+        is only in place once it is complete.
+
+        :param dataset_name:
+        :param storage: storage which has the dataset
+        :return:
+        """
+        database_path = self._get_database_path(dataset_name=dataset_name)
+
+        if os.path.exists(database_path):
+            raise DatasetExistsException(dataset_name=dataset_name)
+
+        os.makedirs(database_path.parent, exist_ok=True)
+
+        self._create_database(dataset_name=dataset_name,
+                              write_function=lambda connection: self._import(connection=connection,
+                                                                             dataset_name=dataset_name,
+                                                                             storage=storage))
+
+    def _import(self,
+                connection: sqlite3.Connection,
+                dataset_name: str,
+                storage) -> None:
+        """
+
+        :param connection: connection to the new database, in a transaction
+        :param dataset_name:
+        :param storage:
+        :return:
+        """
+        raise NotImplementedError()
+
+    def _create_database(self,
+                         dataset_name: str,
+                         write_function=None) -> None:
+        """
+        Writes the database with the schema to a temporary file, which is renamed into place.
+
+        :param dataset_name:
+        :param write_function: called with a connection to the new database in a transaction to fill it
+        :return:
+        """
+
+        def write_database(temporary_path: Path) -> None:
+            connection = sqlite3.connect(temporary_path, isolation_level=None)
+            try:
+                connection.executescript(self.schema)
+                if write_function is not None:
+                    connection.execute("BEGIN")
+                    write_function(connection)
+                    connection.execute("COMMIT")
+                # the journal mode is stored in the database
+                connection.execute("PRAGMA journal_mode=WAL")
+            finally:
+                connection.close()
+
+        write_replacing(path=self._get_database_path(dataset_name=dataset_name),
+                        write_function=write_database)
+
+    def drop(self,
+             dataset_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+        storage_path = Path(self.root_path, dataset_name, self.storage_identifier)
+
+        self._close(dataset_name=dataset_name)
+
+        if os.path.exists(storage_path):
+            shutil.rmtree(storage_path)
+
+
+class SQLiteObjectDatasetVersionStorage(SQLiteStorage, ObjectDatasetVersionStorage):
+    """
+    This class
+    """
+
+    file_name = "version.sqlite"
+    schema = """
+        CREATE TABLE versions
+        (
+            id   INTEGER NOT NULL,
+            name TEXT DEFAULT NULL,
+            PRIMARY KEY (id)
+        );
+
+        CREATE INDEX versions_name ON versions (name);
+    """
+
+    def commit(self,
+               dataset_name: str,
+               dataset_version: ObjectDatasetVersion,
+               amend: bool,
+               branch: str = None) -> ObjectDatasetVersion:
+        """
+        Commits to all branches insert into the same table, the write transaction only lasts for the insert.
+
+        :param dataset_name:
+        :param dataset_version:
+        :param amend:
+        :param branch:
+        :return:
+        """
+        if branch is not None and amend:
+            raise BranchAmendException(dataset_name=dataset_name, ref_name=branch)
+
+        connection = self._connect(dataset_name=dataset_name)
+
+        # the write lock is taken at the beginning, so concurrent commits get different ids
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            max_version_id = connection.execute("SELECT coalesce(max(id), 0) FROM versions").fetchone()[0]
+
+            committed_version = None
+            if amend:
+                if max_version_id != 0:
+                    # replace last version
+                    committed_version = ObjectDatasetVersion(name=dataset_version.name,
+                                                             id=max_version_id)
+                    connection.execute("UPDATE versions SET name = ? WHERE id = ?",
+                                       (committed_version.name, committed_version.id))
+            else:
+                committed_version = ObjectDatasetVersion(name=dataset_version.name,
+                                                         id=max_version_id + 1)
+                connection.execute("INSERT INTO versions (id, name) VALUES (?, ?)",
+                                   (committed_version.id, committed_version.name))
+
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        return committed_version
+
+    def pull(self,
+             dataset_name: str,
+             dataset_version: ObjectDatasetVersion = None) -> ObjectDatasetVersion:
+        """
+        Versions without id are looked up by name, the latest version with the name is returned.
+
+        :param dataset_name:
+        :param dataset_version:
+        :return:
+        """
+        connection = self._connect(dataset_name=dataset_name)
+
+        if dataset_version is None:
+            # return latest
+            row = connection.execute("SELECT id, name FROM versions ORDER BY id DESC LIMIT 1").fetchone()
+        elif dataset_version.id is None and dataset_version.name is not None:
+            row = connection.execute("SELECT id, name FROM versions WHERE name = ? ORDER BY id DESC LIMIT 1",
+                                     (dataset_version.name,)).fetchone()
+        else:
+            row = connection.execute("SELECT id, name FROM versions WHERE id = ?",
+                                     (dataset_version.id,)).fetchone()
+
+        if row is not None:
+            return ObjectDatasetVersion(id=row[0], name=row[1])
+
+        # did not find anything
+        raise DatasetVersionDoesNotExistException(
+            dataset_name=dataset_name,
+            dataset_version="latest" if dataset_version is None else
+            f"name: {dataset_version.name}" if dataset_version.id is None else f"id: {dataset_version.id}")
+
+    def log(self,
+            dataset_name: str,
+            limit: int = None,
+            offset: int = 0,
+            before_version: ObjectDatasetVersion = None) -> list:
+        """
+
+        :param dataset_name:
+        :param limit: maximal number of versions, all if None
+        :param offset: number of versions to skip
+        :param before_version: only versions older than this version are returned, e.g. the last version
+            of the previous page
+        :return: versions, newest first
+        """
+        connection = self._connect(dataset_name=dataset_name)
+
+        # the primary key is walked backwards from the cursor
+        rows = connection.execute("SELECT id, name FROM versions WHERE id < ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                                  (before_version.id if before_version is not None else 2 ** 63 - 1,
+                                   limit if limit is not None else -1,
+                                   offset)).fetchall()
+
+        return [ObjectDatasetVersion(id=row[0], name=row[1]) for row in rows]
+
+    def _import(self,
+                connection: sqlite3.Connection,
+                dataset_name: str,
+                storage: ObjectDatasetVersionStorage) -> None:
+        """
+
+        :param connection:
+        :param dataset_name:
+        :param storage:
+        :return:
+        """
+        connection.executemany("INSERT INTO versions (id, name) VALUES (?, ?)",
+                               [(version.id, version.name) for version in storage.log(dataset_name=dataset_name)])
+
+
+class SQLiteObjectDatasetMetadataStorage(SQLiteStorage, ObjectDatasetMetadataStorage):
+    """
+    This class
+    """
+
+    file_name = "metadata.sqlite"
+    schema = """
+        CREATE TABLE metadata
+        (
+            version_id INTEGER NOT NULL,
+            metadata   TEXT    NOT NULL,
+            PRIMARY KEY (version_id)
+        );
+
+        -- inverted index of the public metadata, values are stored as json
+        CREATE TABLE public_metadata_index
+        (
+            key        TEXT    NOT NULL,
+            value      TEXT    NOT NULL,
+            version_id INTEGER NOT NULL,
+            PRIMARY KEY (key, value, version_id)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX public_metadata_index_version_id ON public_metadata_index (version_id);
+    """
+
+    def commit(self,
+               dataset_name: str,
+               dataset_version: ObjectDatasetVersion,
+               dataset_metadata: ObjectDatasetMetadata,
+               amend: bool) -> None:
+        """
+
+        :param dataset_name:
+        :param dataset_version:
+        :param dataset_metadata:
+        :param amend:
+        :return:
+        """
+        connection = self._connect(dataset_name=dataset_name)
+
+        content = json.dumps(dataset_metadata,
+                             default=lambda obj: obj.to_json())
+
+        index_rows = self._get_index_rows(dataset_version=dataset_version,
+                                          dataset_metadata=dataset_metadata)
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if amend:
+                # replace
+                if connection.execute("UPDATE metadata SET metadata = ? WHERE version_id = ?",
+                                      (content, dataset_version.id)).rowcount != 0:
+                    connection.execute("DELETE FROM public_metadata_index WHERE version_id = ?",
+                                       (dataset_version.id,))
+                    connection.executemany("INSERT INTO public_metadata_index (key, value, version_id) "
+                                           "VALUES (?, ?, ?)", index_rows)
+            else:
+                connection.execute("INSERT INTO metadata (version_id, metadata) VALUES (?, ?)",
+                                   (dataset_version.id, content))
+                connection.executemany("INSERT INTO public_metadata_index (key, value, version_id) "
+                                       "VALUES (?, ?, ?)", index_rows)
+
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _get_index_rows(dataset_version: ObjectDatasetVersion,
+                        dataset_metadata: ObjectDatasetMetadata) -> list:
+        """
+
+        :param dataset_version:
+        :param dataset_metadata:
+        :return: rows of the index of the public metadata
+        """
+        return [(key, json.dumps(value, sort_keys=True), dataset_version.id) for
+                key, value in (dataset_metadata.public_metadata.to_json() or {}).items()]
+
+    def _import(self,
+                connection: sqlite3.Connection,
+                dataset_name: str,
+                storage: ObjectDatasetMetadataStorage) -> None:
+        """
+
+        :param connection:
+        :param dataset_name:
+        :param storage:
+        :return:
+        """
+        # without conditions every version matches
+        for dataset_version in storage.query(dataset_name=dataset_name, public_metadata={}):
+            dataset_metadata = storage.pull(dataset_name=dataset_name, dataset_version=dataset_version)
+            connection.execute("INSERT INTO metadata (version_id, metadata) VALUES (?, ?)",
+                               (dataset_version.id, json.dumps(dataset_metadata,
+                                                               default=lambda obj: obj.to_json())))
+            connection.executemany("INSERT INTO public_metadata_index (key, value, version_id) VALUES (?, ?, ?)",
+                                   self._get_index_rows(dataset_version=dataset_version,
+                                                        dataset_metadata=dataset_metadata))
+
+    def pull(self,
+             dataset_name: str,
+             dataset_version: ObjectDatasetVersion) -> ObjectDatasetMetadata:
+        """
+
+        :param dataset_name:
+        :param dataset_version:
+        :return:
+        """
+        connection = self._connect(dataset_name=dataset_name)
+
+        row = connection.execute("SELECT metadata FROM metadata WHERE version_id = ?",
+                                 (dataset_version.id,)).fetchone()
+
+        if row is not None:
+            return ObjectDatasetMetadata.from_json(json.loads(row[0]))
+
+        # did not find anything
+        raise DatasetVersionDoesNotExistException(dataset_name=dataset_name,
+                                                  dataset_version=f"id: {dataset_version.id}")
+
+    def query(self,
+              dataset_name: str,
+              public_metadata: dict) -> list:
+        """
+        Looks the versions up in the index of the public metadata, the metadata of the versions is not read.
+
+        :param dataset_name:
+        :param public_metadata: keys and values which the public metadata of the versions contains
+        :return: versions ordered by id, only their ids are set
+        """
+        connection = self._connect(dataset_name=dataset_name)
+
+        # without conditions every version matches
+        statements = ["SELECT version_id FROM metadata"]
+        parameters = []
+        for key, value in public_metadata.items():
+            statements.append("SELECT version_id FROM public_metadata_index WHERE key = ? AND value = ?")
+            parameters.extend((key, json.dumps(value, sort_keys=True)))
+
+        rows = connection.execute(f"{' INTERSECT '.join(statements)} ORDER BY version_id", parameters).fetchall()
+
+        return [ObjectDatasetVersion.from_id(id=row[0]) for row in rows]
@@ -7,10 +7,12 @@ from abc import abstractmethod
 from pathlib import Path
 from typing import Type
 
+import pandas
+
 from .ObjectDatasetMetadata import ObjectDatasetMetadata
 from .ObjectDatasetRecordData import ObjectDatasetRecordData
 from .ObjectDatasetVersion import ObjectDatasetVersion
-from .Storage import MetadataStorage, VersionStorage, ObjectStorage, RecordStorage
+from .Storage import MetadataStorage, VersionStorage, ObjectStorage, RecordStorage, RefStorage, ObjectAccessModes
 
 
 class ObjectDatasetStorage(abc.ABC):
@@ -29,12 +31,14 @@ class ObjectDatasetVersionStorage(VersionStorage, ObjectDatasetStorage):
     def commit(self,
                dataset_name: str,
                dataset_version: ObjectDatasetVersion,
-               amend: bool) -> ObjectDatasetVersion:
+               amend: bool,
+               branch: str = None) -> ObjectDatasetVersion:
         """
 
         :param dataset_name:
         :param dataset_version:
         :param amend:
+        :param branch: branch the version is committed to, commits to other branches should not wait for it
         :return:
         """
         pass
@@ -46,11 +50,27 @@ class ObjectDatasetVersionStorage(VersionStorage, ObjectDatasetStorage):
         """
 
         :param dataset_name:
-        :param dataset_version:
+        :param dataset_version: the latest version if None, the latest version with the name if it has no id
         :return:
         """
         pass
 
+    @abstractmethod
+    def log(self,
+            dataset_name: str,
+            limit: int = None,
+            offset: int = 0,
+            before_version: ObjectDatasetVersion = None) -> list:
+        """
+
+        :param dataset_name:
+        :param limit: maximal number of versions, all if None
+        :param offset: number of versions to skip
+        :param before_version: only versions older than this version are returned
+        :return: versions, newest first
+        """
+        pass
+
 
 class ObjectDatasetMetadataStorage(MetadataStorage, ObjectDatasetStorage):
     """
@@ -85,6 +105,18 @@ class ObjectDatasetMetadataStorage(MetadataStorage, ObjectDatasetStorage):
         """
         pass
 
+    @abstractmethod
+    def query(self,
+              dataset_name: str,
+              public_metadata: dict) -> list:
+        """
+
+        :param dataset_name:
+        :param public_metadata: keys and values which the public metadata of the versions contains
+        :return: versions ordered by id, only their ids are set
+        """
+        pass
+
 
 class ObjectDatasetRecordStorage(RecordStorage, ObjectDatasetStorage):
 
@@ -112,7 +144,10 @@ class ObjectDatasetRecordStorage(RecordStorage, ObjectDatasetStorage):
              dataset_version: ObjectDatasetVersion,
              dataset_metadata: ObjectDatasetMetadata,
              dataset_record_data: ObjectDatasetRecordData,
-             working_directory: Path) -> ObjectDatasetRecordData:
+             working_directory: Path,
+             record_filter=None,
+             columns: list = None,
+             filters: list = None) -> ObjectDatasetRecordData:
         """
 
         :param dataset_record_data:
@@ -120,10 +155,27 @@ class ObjectDatasetRecordStorage(RecordStorage, ObjectDatasetStorage):
         :param dataset_version:
         :param dataset_metadata:
         :param working_directory:
+        :param record_filter: query string, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index and uri dimensions are always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
         :return:
         """
         pass
 
+    @abstractmethod
+    def pull_row_hashes(self,
+                        dataset_name: str,
+                        dataset_version: ObjectDatasetVersion,
+                        dataset_metadata: ObjectDatasetMetadata) -> pandas.Series:
+        """
+
+        :param dataset_name:
+        :param dataset_version:
+        :param dataset_metadata:
+        :return: hash of every record of the version by index value, None if they are not stored
+        """
+        pass
+
 
 class ObjectDatasetObjectStorage(ObjectStorage, ObjectDatasetStorage):
 
@@ -162,3 +214,97 @@ class ObjectDatasetObjectStorage(ObjectStorage, ObjectDatasetStorage):
         :return:
         """
         pass
+
+    @abstractmethod
+    def open(self,
+             dataset_name: str,
+             dataset_version: ObjectDatasetVersion,
+             dataset_metadata: ObjectDatasetMetadata,
+             uri: str,
+             access_mode: ObjectAccessModes = ObjectAccessModes.FILE):
+        """
+
+        :param dataset_name:
+        :param dataset_version:
+        :param dataset_metadata:
+        :param uri:
+        :param access_mode:
+        :return: the object as file object, memoryview or mmap depending on the access mode
+        """
+        pass
+
+    @abstractmethod
+    def get_object_fingerprints(self,
+                                dataset_name: str,
+                                dataset_version: ObjectDatasetVersion,
+                                dataset_metadata: ObjectDatasetMetadata,
+                                dataset_record_data: ObjectDatasetRecordData) -> dict:
+        """
+
+        :param dataset_name:
+        :param dataset_version:
+        :param dataset_metadata:
+        :param dataset_record_data:
+        :return: content fingerprint of every object of the version by uri
+        """
+        pass
+
+
+class ObjectDatasetRefStorage(RefStorage, ObjectDatasetStorage):
+    """
+    This class
+    """
+
+    @abstractmethod
+    def get_branch(self,
+                   dataset_name: str,
+                   branch_name: str) -> ObjectDatasetVersion:
+        """
+
+        :param dataset_name:
+        :param branch_name:
+        :return: head of the branch, only its id is set. None if the branch does not exist
+        """
+        pass
+
+    @abstractmethod
+    def update_branch(self,
+                      dataset_name: str,
+                      branch_name: str,
+                      dataset_version: ObjectDatasetVersion,
+                      expected_version: ObjectDatasetVersion = None) -> None:
+        """
+
+        :param dataset_name:
+        :param branch_name:
+        :param dataset_version: new head of the branch
+        :param expected_version: current head of the branch, None if the branch is created
+        :return:
+        """
+        pass
+
+    @abstractmethod
+    def get_tag(self,
+                dataset_name: str,
+                tag_name: str) -> ObjectDatasetVersion:
+        """
+
+        :param dataset_name:
+        :param tag_name:
+        :return: tagged version, only its id is set. None if the tag does not exist
+        """
+        pass
+
+    @abstractmethod
+    def create_tag(self,
+                   dataset_name: str,
+                   tag_name: str,
+                   dataset_version: ObjectDatasetVersion) -> None:
+        """
+
+        :param dataset_name:
+        :param tag_name:
+        :param dataset_version:
+        :return:
+        """
+        pass
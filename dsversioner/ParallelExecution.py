@@ -0,0 +1,76 @@
+"""
+This module
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+
+def default_max_workers() -> int:
+    """
+
+    :return:
+    """
+    # same default as concurrent.futures.ThreadPoolExecutor, the work is I/O bound
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def execute_parallel(function: Callable,
+                     items: Iterable,
+                     max_workers: int = None,
+                     max_pending_items: int = None,
+                     result_function: Callable = None) -> tuple:
+    """
+    Applies the function to every item on a thread pool. At most max_pending_items items are
+    submitted at once, so items are consumed lazily from the iterable. Errors do not stop the
+    remaining items.
+
+    :param function:
+    :param items:
+    :param max_workers:
+    :param max_pending_items:
+    :param result_function: called with every result instead of collecting the results, one call at a time.
+        Errors it raises are reported like errors of the function
+    :return: (list of results, list of (item, exception) tuples)
+    """
+    if max_workers is None:
+        max_workers = default_max_workers()
+    if max_pending_items is None:
+        max_pending_items = 4 * max_workers
+
+    results = []
+    errors = []
+    if result_function is None:
+        result_function = results.append
+
+    if max_workers <= 1:
+        for item in items:
+            try:
+                result_function(function(item))
+            except Exception as e:
+                errors.append((item, e))
+        return results, errors
+
+    pending_items = threading.BoundedSemaphore(max_pending_items)
+    lock = threading.Lock()
+
+    def collect(future, item) -> None:
+        try:
+            result = future.result()
+            with lock:
+                result_function(result)
+        except Exception as e:
+            with lock:
+                errors.append((item, e))
+        finally:
+            pending_items.release()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for item in items:
+            pending_items.acquire()
+            future = executor.submit(function, item)
+            future.add_done_callback(lambda f, item=item: collect(f, item))
+
+    return results, errors
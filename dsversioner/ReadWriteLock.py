@@ -0,0 +1,85 @@
+"""
+This module
+"""
+
+import contextlib
+import threading
+
+
+class ReadWriteLock:
+    """
+    This class lets any number of threads hold the lock shared or a single thread hold it exclusively.
+    Threads waiting for the exclusive lock are preferred, so a stream of readers does not starve writers.
+    The lock is not reentrant.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._shared_count = 0
+        self._is_exclusive = False
+        self._waiting_exclusive_count = 0
+
+    def acquire_shared(self) -> None:
+        """
+        Blocks until no thread holds or waits for the exclusive lock.
+
+        :return:
+        """
+        with self._condition:
+            while self._is_exclusive or self._waiting_exclusive_count > 0:
+                self._condition.wait()
+            self._shared_count += 1
+
+    def release_shared(self) -> None:
+        """
+
+        :return:
+        """
+        with self._condition:
+            self._shared_count -= 1
+            if self._shared_count == 0:
+                self._condition.notify_all()
+
+    def acquire(self) -> None:
+        """
+        Blocks until no thread holds the lock.
+
+        :return:
+        """
+        with self._condition:
+            self._waiting_exclusive_count += 1
+            try:
+                while self._is_exclusive or self._shared_count > 0:
+                    self._condition.wait()
+            finally:
+                self._waiting_exclusive_count -= 1
+            self._is_exclusive = True
+
+    def release(self) -> None:
+        """
+
+        :return:
+        """
+        with self._condition:
+            self._is_exclusive = False
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def shared(self):
+        """
+        Holds the lock shared within the block.
+
+        :return:
+        """
+        self.acquire_shared()
+        try:
+            yield self
+        finally:
+            self.release_shared()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
@@ -92,3 +92,30 @@ class ParquetSerializable(abc.ABC):
         :return:
         """
         pass
+
+
+class FeatherSerializable(abc.ABC):
+    """
+    This class
+    """
+
+    @abc.abstractmethod
+    def to_feather(self,
+                   path: Path) -> None:
+        """
+
+        :param path:
+        :return:
+        """
+        pass
+
+    @classmethod
+    @abc.abstractmethod
+    def from_feather(cls,
+                     path: Path):  # TODO: uncomment after migration to python 3.11 -> Self:
+        """
+
+        :param path:
+        :return:
+        """
+        pass
@@ -160,7 +160,10 @@ class RecordStorage(abc.ABC):
              dataset_version: DatasetVersion,
              dataset_metadata: DatasetMetadata,
              dataset_record_data: DatasetRecordData,
-             working_directory: Path) -> DatasetRecordData:
+             working_directory: Path,
+             record_filter=None,
+             columns: list = None,
+             filters: list = None) -> DatasetRecordData:
         """
 
         :param dataset_record_data:
@@ -168,6 +171,9 @@ class RecordStorage(abc.ABC):
         :param dataset_version:
         :param dataset_metadata:
         :param working_directory:
+        :param record_filter: query string, callable returning a boolean mask or list of index values
+        :param columns: dimensions to read, all if None. The index and uri dimensions are always read.
+        :param filters: row filters in pyarrow DNF form, e.g. [("label", "==", "cat")]
         :return:
         """
         pass
@@ -186,9 +192,25 @@ class RecordStorage(abc.ABC):
 class RecordStorageFormats(Enum):
     """
     This enum
+
+    FEATHER: uncompressed Arrow IPC files which are memory mapped when pulled.
     """
     CSV = 1
     PARQUET = 2
+    FEATHER = 3
+
+
+class ObjectAccessModes(Enum):
+    """
+    This enum
+
+    FILE: readable binary file object.
+    MEMORYVIEW: memoryview of the object, backed by a memory map of the storage where possible.
+    MMAP: mmap.mmap of the object.
+    """
+    FILE = 1
+    MEMORYVIEW = 2
+    MMAP = 3
 
 
 class ObjectStorage(abc.ABC):
@@ -254,6 +276,111 @@ class ObjectStorage(abc.ABC):
         pass
 
 
+class RefStorage(abc.ABC):
+    """
+    This class
+    Branches are named references to a version which move with the commits to the branch, tags are named
+    references which do not move.
+    """
+    storage_identifier = "ref_storage"
+
+    @abstractmethod
+    def init(self,
+             dataset_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+        pass
+
+    @abstractmethod
+    def get_branch(self,
+                   dataset_name: str,
+                   branch_name: str) -> DatasetVersion:
+        """
+
+        :param dataset_name:
+        :param branch_name:
+        :return: head of the branch, None if the branch does not exist
+        """
+        pass
+
+    @abstractmethod
+    def update_branch(self,
+                      dataset_name: str,
+                      branch_name: str,
+                      dataset_version: DatasetVersion,
+                      expected_version: DatasetVersion = None) -> None:
+        """
+
+        :param dataset_name:
+        :param branch_name:
+        :param dataset_version: new head of the branch
+        :param expected_version: current head of the branch, None if the branch is created
+        :return:
+        """
+        pass
+
+    @abstractmethod
+    def delete_branch(self,
+                      dataset_name: str,
+                      branch_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :param branch_name:
+        :return:
+        """
+        pass
+
+    @abstractmethod
+    def get_tag(self,
+                dataset_name: str,
+                tag_name: str) -> DatasetVersion:
+        """
+
+        :param dataset_name:
+        :param tag_name:
+        :return: tagged version, None if the tag does not exist
+        """
+        pass
+
+    @abstractmethod
+    def create_tag(self,
+                   dataset_name: str,
+                   tag_name: str,
+                   dataset_version: DatasetVersion) -> None:
+        """
+
+        :param dataset_name:
+        :param tag_name:
+        :param dataset_version:
+        :return:
+        """
+        pass
+
+    @abstractmethod
+    def list_refs(self,
+                  dataset_name: str) -> tuple:
+        """
+
+        :param dataset_name:
+        :return: (heads of the branches by name, tagged versions by name)
+        """
+        pass
+
+    @abstractmethod
+    def drop(self,
+             dataset_name: str) -> None:
+        """
+
+        :param dataset_name:
+        :return:
+        """
+        pass
+
+
 class FileSystemStorage(abc.ABC):
     """
     This class
@@ -2,11 +2,19 @@
 This module...
 """
 
+from .CatalogCache import CatalogCache
 from .Exceptions import *
+from .FileSystemObjectStore import ObjectStorageLayouts
+from .FileTransfer import ObjectTransferModes
+from .ObjectCompression import ObjectCompressionCodecs
 from .ObjectDataset import ObjectDataset
+from .ObjectDatasetDiff import ObjectDatasetDiff
 from .ObjectDatasetFileSystemStorage import FileSystemObjectDatasetVersionStorage, \
-    FileSystemObjectDatasetMetadataStorage, FileSystemObjectDatasetRecordStorage, FileSystemObjectDatasetObjectStorage
+    FileSystemObjectDatasetMetadataStorage, FileSystemObjectDatasetRecordStorage, FileSystemObjectDatasetObjectStorage, \
+    FileSystemObjectDatasetRefStorage
 from .ObjectDatasetMetadata import ObjectDatasetMetadata
-from .ObjectDatasetRecordData import PandasObjectDatasetRecordData
+from .ObjectDatasetRecordData import PandasObjectDatasetRecordData, ArrowObjectDatasetRecordData, \
+    StreamingObjectDatasetRecordData
+from .ObjectDatasetSQLiteStorage import SQLiteObjectDatasetVersionStorage, SQLiteObjectDatasetMetadataStorage
 from .ObjectDatasetVersion import ObjectDatasetVersion
-from .Storage import RecordStorageFormats
+from .Storage import RecordStorageFormats, ObjectAccessModes
@@ -0,0 +1,171 @@
+from pathlib import Path
+
+import pandas
+import pyarrow
+import dsversioner as dv
+
+
+def write_objects(working_directory: Path,
+                  contents: dict) -> None:
+    for uri, content in contents.items():
+        path = Path(working_directory, uri)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            # pulled objects may be read-only links into the object storage
+            path.unlink()
+        path.write_text(content)
+
+
+def read_objects(working_directory: Path) -> dict:
+    objects_path = Path(working_directory, "objects")
+    if not objects_path.exists():
+        return {}
+
+    return {path.relative_to(working_directory).as_posix(): path.read_text() for
+            path in objects_path.iterdir() if not path.name.startswith(".")}
+
+
+def make_records(labels: dict) -> pandas.DataFrame:
+    return pandas.DataFrame({
+        "id": list(labels),
+        "uri": [f"objects/{index}.txt" for index in labels],
+        "label": list(labels.values())
+    }).set_index("id")
+
+
+def make_objects(labels: dict) -> dict:
+    return {f"objects/{index}.txt": f"object {index}" for index in labels}
+
+
+def to_record_data(like: dv.ObjectDatasetRecordData,
+                   df: pandas.DataFrame) -> dv.ObjectDatasetRecordData:
+    records = dv.PandasObjectDatasetRecordData(df)
+    if isinstance(like, (dv.ArrowObjectDatasetRecordData, dv.StreamingObjectDatasetRecordData)):
+        table = dv.ArrowObjectDatasetRecordData.from_pandas(record_data=records, index_dimension_name="id").record_data
+        if isinstance(like, dv.StreamingObjectDatasetRecordData):
+            return dv.StreamingObjectDatasetRecordData(record_data=table.to_batches, index_dimension_name="id")
+        return dv.ArrowObjectDatasetRecordData(record_data=table, index_dimension_name="id")
+
+    return records
+
+
+def to_data_frame(record_data: dv.ObjectDatasetRecordData) -> pandas.DataFrame:
+    if isinstance(record_data, dv.StreamingObjectDatasetRecordData):
+        record_data = dv.ArrowObjectDatasetRecordData(record_data=pyarrow.Table.from_batches(list(record_data.record_data)),
+                                                      index_dimension_name="id")
+    if isinstance(record_data, dv.ArrowObjectDatasetRecordData):
+        record_data = record_data.to_pandas()
+
+    return record_data.record_data
+
+
+def get_labels(record_data: dv.ObjectDatasetRecordData) -> dict:
+    return {int(index): label for index, label in to_data_frame(record_data)["label"].items()}
+
+
+def make_dataset(root_path: Path,
+                 working_directory: Path,
+                 name: str = "dataset",
+                 record_data: dv.ObjectDatasetRecordData = None,
+                 version_storage=None,
+                 metadata_storage=None,
+                 record_storage=None,
+                 ref_storage=None,
+                 **object_storage_kwargs) -> dv.ObjectDataset:
+    return dv.ObjectDataset(
+        name=name,
+        working_directory=working_directory,
+        version_storage=version_storage or dv.FileSystemObjectDatasetVersionStorage(root_path=root_path),
+        metadata_storage=metadata_storage or dv.FileSystemObjectDatasetMetadataStorage(root_path=root_path),
+        object_storage=dv.FileSystemObjectDatasetObjectStorage(root_path=root_path, **object_storage_kwargs),
+        record_storage=record_storage or dv.FileSystemObjectDatasetRecordStorage(root_path=root_path),
+        record_data=record_data or dv.PandasObjectDatasetRecordData(),
+        ref_storage=ref_storage)
+
+
+def commit_labels(dataset: dv.ObjectDataset,
+                  labels: dict,
+                  contents: dict = None,
+                  name: str = None,
+                  amend: bool = False) -> dv.ObjectDatasetVersion:
+    """
+    Writes the objects of the records to the working directory and commits the records.
+    Objects without content in contents are written only if they do not exist yet.
+    """
+    contents = contents or {}
+    missing_contents = {uri: content for uri, content in make_objects(labels).items() if
+                        uri not in contents and not Path(dataset.working_directory, uri).exists()}
+    write_objects(working_directory=dataset.working_directory, contents={**missing_contents, **contents})
+    dataset.add(to_record_data(like=dataset.record_data, df=make_records(labels)))
+
+    return dataset.commit(version=dv.ObjectDatasetVersion(name=name) if name is not None else None,
+                          amend=amend)
+
+
+def create_dataset(root_path: Path,
+                   working_directory: Path,
+                   labels: dict = None,
+                   **kwargs) -> dv.ObjectDataset:
+    """
+    Creates a dataset and commits a first version with the labels if they are given.
+    """
+    dataset = make_dataset(root_path=root_path, working_directory=working_directory, **kwargs)
+    dataset.init()
+    if labels is not None:
+        commit_labels(dataset=dataset, labels=labels)
+
+    return dataset
+
+
+def check_round_trip(tmp_path: Path,
+                     make_function) -> None:
+    """
+    Commits two versions, pulls both into another working directory, amends the second one and
+    compares the first version with the amended one.
+
+    :param tmp_path:
+    :param make_function: creates a dataset with a working directory below tmp_path by its name
+    """
+    first_labels = {1: "cat", 2: "dog", 3: "bird", 4: "fish"}
+    second_labels = {1: "lion", 2: "dog", 3: "bird", 5: "cow"}
+    amended_labels = {1: "lion", 2: "dog", 3: "crow", 5: "cow"}
+    second_objects = {**make_objects(second_labels), "objects/2.txt": "object 2 changed"}
+
+    dataset = make_function("working_directory")
+    dataset.init()
+    first_version = commit_labels(dataset=dataset, labels=first_labels, name="first")
+    second_version = commit_labels(dataset=dataset, labels=second_labels, name="second",
+                                   contents={"objects/2.txt": "object 2 changed"})
+
+    other = make_function("other_working_directory")
+    other.pull(version=dv.ObjectDatasetVersion.from_id(id=first_version.id))
+    assert get_labels(other.record_data) == first_labels
+    assert read_objects(other.working_directory) == make_objects(first_labels)
+
+    other.pull()
+    assert other.version.id == second_version.id
+    assert get_labels(other.record_data) == second_labels
+    assert read_objects(other.working_directory) == second_objects
+
+    amended_version = commit_labels(dataset=dataset, labels=amended_labels, name="second-amended", amend=True)
+    assert amended_version.id == second_version.id
+
+    other.pull(version=dv.ObjectDatasetVersion(name="second-amended"))
+    assert get_labels(other.record_data) == amended_labels
+    assert read_objects(other.working_directory) == second_objects
+
+    # later commits do not change the first version
+    other.pull(version=dv.ObjectDatasetVersion(name="first"))
+    assert get_labels(other.record_data) == first_labels
+    assert read_objects(other.working_directory) == make_objects(first_labels)
+
+    diff = dataset.diff(version_a=first_version, version_b=amended_version)
+    assert diff.added_index_values == [5]
+    assert diff.removed_index_values == [4]
+    assert sorted(diff.modified_index_values) == [1, 3]
+    assert list(diff.added_objects) == ["objects/5.txt"]
+    assert list(diff.removed_objects) == ["objects/4.txt"]
+    assert list(diff.modified_objects) == ["objects/2.txt"]
+    assert dataset.diff(version_a=amended_version).is_empty()
+
+    assert [version.name for version in dataset.log()] == ["second-amended", "first"]
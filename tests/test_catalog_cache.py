@@ -0,0 +1,110 @@
+import os
+from pathlib import Path
+
+import dsversioner as dv
+from dsversioner.FileTransfer import write_text_replacing
+from helpers import commit_labels, create_dataset, make_dataset
+
+LABELS = {1: "cat", 2: "dog", 3: "bird", 4: "fish"}
+
+
+class CountingLoader:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, path: Path) -> str:
+        self.count += 1
+        return Path(path).read_text()
+
+
+def test_parsed_files_are_reused_until_they_are_replaced(tmp_path):
+    path = Path(tmp_path, "catalog.json")
+    path.write_text("first")
+    cache = dv.CatalogCache()
+    load = CountingLoader()
+
+    assert cache.get(path=path, load_function=load) == "first"
+    assert cache.get(path=path, load_function=load) == "first"
+    assert load.count == 1
+
+    # a replaced file has a new inode even if its modification time and size are the same
+    path_stat = os.stat(path)
+    write_text_replacing(path=path, content="secon")
+    os.utime(path, ns=(path_stat.st_atime_ns, path_stat.st_mtime_ns))
+    assert cache.get(path=path, load_function=load) == "secon"
+    assert load.count == 2
+
+
+def test_invalidated_files_are_parsed_again(tmp_path):
+    paths = [Path(tmp_path, f"catalog_{index}.json") for index in range(2)]
+    for path in paths:
+        path.write_text(path.name)
+    cache = dv.CatalogCache()
+    load = CountingLoader()
+    for path in paths:
+        cache.get(path=path, load_function=load)
+
+    cache.invalidate(path=paths[0])
+    assert len(cache) == 1
+    cache.get(path=paths[0], load_function=load)
+    cache.get(path=paths[1], load_function=load)
+    assert load.count == 3
+
+    cache.invalidate()
+    assert len(cache) == 0
+    cache.get(path=paths[1], load_function=load)
+    assert load.count == 4
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    paths = [Path(tmp_path, f"catalog_{index}.json") for index in range(3)]
+    for path in paths:
+        path.write_text("0123456789")
+    load = CountingLoader()
+
+    cache = dv.CatalogCache(max_entries=2)
+    for path in [paths[0], paths[1], paths[0], paths[2]]:
+        cache.get(path=path, load_function=load)
+    assert len(cache) == 2
+    cache.get(path=paths[0], load_function=load)
+    assert load.count == 3
+    cache.get(path=paths[1], load_function=load)
+    assert load.count == 4
+
+    cache = dv.CatalogCache(max_size=25)
+    for path in paths:
+        cache.get(path=path, load_function=load)
+    assert len(cache) == 2
+
+
+def test_storages_see_commits_of_storages_with_other_caches(tmp_path):
+    root_path = Path(tmp_path, "storage")
+
+    def make_cached_dataset(name: str) -> dv.ObjectDataset:
+        catalog_cache = dv.CatalogCache()
+        return make_dataset(root_path=root_path, working_directory=Path(tmp_path, name),
+                            version_storage=dv.FileSystemObjectDatasetVersionStorage(root_path=root_path,
+                                                                                     catalog_cache=catalog_cache),
+                            metadata_storage=dv.FileSystemObjectDatasetMetadataStorage(root_path=root_path,
+                                                                                       catalog_cache=catalog_cache))
+
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             labels=LABELS)
+    other = make_cached_dataset(name="other")
+    other.pull()
+    assert other.version.id == 1 and other.find_versions({"labeler": "teamA"}) == []
+
+    dataset.metadata.public_metadata.data.update({"labeler": "teamA"})
+    commit_labels(dataset=dataset, labels={**LABELS, 2: "wolf"}, name="second")
+    other.pull()
+    assert other.version.name == "second"
+    assert other.metadata.public_metadata.data == {"labeler": "teamA"}
+    assert [version.id for version in other.find_versions({"labeler": "teamA"})] == [2]
+
+    dataset.metadata.public_metadata.data.update({"labeler": "teamB"})
+    commit_labels(dataset=dataset, labels={**LABELS, 2: "wolf"}, name="amended", amend=True)
+    other.pull()
+    assert other.version.name == "amended" and other.version.id == 2
+    assert other.metadata.public_metadata.data == {"labeler": "teamB"}
+    assert other.find_versions({"labeler": "teamA"}) == []
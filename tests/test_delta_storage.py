@@ -0,0 +1,140 @@
+import json
+from pathlib import Path
+
+import numpy
+import pandas
+import pytest
+
+import dsversioner as dv
+from helpers import check_round_trip, commit_labels, create_dataset, get_labels, make_dataset
+
+RECORD_DATA_CLASSES = [dv.PandasObjectDatasetRecordData, dv.ArrowObjectDatasetRecordData]
+LABELS = {1: "cat", 2: "dog", 3: "bird", 4: "fish"}
+
+
+def make_record_storage(root_path: Path,
+                        storage_format: dv.RecordStorageFormats = dv.RecordStorageFormats.PARQUET,
+                        **kwargs) -> dv.FileSystemObjectDatasetRecordStorage:
+    return dv.FileSystemObjectDatasetRecordStorage(root_path=root_path,
+                                                   storage_format=storage_format,
+                                                   delta_storage=True,
+                                                   **kwargs)
+
+
+def read_deltas(root_path: Path) -> dict:
+    return {path.name: json.loads(path.read_text()) for
+            path in Path(root_path, "dataset", "record_storage").glob("*.delta.json")}
+
+
+@pytest.mark.parametrize("storage_format", list(dv.RecordStorageFormats), ids=lambda storage_format: storage_format.name)
+@pytest.mark.parametrize("record_data_class", RECORD_DATA_CLASSES, ids=lambda record_data_class: record_data_class.__name__)
+def test_round_trip(tmp_path, record_data_class, storage_format):
+    root_path = Path(tmp_path, "storage")
+    check_round_trip(tmp_path=tmp_path,
+                     make_function=lambda name: make_dataset(
+                         root_path=root_path,
+                         working_directory=Path(tmp_path, name),
+                         record_data=record_data_class(),
+                         record_storage=make_record_storage(root_path=root_path, storage_format=storage_format)))
+
+
+@pytest.mark.parametrize("record_data_class", RECORD_DATA_CLASSES, ids=lambda record_data_class: record_data_class.__name__)
+def test_deltas_store_only_changed_records(tmp_path, record_data_class):
+    root_path = Path(tmp_path, "storage")
+    labels = {index: f"label {index}" for index in range(1, 9)}
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             record_data=record_data_class(), record_storage=make_record_storage(root_path=root_path),
+                             labels=labels)
+    del labels[4]
+    commit_labels(dataset=dataset, labels={**labels, 2: "wolf", 9: "cow"})
+    # more than half of the records changed
+    commit_labels(dataset=dataset, labels={index: "changed" for index in labels})
+
+    deltas = read_deltas(root_path=root_path)
+    assert list(deltas) == ["dataset_2.delta.json"]
+    delta = deltas["dataset_2.delta.json"]
+    assert delta["parent"] == "dataset_1.parquet"
+    assert delta["deleted_index_values"] == [4]
+    assert delta["index_order"] is None
+
+    upserted_records = pandas.read_parquet(Path(root_path, "dataset", "record_storage", delta["upserted_records"]))
+    assert sorted(upserted_records["label"]) == ["cow", "wolf"]
+    assert Path(root_path, "dataset", "record_storage", "dataset_3.parquet").exists()
+
+
+def test_delta_chains_are_compacted(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    record_storage = make_record_storage(root_path=root_path, max_delta_chain_length=2)
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             record_storage=record_storage)
+
+    committed_labels = {}
+    labels = dict(LABELS)
+    for version_number in range(6):
+        labels[1 + version_number % 4] = f"label {version_number}"
+        committed_labels[commit_labels(dataset=dataset, labels=labels).id] = dict(labels)
+
+    # complete records start a new chain after two deltas
+    assert sorted(path.name for path in Path(root_path, "dataset", "record_storage").glob("*_?.parquet")) == \
+           ["dataset_1.parquet", "dataset_4.parquet"]
+    assert {name: delta["chain_length"] for name, delta in read_deltas(root_path=root_path).items()} == {
+        "dataset_2.delta.json": 1, "dataset_3.delta.json": 2, "dataset_5.delta.json": 1, "dataset_6.delta.json": 2}
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"),
+                         record_storage=record_storage)
+    for version_id, labels in committed_labels.items():
+        other.pull(version=dv.ObjectDatasetVersion.from_id(id=version_id))
+        assert get_labels(other.record_data) == labels
+
+
+def test_streamed_records_are_stored_completely(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             record_data=dv.StreamingObjectDatasetRecordData(),
+                             record_storage=make_record_storage(root_path=root_path), labels=LABELS)
+    commit_labels(dataset=dataset, labels={**LABELS, 2: "wolf"})
+
+    assert read_deltas(root_path=root_path) == {}
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"),
+                         record_storage=make_record_storage(root_path=root_path))
+    other.pull()
+    assert get_labels(other.record_data) == {**LABELS, 2: "wolf"}
+
+
+def make_random_records(index_values: list,
+                        seed: int) -> pandas.DataFrame:
+    generator = numpy.random.default_rng(seed)
+    count = len(index_values)
+    return pandas.DataFrame({
+        "id": index_values,
+        "integer": generator.integers(0, 3, count),
+        "float": numpy.where(generator.random(count) < 0.2, numpy.nan, generator.integers(0, 3, count).astype(float)),
+        "string": generator.choice(["a", "b", None], count),
+        "boolean": generator.random(count) < 0.5
+    }).set_index("id")
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_arrow_deltas_match_pandas_deltas(seed):
+    generator = numpy.random.default_rng(seed + 1000)
+    parent = make_random_records(index_values=list(range(100)), seed=seed)
+    child = parent.drop(index=generator.choice(100, 10, replace=False))
+    updated_index_values = generator.choice(child.index, 15, replace=False)
+    child.loc[updated_index_values, "integer"] = generator.integers(0, 3, 15)
+    child = pandas.concat([child, make_random_records(index_values=list(range(100, 105)), seed=seed + 5)])
+    if seed % 2 == 0:
+        child = child.sample(frac=1, random_state=seed)
+
+    pandas_parent = dv.PandasObjectDatasetRecordData(parent)
+    pandas_child = dv.PandasObjectDatasetRecordData(child)
+    arrow_parent = dv.ArrowObjectDatasetRecordData.from_pandas(pandas_parent)
+    arrow_child = dv.ArrowObjectDatasetRecordData.from_pandas(pandas_child)
+
+    arrow_delta = arrow_child.get_delta(parent_record_data=arrow_parent)
+    pandas_delta = pandas_child.get_delta(parent_record_data=pandas_parent)
+    assert sorted(arrow_delta[0].to_pandas().record_data.index) == sorted(pandas_delta[0].record_data.index)
+    assert arrow_delta[1:] == pandas_delta[1:]
+
+    rebuilt = arrow_parent.apply_delta(*arrow_delta).to_pandas().record_data
+    assert rebuilt.index.equals(child.index)
+    pandas.testing.assert_frame_equal(rebuilt, child, check_dtype=False)
@@ -0,0 +1,66 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+import dsversioner.ObjectDatasetFileSystemStorage as FileSystemStorage
+from helpers import commit_labels, create_dataset, get_labels, make_dataset
+
+RECORD_DATA_CLASSES = [dv.PandasObjectDatasetRecordData,
+                       dv.ArrowObjectDatasetRecordData,
+                       dv.StreamingObjectDatasetRecordData]
+LABELS = {1: "cat", 2: "dog", 3: "bird", 4: "fish"}
+
+
+def get_fingerprint(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+@pytest.mark.parametrize("record_data_class", RECORD_DATA_CLASSES, ids=lambda record_data_class: record_data_class.__name__)
+def test_diff_lists_changed_records_and_objects(tmp_path, record_data_class):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             record_data=record_data_class(), labels=LABELS)
+    first_version = dataset.version
+    commit_labels(dataset=dataset, labels={1: "lion", 2: "dog", 3: "bird", 5: "cow"},
+                  contents={"objects/2.txt": "object 2 changed"})
+
+    reader = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"),
+                          record_data=record_data_class())
+    diff = reader.diff(version_a=first_version)
+
+    assert diff.version_a.id == 1 and diff.version_b.id == 2
+    assert diff.added_index_values == [5]
+    assert diff.removed_index_values == [4]
+    assert diff.modified_index_values == [1]
+    assert get_labels(diff.added_records) == {5: "cow"}
+    assert get_labels(diff.removed_records) == {4: "fish"}
+    assert get_labels(diff.modified_records) == {1: "lion"}
+
+    assert diff.added_objects == {"objects/5.txt": get_fingerprint("object 5")}
+    assert diff.removed_objects == {"objects/4.txt": get_fingerprint("object 4")}
+    assert diff.modified_objects == {"objects/2.txt": (get_fingerprint("object 2"),
+                                                       get_fingerprint("object 2 changed"))}
+    assert not diff.is_empty()
+    assert reader.diff(version_a=first_version, version_b=first_version).is_empty()
+
+
+def test_diff_does_not_read_objects(tmp_path, monkeypatch):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             labels=LABELS)
+    first_version = dataset.version
+    commit_labels(dataset=dataset, labels=LABELS, contents={"objects/3.txt": "object 3 changed"})
+
+    def fail(*args, **kwargs):
+        raise AssertionError("objects are read")
+
+    monkeypatch.setattr(FileSystemStorage, "hash_file", fail)
+    monkeypatch.setattr(FileSystemStorage, "transfer_file", fail)
+    reader = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"))
+    diff = reader.diff(version_a=first_version)
+
+    assert list(diff.modified_objects) == ["objects/3.txt"]
+    assert diff.modified_index_values == []
+    assert not Path(tmp_path, "reader", "objects").exists()
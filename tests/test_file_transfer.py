@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+from dsversioner.FileTransfer import get_commit_transfer_mode, transfer_file
+from helpers import check_round_trip, commit_labels, create_dataset, make_dataset, read_objects
+
+
+@pytest.mark.parametrize("transfer_mode", list(dv.ObjectTransferModes), ids=lambda mode: mode.name)
+def test_transfer_replaces_the_destination(tmp_path, transfer_mode):
+    source_path = Path(tmp_path, "source.txt")
+    source_path.write_text("new")
+    destination_path = Path(tmp_path, "destination.txt")
+    destination_path.write_text("old")
+
+    transfer_file(source_path=source_path, destination_path=destination_path, transfer_mode=transfer_mode)
+
+    assert destination_path.read_text() == "new"
+    assert [path.name for path in Path(tmp_path).iterdir() if path.name.startswith(".")] == []
+
+
+def test_commits_never_hard_link():
+    assert get_commit_transfer_mode(dv.ObjectTransferModes.HARDLINK) is dv.ObjectTransferModes.REFLINK
+    assert get_commit_transfer_mode(dv.ObjectTransferModes.COPY) is dv.ObjectTransferModes.COPY
+
+
+@pytest.mark.parametrize("transfer_mode", list(dv.ObjectTransferModes), ids=lambda mode: mode.name)
+def test_round_trip(tmp_path, transfer_mode):
+    root_path = Path(tmp_path, "storage")
+    check_round_trip(tmp_path=tmp_path,
+                     make_function=lambda name: make_dataset(root_path=root_path,
+                                                             working_directory=Path(tmp_path, name),
+                                                             transfer_mode=transfer_mode))
+
+
+def test_editing_committed_files_in_place_keeps_the_stored_object(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path,
+                             working_directory=Path(tmp_path, "working_directory"),
+                             transfer_mode=dv.ObjectTransferModes.HARDLINK)
+    first_version = commit_labels(dataset=dataset, labels={1: "cat", 2: "dog"})
+
+    object_path = Path(dataset.working_directory, "objects", "1.txt")
+    assert os.stat(object_path).st_nlink == 1
+    with open(object_path, "w") as f:
+        f.write("edited in place")
+
+    other = make_dataset(root_path=root_path,
+                         working_directory=Path(tmp_path, "other"),
+                         transfer_mode=dv.ObjectTransferModes.HARDLINK)
+    other.pull(version=first_version)
+    assert read_objects(other.working_directory) == {"objects/1.txt": "object 1", "objects/2.txt": "object 2"}
+
+
+def test_hard_linked_pulls_are_read_only(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    create_dataset(root_path=root_path,
+                   working_directory=Path(tmp_path, "working_directory"),
+                   labels={1: "cat"})
+
+    other = make_dataset(root_path=root_path,
+                         working_directory=Path(tmp_path, "other"),
+                         transfer_mode=dv.ObjectTransferModes.HARDLINK)
+    other.pull()
+
+    pulled_stat = os.stat(Path(other.working_directory, "objects", "1.txt"))
+    assert pulled_stat.st_nlink == 2
+    assert pulled_stat.st_mode & 0o222 == 0
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+from helpers import commit_labels, create_dataset, get_labels, make_dataset, read_objects
+
+LABELS = {1: "cat", 2: "dog", 3: "bird", 4: "cat"}
+
+
+@pytest.mark.parametrize("record_filter", ["label == 'cat'",
+                                           lambda records: records["label"] == "cat",
+                                           [1, 4]],
+                         ids=["query", "callable", "index"])
+def test_filtered_pull_gets_only_matching_records_and_objects(tmp_path, record_filter):
+    root_path = Path(tmp_path, "storage")
+    create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"), labels=LABELS)
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull(record_filter=record_filter)
+
+    assert get_labels(other.record_data) == {1: "cat", 4: "cat"}
+    assert read_objects(other.working_directory) == {"objects/1.txt": "object 1", "objects/4.txt": "object 4"}
+
+
+def test_projected_pull_keeps_the_index_and_uri(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"), labels=LABELS)
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull(columns=[])
+
+    assert list(other.record_data.record_data.columns) == ["uri"]
+    assert list(other.record_data.record_data.index) == [1, 2, 3, 4]
+    assert read_objects(other.working_directory) == {f"objects/{index}.txt": f"object {index}" for index in LABELS}
+
+
+@pytest.mark.parametrize("pull_arguments", [{"record_filter": [1]}, {"columns": []},
+                                            {"filters": [("label", "==", "cat")]}],
+                         ids=["record_filter", "columns", "filters"])
+def test_commit_after_partial_pull_requires_partial(tmp_path, pull_arguments):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             labels=LABELS)
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull(**pull_arguments)
+    with pytest.raises(dv.PartialRecordDataException):
+        other.commit()
+    assert len(dataset.log()) == 1
+
+    partial_version = other.commit(partial=True)
+    # the committed records are the complete version now
+    other.commit()
+
+    reader = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"))
+    reader.pull(version=partial_version)
+    assert list(reader.record_data.record_data.index) == list(other.record_data.record_data.index)
+
+
+def test_complete_pull_allows_commits_again(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"), labels=LABELS)
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull(record_filter=[1])
+    other.pull()
+    commit_labels(dataset=other, labels={**LABELS, 5: "cow"})
+
+    assert get_labels(other.record_data) == {**LABELS, 5: "cow"}
+
+
+def test_pull_filters_on_dimensions_outside_the_projection(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"), labels=LABELS)
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull(columns=[], filters=[("label", "==", "dog")])
+
+    assert list(other.record_data.record_data.columns) == ["uri"]
+    assert list(other.record_data.record_data.index) == [2]
+    assert read_objects(other.working_directory) == {"objects/2.txt": "object 2"}
@@ -0,0 +1,100 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+from helpers import commit_labels, create_dataset, make_dataset
+
+LABELS = {1: "cat", 2: "dog", 3: "bird", 4: "fish"}
+STORAGE_CLASSES = [
+    pytest.param((dv.FileSystemObjectDatasetVersionStorage, dv.FileSystemObjectDatasetMetadataStorage),
+                 id="file-system"),
+    pytest.param((dv.SQLiteObjectDatasetVersionStorage, dv.SQLiteObjectDatasetMetadataStorage), id="sqlite"),
+]
+
+
+def make_catalog_dataset(root_path: Path,
+                         working_directory: Path,
+                         storage_classes: tuple) -> dv.ObjectDataset:
+    version_storage_class, metadata_storage_class = storage_classes
+    return make_dataset(root_path=root_path, working_directory=working_directory,
+                        version_storage=version_storage_class(root_path=root_path),
+                        metadata_storage=metadata_storage_class(root_path=root_path))
+
+
+def commit_public_metadata(dataset: dv.ObjectDataset,
+                           public_metadata: dict,
+                           amend: bool = False) -> dv.ObjectDatasetVersion:
+    dataset.metadata.public_metadata.data.clear()
+    dataset.metadata.public_metadata.data.update(public_metadata)
+    return commit_labels(dataset=dataset, labels=LABELS, amend=amend)
+
+
+@pytest.mark.parametrize("storage_classes", STORAGE_CLASSES)
+def test_versions_are_found_by_public_metadata(tmp_path, storage_classes):
+    root_path = Path(tmp_path, "storage")
+    dataset = make_catalog_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                                   storage_classes=storage_classes)
+    dataset.init()
+    for public_metadata in [{"labeler": "teamA", "split": "train"},
+                            {"labeler": "teamB", "split": "train", "round": 2},
+                            {"labeler": "teamB", "split": "test", "classes": ["cat", "dog"]},
+                            {}]:
+        commit_public_metadata(dataset=dataset, public_metadata=public_metadata)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the metadata of the versions is read")
+
+    reader = make_catalog_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"),
+                                  storage_classes=storage_classes)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(dv.ObjectDatasetMetadata, "from_json", fail)
+        assert [version.id for version in reader.find_versions({"labeler": "teamB"})] == [2, 3]
+        assert [version.id for version in reader.find_versions({"labeler": "teamB", "split": "train"})] == [2]
+        assert [version.id for version in reader.find_versions({"round": 2})] == [2]
+        assert [version.id for version in reader.find_versions({"classes": ["cat", "dog"]})] == [3]
+        assert reader.find_versions({"labeler": "teamC"}) == []
+        assert reader.find_versions({"labeler": "teamA", "split": "test"}) == []
+        assert [version.id for version in reader.find_versions({})] == [1, 2, 3, 4]
+
+    # found versions have their names
+    found_version = reader.find_versions({"labeler": "teamA"})[0]
+    assert (found_version.id, found_version.name) == (1, dataset.log()[-1].name)
+
+
+@pytest.mark.parametrize("storage_classes", STORAGE_CLASSES)
+def test_amended_public_metadata_replaces_the_indexed_values(tmp_path, storage_classes):
+    root_path = Path(tmp_path, "storage")
+    dataset = make_catalog_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                                   storage_classes=storage_classes)
+    dataset.init()
+    commit_public_metadata(dataset=dataset, public_metadata={"labeler": "teamA"})
+    commit_public_metadata(dataset=dataset, public_metadata={"labeler": "teamB", "split": "train"})
+    commit_public_metadata(dataset=dataset, public_metadata={"labeler": "teamC"}, amend=True)
+
+    reader = make_catalog_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"),
+                                  storage_classes=storage_classes)
+    assert reader.find_versions({"labeler": "teamB"}) == []
+    assert reader.find_versions({"split": "train"}) == []
+    assert [version.id for version in reader.find_versions({"labeler": "teamC"})] == [2]
+    assert [version.id for version in reader.find_versions({"labeler": "teamA"})] == [1]
+
+
+def test_metadata_without_index_is_queried(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"))
+    commit_public_metadata(dataset=dataset, public_metadata={"labeler": "teamA"})
+    commit_public_metadata(dataset=dataset, public_metadata={"labeler": "teamB"})
+
+    # metadata written before versions were indexed by their public metadata
+    metadata_path = Path(root_path, dataset.name, "metadata_storage", "metadata.json")
+    content = json.loads(metadata_path.read_text())
+    del content["public_metadata_index"]
+    metadata_path.write_text(json.dumps(content))
+
+    reader = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"))
+    assert [version.id for version in reader.find_versions({"labeler": "teamB"})] == [2]
+
+    commit_public_metadata(dataset=dataset, public_metadata={"labeler": "teamB"})
+    assert [version.id for version in reader.find_versions({"labeler": "teamB"})] == [2, 3]
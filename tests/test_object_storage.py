@@ -0,0 +1,315 @@
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+import dsversioner.ObjectDatasetFileSystemStorage as FileSystemStorage
+from dsversioner.ObjectCompression import is_codec_available
+from helpers import check_round_trip, commit_labels, create_dataset, make_dataset, read_objects, write_objects
+
+
+def stored_object_paths(root_path: Path) -> list:
+    objects_path = Path(root_path, "dataset", "object_storage", "objects")
+    return sorted(path for path in objects_path.rglob("*") if path.is_file())
+
+
+def test_round_trip(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    check_round_trip(tmp_path=tmp_path,
+                     make_function=lambda name: make_dataset(root_path=root_path,
+                                                             working_directory=Path(tmp_path, name)))
+
+
+@pytest.mark.parametrize("layout", list(dv.ObjectStorageLayouts), ids=lambda layout: layout.name)
+def test_round_trip_per_layout(tmp_path, layout):
+    root_path = Path(tmp_path, "storage")
+    check_round_trip(tmp_path=tmp_path,
+                     make_function=lambda name: make_dataset(root_path=root_path,
+                                                             working_directory=Path(tmp_path, name),
+                                                             layout=layout))
+
+
+def test_sharded_objects_are_stored_below_their_hash_prefix(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                   layout=dv.ObjectStorageLayouts.SHARDED, labels={1: "cat", 2: "dog"})
+
+    object_paths = stored_object_paths(root_path=root_path)
+    assert len(object_paths) == 2
+    for object_path in object_paths:
+        relative_parts = object_path.relative_to(Path(root_path, "dataset", "object_storage", "objects")).parts
+        assert relative_parts == (object_path.name[:2], object_path.name[2:4], object_path.name)
+
+    # a dataset may switch the layout, versions stay readable with the layout they were committed with
+    loose = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "loose"))
+    loose.pull()
+    commit_labels(dataset=loose, labels={1: "cat", 3: "bird"})
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull(version=dv.ObjectDatasetVersion.from_id(id=1))
+    assert read_objects(other.working_directory) == {"objects/1.txt": "object 1", "objects/2.txt": "object 2"}
+
+
+def test_identical_objects_are_stored_once(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"))
+    labels = {1: "cat", 2: "dog", 3: "bird"}
+    commit_labels(dataset=dataset, labels=labels, contents={f"objects/{index}.txt": "same" for index in labels})
+    commit_labels(dataset=dataset, labels={**labels, 4: "fish"}, contents={"objects/4.txt": "same"})
+
+    assert len(stored_object_paths(root_path=root_path)) == 1
+    manifest_names = sorted(path.name for path in Path(root_path, "dataset", "object_storage").glob("*.sqlite"))
+    assert manifest_names == ["dataset_1.sqlite", "dataset_2.sqlite"]
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull()
+    assert read_objects(other.working_directory) == {f"objects/{index}.txt": "same" for index in range(1, 5)}
+
+
+def test_objects_referenced_by_several_records_are_pulled_once(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             labels={1: "cat"})
+    records = dataset.record_data.record_data
+    records.loc[2] = ["objects/1.txt", "dog"]
+    dataset.add(dv.PandasObjectDatasetRecordData(records))
+    dataset.commit()
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull()
+    assert read_objects(other.working_directory) == {"objects/1.txt": "object 1"}
+
+
+def test_pull_skips_unchanged_objects(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"))
+    first_version = commit_labels(dataset=dataset, labels={1: "cat", 2: "dog", 3: "bird", 4: "fish"})
+    commit_labels(dataset=dataset, labels={1: "cat", 2: "dog", 3: "bird", 5: "cow"},
+                  contents={"objects/2.txt": "object 2 changed"})
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull(version=first_version)
+    stats_before = {uri: os.stat(Path(other.working_directory, uri)) for uri in read_objects(other.working_directory)}
+    # modified after the pull, the pulled version overwrites it
+    write_objects(working_directory=other.working_directory, contents={"objects/3.txt": "edited"})
+
+    other.pull()
+
+    assert read_objects(other.working_directory) == {"objects/1.txt": "object 1",
+                                                     "objects/2.txt": "object 2 changed",
+                                                     "objects/3.txt": "object 3",
+                                                     "objects/5.txt": "object 5"}
+    stat_after = os.stat(Path(other.working_directory, "objects", "1.txt"))
+    assert (stat_after.st_ino, stat_after.st_mtime_ns) == \
+           (stats_before["objects/1.txt"].st_ino, stats_before["objects/1.txt"].st_mtime_ns)
+    assert os.stat(Path(other.working_directory, "objects", "2.txt")).st_ino != stats_before["objects/2.txt"].st_ino
+
+
+def test_pull_keeps_modified_objects_of_the_previous_version(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"))
+    first_version = commit_labels(dataset=dataset, labels={1: "cat", 2: "dog"})
+    commit_labels(dataset=dataset, labels={1: "cat"})
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull(version=first_version)
+    write_objects(working_directory=other.working_directory, contents={"objects/2.txt": "local work"})
+    other.pull()
+
+    # objects of the previous version are removed unless they were modified since the pull
+    assert read_objects(other.working_directory) == {"objects/1.txt": "object 1", "objects/2.txt": "local work"}
+
+
+def count_hashed_files(monkeypatch) -> list:
+    hashed_paths = []
+    hash_file = FileSystemStorage.hash_file
+
+    def counting_hash_file(path: Path, **kwargs) -> str:
+        hashed_paths.append(Path(path).name)
+        return hash_file(path=path, **kwargs)
+
+    monkeypatch.setattr(FileSystemStorage, "hash_file", counting_hash_file)
+    return hashed_paths
+
+
+def test_commit_does_not_hash_indexed_objects_again(tmp_path, monkeypatch):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             labels={1: "cat", 2: "dog", 3: "bird"})
+
+    hashed_paths = count_hashed_files(monkeypatch=monkeypatch)
+    commit_labels(dataset=dataset, labels={1: "cat", 2: "dog", 3: "bird", 4: "fish"},
+                  contents={"objects/2.txt": "object 2 changed"})
+
+    assert sorted(hashed_paths) == ["2.txt", "4.txt"]
+
+
+def rewrite_keeping_mtime(path: Path,
+                          content: str) -> None:
+    path_stat = os.stat(path)
+    write_objects(working_directory=path.parent, contents={path.name: content})
+    os.utime(path, ns=(path_stat.st_atime_ns, path_stat.st_mtime_ns))
+
+
+def test_commit_hashes_objects_rewritten_with_the_same_mtime(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"))
+    commit_labels(dataset=dataset, labels={1: "cat"}, contents={"objects/1.txt": "aaaa"})
+
+    rewrite_keeping_mtime(path=Path(dataset.working_directory, "objects", "1.txt"), content="bbbb")
+    commit_labels(dataset=dataset, labels={1: "cat"})
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull()
+    assert read_objects(other.working_directory) == {"objects/1.txt": "bbbb"}
+
+
+def test_timestamps_of_other_working_directories_are_not_trusted(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"))
+    commit_labels(dataset=dataset, labels={1: "cat"}, contents={"objects/1.txt": "aaaa"})
+    committed_stat = os.stat(Path(dataset.working_directory, "objects", "1.txt"))
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull()
+    # same size and modification time as the file the first version was committed from
+    other_path = Path(other.working_directory, "objects", "1.txt")
+    write_objects(working_directory=other_path.parent, contents={other_path.name: "bbbb"})
+    os.utime(other_path, ns=(committed_stat.st_atime_ns, committed_stat.st_mtime_ns))
+    # e.g. a working directory copied without its index
+    shutil.rmtree(Path(other.working_directory, ".dsversioner"))
+    commit_labels(dataset=other, labels={1: "cat"})
+
+    reader = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"))
+    reader.pull()
+    assert read_objects(reader.working_directory) == {"objects/1.txt": "bbbb"}
+
+
+def stored_contents(root_path: Path) -> list:
+    return sorted(path.read_text() for path in stored_object_paths(root_path=root_path))
+
+
+def test_amend_keeps_dropped_objects_until_gc(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"))
+    first_version = commit_labels(dataset=dataset, labels={1: "cat"})
+    commit_labels(dataset=dataset, labels={1: "cat", 2: "dog"})
+    unchanged_inodes = [os.stat(path).st_ino for path in stored_object_paths(root_path=root_path) if
+                        path.read_text() == "object 1"]
+
+    commit_labels(dataset=dataset, labels={1: "cat", 3: "bird"}, amend=True)
+
+    # the object only the amended version referenced stays until gc() runs
+    assert stored_contents(root_path=root_path) == ["object 1", "object 2", "object 3"]
+    FileSystemStorage.FileSystemObjectDatasetObjectStorage(root_path=root_path).gc(dataset_name="dataset")
+    assert stored_contents(root_path=root_path) == ["object 1", "object 3"]
+    assert [os.stat(path).st_ino for path in stored_object_paths(root_path=root_path) if
+            path.read_text() == "object 1"] == unchanged_inodes
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull()
+    assert read_objects(other.working_directory) == {"objects/1.txt": "object 1", "objects/3.txt": "object 3"}
+    other.pull(version=first_version)
+    assert read_objects(other.working_directory) == {"objects/1.txt": "object 1"}
+
+
+def test_gc_rewrites_packs(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             layout=dv.ObjectStorageLayouts.PACKED)
+    commit_labels(dataset=dataset, labels={1: "cat", 2: "dog"})
+    commit_labels(dataset=dataset, labels={1: "cat", 3: "bird"}, amend=True)
+    packs_path = Path(root_path, "dataset", "object_storage", "packs")
+    size_before = sum(os.path.getsize(path) for path in packs_path.glob("*.pack"))
+
+    FileSystemStorage.FileSystemObjectDatasetObjectStorage(root_path=root_path).gc(dataset_name="dataset")
+
+    assert sum(os.path.getsize(path) for path in packs_path.glob("*.pack")) < size_before
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull()
+    assert read_objects(other.working_directory) == {"objects/1.txt": "object 1", "objects/3.txt": "object 3"}
+
+
+def test_gc_waits_for_running_commits(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"), labels={1: "cat"})
+    object_storage = FileSystemStorage.FileSystemObjectDatasetObjectStorage(root_path=root_path)
+    collected = threading.Event()
+    thread = threading.Thread(target=lambda: (object_storage.gc(dataset_name="dataset"), collected.set()))
+
+    with object_storage._lock_storage(dataset_name="dataset", shared=True):
+        thread.start()
+        assert not collected.wait(timeout=0.2)
+    thread.join()
+
+    assert collected.is_set()
+
+
+AVAILABLE_CODECS = [codec for codec in dv.ObjectCompressionCodecs if is_codec_available(codec=codec)]
+
+
+@pytest.mark.parametrize("layout", [dv.ObjectStorageLayouts.LOOSE, dv.ObjectStorageLayouts.PACKED],
+                         ids=lambda layout: layout.name)
+@pytest.mark.parametrize("codec", AVAILABLE_CODECS, ids=lambda codec: codec.name)
+def test_compressed_round_trip(tmp_path, layout, codec):
+    root_path = Path(tmp_path, "storage")
+    check_round_trip(tmp_path=tmp_path,
+                     make_function=lambda name: make_dataset(root_path=root_path,
+                                                             working_directory=Path(tmp_path, name),
+                                                             layout=layout,
+                                                             compression_codec=codec))
+
+
+def read_statistics(root_path: Path,
+                    version: dv.ObjectDatasetVersion) -> dict:
+    manifest_path = Path(root_path, "dataset", "object_storage", f"dataset_{version.id}.sqlite")
+    with FileSystemStorage.FileSystemObjectDatasetObjectStorageManifest.open(path=manifest_path) as manifest:
+        return manifest.statistics
+
+
+def test_commits_record_compression_statistics(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             compression_codec=dv.ObjectCompressionCodecs.ZLIB)
+    compressible = {"objects/1.txt": "a" * 1000, "objects/2.txt": "b" * 1000}
+    first_version = commit_labels(dataset=dataset, labels={1: "cat", 2: "dog"}, contents=compressible)
+    # a file with an extension of compressed formats is stored as it is
+    write_objects(working_directory=dataset.working_directory, contents={"objects/3.zip": "c" * 1000})
+    records = dataset.record_data.record_data
+    records.loc[3] = ["objects/3.zip", "bird"]
+    dataset.add(dv.PandasObjectDatasetRecordData(records))
+    second_version = dataset.commit()
+
+    first_statistics = read_statistics(root_path=root_path, version=first_version)
+    assert first_statistics["object_count"] == 2
+    assert first_statistics["size"] == 2000
+    assert first_statistics["stored_size"] < 200
+    assert first_statistics["compression_ratio"] == 2000 / first_statistics["stored_size"]
+    assert first_statistics["written_object_count"] == 2
+    assert first_statistics["written_size"] == 2000
+    assert first_statistics["written_stored_size"] == first_statistics["stored_size"]
+
+    second_statistics = read_statistics(root_path=root_path, version=second_version)
+    assert second_statistics["object_count"] == 3
+    assert second_statistics["size"] == 3000
+    assert second_statistics["stored_size"] == first_statistics["stored_size"] + 1000
+    assert second_statistics["written_object_count"] == 1
+    assert second_statistics["written_size"] == second_statistics["written_stored_size"] == 1000
+
+
+def test_objects_referenced_by_several_records_are_committed_once(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             labels={1: "cat", 2: "dog"})
+    records = dataset.record_data.record_data
+    records.loc[3] = ["objects/1.txt", "bird"]
+    dataset.add(dv.PandasObjectDatasetRecordData(records))
+    version = dataset.commit()
+
+    assert read_statistics(root_path=root_path, version=version)["object_count"] == 2
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    other.pull()
+    assert read_objects(other.working_directory) == {"objects/1.txt": "object 1", "objects/2.txt": "object 2"}
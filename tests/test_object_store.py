@@ -0,0 +1,84 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from dsversioner.FileSystemObjectStore import PackedFileSystemObjectStore, hash_file
+
+
+def write_source(tmp_path: Path,
+                 content: str) -> tuple:
+    source_path = Path(tmp_path, "sources", content)
+    source_path.parent.mkdir(parents=True, exist_ok=True)
+    source_path.write_text(content)
+    return hash_file(path=source_path), source_path
+
+
+def read_stored(object_store: PackedFileSystemObjectStore,
+                object_hash: str) -> str:
+    with object_store.open(object_hash=object_hash) as f:
+        return f.read().decode()
+
+
+def test_packs_of_other_writers_are_found(tmp_path):
+    storage_path = Path(tmp_path, "storage")
+    reader = PackedFileSystemObjectStore(storage_path=storage_path)
+    first_hash, first_path = write_source(tmp_path=tmp_path, content="first")
+    assert not reader.contains(object_hash=first_hash)
+
+    writer = PackedFileSystemObjectStore(storage_path=storage_path)
+    writer.write(object_hash=first_hash, source_path=first_path)
+    writer.flush()
+
+    # objects which must exist are looked for again, the pack directory was scanned before the write
+    assert read_stored(object_store=reader, object_hash=first_hash) == "first"
+
+
+def test_misses_scan_the_pack_directory_once_per_batch(tmp_path, monkeypatch):
+    object_store = PackedFileSystemObjectStore(storage_path=Path(tmp_path, "storage"))
+    scans = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or scandir(path))
+
+    for content in ["a", "b", "c"]:
+        object_hash, source_path = write_source(tmp_path=tmp_path, content=content)
+        object_store.locate_codec(object_hash=object_hash)
+        object_store.write(object_hash=object_hash, source_path=source_path)
+    object_store.flush()
+    assert len(scans) == 1
+
+    object_hash, source_path = write_source(tmp_path=tmp_path, content="d")
+    object_store.contains(object_hash=object_hash)
+    assert len(scans) == 2
+
+
+def test_missing_objects_are_reported(tmp_path):
+    object_store = PackedFileSystemObjectStore(storage_path=Path(tmp_path, "storage"))
+    object_hash, source_path = write_source(tmp_path=tmp_path, content="missing")
+
+    with pytest.raises(FileNotFoundError):
+        object_store.get_stored_size(object_hash=object_hash)
+    with pytest.raises(FileNotFoundError):
+        object_store.read(object_hash=object_hash, destination_path=Path(tmp_path, "destination"))
+
+
+def test_repack_keeps_referenced_objects(tmp_path):
+    storage_path = Path(tmp_path, "storage")
+    writer = PackedFileSystemObjectStore(storage_path=storage_path, max_pack_size=1)
+    hashes = {}
+    for content in ["kept", "dropped"]:
+        hashes[content], source_path = write_source(tmp_path=tmp_path, content=content)
+        writer.write(object_hash=hashes[content], source_path=source_path)
+    writer.flush()
+    reader = PackedFileSystemObjectStore(storage_path=storage_path)
+    assert read_stored(object_store=reader, object_hash=hashes["kept"]) == "kept"
+
+    writer.repack(referenced_hashes={hashes["kept"]})
+
+    assert len(list(Path(storage_path, "packs").glob("*.pack"))) == 1
+    assert not writer.contains(object_hash=hashes["dropped"])
+    # the reader still knows the removed pack and finds the object in the new one
+    assert read_stored(object_store=reader, object_hash=hashes["kept"]) == "kept"
+    destination_path = Path(tmp_path, "destination")
+    reader.read(object_hash=hashes["kept"], destination_path=destination_path)
+    assert destination_path.read_text() == "kept"
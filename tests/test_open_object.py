@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+from helpers import commit_labels, create_dataset, make_dataset
+
+
+def read_opened(opened) -> bytes:
+    if isinstance(opened, memoryview):
+        return opened.tobytes()
+
+    # file objects and mmaps
+    with opened:
+        return opened.read()
+
+
+@pytest.mark.parametrize("access_mode", list(dv.ObjectAccessModes), ids=lambda mode: mode.name)
+@pytest.mark.parametrize("layout", list(dv.ObjectStorageLayouts), ids=lambda layout: layout.name)
+def test_open_object_by_uri_and_index(tmp_path, access_mode, layout):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             layout=layout)
+    first_version = commit_labels(dataset=dataset, labels={1: "cat", 2: "dog"})
+    commit_labels(dataset=dataset, labels={1: "cat", 2: "dog"}, contents={"objects/2.txt": "object 2 changed"})
+
+    # a dataset that never pulled opens the objects of the latest version
+    reader = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"), layout=layout)
+    assert read_opened(reader.open_object(uri="objects/2.txt", access_mode=access_mode)) == b"object 2 changed"
+    assert read_opened(reader.open_object(index=2, access_mode=access_mode)) == b"object 2 changed"
+    assert read_opened(reader.open_object(index=2, version=first_version, access_mode=access_mode)) == b"object 2"
+    assert not Path(reader.working_directory, "objects").exists()
+
+
+@pytest.mark.parametrize("storage_format", list(dv.RecordStorageFormats), ids=lambda storage_format: storage_format.name)
+def test_open_object_by_index_reads_only_its_record(tmp_path, monkeypatch, storage_format):
+    root_path = Path(tmp_path, "storage")
+    record_storage = dv.FileSystemObjectDatasetRecordStorage(root_path=root_path, storage_format=storage_format)
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             record_storage=record_storage, labels={1: "cat", 2: "dog", 3: "bird"})
+
+    pulled_records = []
+    pull = record_storage.pull
+
+    def recording_pull(**kwargs) -> dv.ObjectDatasetRecordData:
+        records = pull(**kwargs)
+        pulled_records.append(records.record_data)
+        return records
+
+    monkeypatch.setattr(record_storage, "pull", recording_pull)
+    assert read_opened(dataset.open_object(index=3)) == b"object 3"
+
+    assert [list(records.index) for records in pulled_records] == [[3]]
+    assert "label" not in pulled_records[0].columns
+
+    with pytest.raises(KeyError):
+        dataset.open_object(index=4)
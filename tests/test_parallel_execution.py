@@ -0,0 +1,78 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+from dsversioner.ParallelExecution import execute_parallel
+from helpers import check_round_trip, create_dataset, make_dataset, make_records, write_objects
+
+
+def fail_on_odd(item: int) -> int:
+    if item % 2 == 1:
+        raise ValueError(f"odd item {item}")
+    return item
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_errors_are_collected_without_stopping(max_workers):
+    results, errors = execute_parallel(function=fail_on_odd, items=range(10), max_workers=max_workers)
+
+    assert sorted(results) == [0, 2, 4, 6, 8]
+    assert sorted(item for item, error in errors) == [1, 3, 5, 7, 9]
+    assert all(isinstance(error, ValueError) and str(error) == f"odd item {item}" for item, error in errors)
+
+
+def test_items_are_consumed_lazily():
+    max_pending_items = 3
+    consumed = []
+    release = threading.Event()
+
+    def items():
+        for item in range(20):
+            consumed.append(item)
+            yield item
+
+    def function(item: int) -> int:
+        release.wait(timeout=10)
+        return item
+
+    thread = threading.Thread(target=lambda: execute_parallel(function=function,
+                                                              items=items(),
+                                                              max_workers=2,
+                                                              max_pending_items=max_pending_items))
+    thread.start()
+    try:
+        # the generator is blocked once max_pending_items items are waiting for the workers
+        threading.Event().wait(timeout=0.2)
+        assert len(consumed) <= max_pending_items + 1
+    finally:
+        release.set()
+        thread.join()
+
+    assert len(consumed) == 20
+
+
+def test_failed_transfers_are_reported_together(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"), max_workers=4)
+    labels = {1: "cat", 2: "dog", 3: "bird", 4: "fish"}
+    write_objects(working_directory=dataset.working_directory,
+                  contents={"objects/1.txt": "object 1", "objects/3.txt": "object 3"})
+    dataset.add(dv.PandasObjectDatasetRecordData(make_records(labels)))
+
+    with pytest.raises(dv.ObjectTransferException) as exception_info:
+        dataset.commit()
+
+    assert sorted(exception_info.value.errors) == ["objects/2.txt", "objects/4.txt"]
+    assert all(isinstance(error, FileNotFoundError) for error in exception_info.value.errors.values())
+
+
+@pytest.mark.parametrize("max_workers", [1, 8])
+def test_round_trip(tmp_path, max_workers):
+    root_path = Path(tmp_path, "storage")
+    check_round_trip(tmp_path=tmp_path,
+                     make_function=lambda name: make_dataset(root_path=root_path,
+                                                             working_directory=Path(tmp_path, name),
+                                                             max_workers=max_workers,
+                                                             max_pending_transfers=2))
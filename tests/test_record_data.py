@@ -0,0 +1,152 @@
+from pathlib import Path
+
+import pandas
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
+import pytest
+
+import dsversioner as dv
+from helpers import make_records, to_data_frame
+
+RECORD_DATA_CLASSES = [dv.PandasObjectDatasetRecordData,
+                       dv.ArrowObjectDatasetRecordData,
+                       dv.StreamingObjectDatasetRecordData]
+LABELS = {1: "cat", 2: "dog", 3: "bird", 4: "cat"}
+
+
+def write_records(tmp_path: Path,
+                  storage_format: dv.RecordStorageFormats) -> Path:
+    records = dv.PandasObjectDatasetRecordData(make_records(LABELS))
+    path = Path(tmp_path, f"records.{storage_format.name.lower()}")
+    if storage_format is dv.RecordStorageFormats.CSV:
+        records.to_csv(path=path)
+    elif storage_format is dv.RecordStorageFormats.PARQUET:
+        records.to_parquet(path=path)
+    else:
+        records.to_feather(path=path)
+    return path
+
+
+def read_records(record_data_class,
+                 path: Path,
+                 storage_format: dv.RecordStorageFormats,
+                 **kwargs) -> dv.ObjectDatasetRecordData:
+    if storage_format is dv.RecordStorageFormats.CSV:
+        return record_data_class.from_csv(path=path, header_rows=0, index_dimension_name="id", **kwargs)
+    if storage_format is dv.RecordStorageFormats.PARQUET:
+        return record_data_class.from_parquet(path=path, index_dimension_name="id", **kwargs)
+    return record_data_class.from_feather(path=path, index_dimension_name="id", **kwargs)
+
+
+@pytest.mark.parametrize("storage_format", list(dv.RecordStorageFormats), ids=lambda storage_format: storage_format.name)
+@pytest.mark.parametrize("record_data_class", RECORD_DATA_CLASSES, ids=lambda record_data_class: record_data_class.__name__)
+def test_filters_on_dimensions_outside_the_projection(tmp_path, record_data_class, storage_format):
+    path = write_records(tmp_path=tmp_path, storage_format=storage_format)
+
+    df = to_data_frame(read_records(record_data_class=record_data_class,
+                                    path=path,
+                                    storage_format=storage_format,
+                                    columns=["uri"],
+                                    filters=[("label", "==", "cat")]))
+
+    assert list(df.columns) == ["uri"]
+    assert [int(index) for index in df.index] == [1, 4]
+    assert list(df["uri"]) == ["objects/1.txt", "objects/4.txt"]
+
+
+@pytest.mark.parametrize("storage_format", list(dv.RecordStorageFormats), ids=lambda storage_format: storage_format.name)
+@pytest.mark.parametrize("record_data_class", RECORD_DATA_CLASSES, ids=lambda record_data_class: record_data_class.__name__)
+def test_projection_of_filtered_dimensions(tmp_path, record_data_class, storage_format):
+    path = write_records(tmp_path=tmp_path, storage_format=storage_format)
+
+    df = to_data_frame(read_records(record_data_class=record_data_class,
+                                    path=path,
+                                    storage_format=storage_format,
+                                    columns=["label"],
+                                    filters=[[("label", "==", "dog")], [("id", ">", 3)]]))
+
+    assert list(df.columns) == ["label"]
+    assert sorted(int(index) for index in df.index) == [2, 4]
+
+
+def make_typed_records() -> pandas.DataFrame:
+    return pandas.DataFrame({
+        "id": [1, 2, 3, 4, 5],
+        "uri": [f"objects/{index}.txt" for index in range(1, 6)],
+        "label": pandas.Categorical(["cat", "dog", "cat", None, "bird"]),
+        "score": [0.5, None, 1.5, 2.0, -1.0],
+        "count": [1, 2, 3, 4, 5],
+        "valid": [True, False, True, True, False]
+    }).set_index("id")
+
+
+def to_each_record_data(df: pandas.DataFrame) -> list:
+    pandas_records = dv.PandasObjectDatasetRecordData(df)
+    arrow_records = dv.ArrowObjectDatasetRecordData.from_pandas(record_data=pandas_records, index_dimension_name="id")
+    streaming_records = dv.StreamingObjectDatasetRecordData(
+        record_data=lambda: iter(arrow_records.record_data.to_batches(max_chunksize=2)),
+        index_dimension_name="id")
+    return [pandas_records, arrow_records, streaming_records]
+
+
+@pytest.mark.parametrize("dimension_names", [["uri", "label", "score", "count", "valid"], ["label"], []],
+                         ids=["all", "categorical", "none"])
+def test_row_hashes_are_equal_across_record_data(monkeypatch, dimension_names):
+    monkeypatch.setattr(dv.ArrowObjectDatasetRecordData, "hash_chunk_size", 3)
+    df = make_typed_records()[dimension_names]
+
+    pandas_hashes, arrow_hashes, streaming_hashes = [records.get_row_hashes() for
+                                                     records in to_each_record_data(df=df)]
+
+    assert list(pandas_hashes.index) == list(arrow_hashes.index) == list(streaming_hashes.index) == [1, 2, 3, 4, 5]
+    assert list(pandas_hashes) == list(arrow_hashes) == list(streaming_hashes)
+    assert pandas_hashes.dtype == arrow_hashes.dtype == streaming_hashes.dtype == "uint64"
+
+
+def test_row_hashes_change_with_the_records():
+    df = make_typed_records()
+    changed_df = df.copy()
+    changed_df.loc[2, "score"] = 0.25
+
+    hashes = dv.PandasObjectDatasetRecordData(df).get_row_hashes()
+    changed_hashes = dv.PandasObjectDatasetRecordData(changed_df).get_row_hashes()
+
+    assert list(hashes != changed_hashes) == [False, True, False, False, False]
+
+
+def read_stored_schema(path: Path,
+                       storage_format: dv.RecordStorageFormats) -> list:
+    if storage_format is dv.RecordStorageFormats.CSV:
+        return path.read_text().splitlines()
+    if storage_format is dv.RecordStorageFormats.PARQUET:
+        return pyarrow.parquet.read_schema(str(path)).names
+    return pyarrow.ipc.open_file(str(path)).schema.names
+
+
+@pytest.mark.parametrize("storage_format", list(dv.RecordStorageFormats), ids=lambda storage_format: storage_format.name)
+def test_streamed_records_without_batches_are_written_with_their_schema(tmp_path, storage_format):
+    path = write_records(tmp_path=tmp_path, storage_format=storage_format)
+    records = read_records(record_data_class=dv.StreamingObjectDatasetRecordData,
+                           path=path,
+                           storage_format=storage_format,
+                           filters=[("label", "==", "cow")]).filter(record_filter=[5])
+
+    empty_path = Path(tmp_path, f"empty.{storage_format.name.lower()}")
+    getattr(records, f"to_{storage_format.name.lower()}")(path=empty_path)
+
+    stored_schema = read_stored_schema(path=empty_path, storage_format=storage_format)
+    if storage_format is dv.RecordStorageFormats.CSV:
+        assert stored_schema == ['"id","uri","label"']
+    else:
+        assert sorted(stored_schema) == ["id", "label", "uri"]
+    assert list(empty_path.parent.glob(".*.tmp")) == []
+
+
+@pytest.mark.parametrize("storage_format", list(dv.RecordStorageFormats), ids=lambda storage_format: storage_format.name)
+def test_streamed_records_of_unknown_schema_are_written_with_their_index(tmp_path, storage_format):
+    path = Path(tmp_path, f"empty.{storage_format.name.lower()}")
+    getattr(dv.StreamingObjectDatasetRecordData(record_data=[]), f"to_{storage_format.name.lower()}")(path=path)
+
+    stored_schema = read_stored_schema(path=path, storage_format=storage_format)
+    assert stored_schema == (['"id"'] if storage_format is dv.RecordStorageFormats.CSV else ["id"])
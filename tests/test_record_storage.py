@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pandas
+import pyarrow
+import pyarrow.feather
+import pytest
+
+import dsversioner as dv
+from helpers import check_round_trip, create_dataset, make_dataset, make_objects, to_data_frame, write_objects
+
+RECORD_DATA_CLASSES = [dv.PandasObjectDatasetRecordData, dv.ArrowObjectDatasetRecordData]
+
+
+@pytest.mark.parametrize("storage_format", list(dv.RecordStorageFormats), ids=lambda storage_format: storage_format.name)
+@pytest.mark.parametrize("record_data_class", RECORD_DATA_CLASSES, ids=lambda record_data_class: record_data_class.__name__)
+def test_round_trip(tmp_path, record_data_class, storage_format):
+    root_path = Path(tmp_path, "storage")
+    check_round_trip(tmp_path=tmp_path,
+                     make_function=lambda name: make_dataset(
+                         root_path=root_path,
+                         working_directory=Path(tmp_path, name),
+                         record_data=record_data_class(),
+                         record_storage=dv.FileSystemObjectDatasetRecordStorage(root_path=root_path,
+                                                                                storage_format=storage_format)))
+
+
+@pytest.mark.parametrize("record_data_class", RECORD_DATA_CLASSES, ids=lambda record_data_class: record_data_class.__name__)
+def test_feather_records_are_stored_uncompressed_with_their_index(tmp_path, record_data_class):
+    root_path = Path(tmp_path, "storage")
+    record_storage = dv.FileSystemObjectDatasetRecordStorage(root_path=root_path,
+                                                             storage_format=dv.RecordStorageFormats.FEATHER)
+    create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                   record_data=record_data_class(), record_storage=record_storage, labels={1: "cat", 2: "dog"})
+
+    record_paths = list(Path(root_path, "dataset", "record_storage").rglob("*.feather"))
+    assert len(record_paths) == 1
+    allocated_bytes = pyarrow.total_allocated_bytes()
+    table = pyarrow.feather.read_table(str(record_paths[0]), memory_map=True)
+    assert sorted(table.column_names) == ["id", "label", "uri"]
+    # uncompressed buffers reference the memory mapped file, compressed ones would be decoded into memory
+    assert pyarrow.total_allocated_bytes() == allocated_bytes
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"),
+                         record_data=record_data_class(), record_storage=record_storage)
+    other.pull(columns=["label"])
+    df = to_data_frame(other.record_data)
+    assert list(df.columns) == ["uri", "label"]
+    assert [int(index) for index in df.index] == [1, 2]
+
+
+def make_typed_records() -> pandas.DataFrame:
+    return pandas.DataFrame({
+        "id": [1, 2, 3],
+        "uri": [f"objects/{index}.txt" for index in range(1, 4)],
+        # bird is not used, its level is kept anyway
+        "label": pandas.Categorical(["cat", "dog", "cat"], categories=["bird", "cat", "dog"], ordered=True),
+        "score": [0.5, None, 1.5],
+        "count": pandas.array([1, 2, 3], dtype="int32"),
+        "valid": [True, False, True],
+        # would be inferred as integers
+        "code": ["001", "002", "010"]
+    }).set_index("id")
+
+
+@pytest.mark.parametrize("record_data_class", [*RECORD_DATA_CLASSES, dv.StreamingObjectDatasetRecordData],
+                         ids=lambda record_data_class: record_data_class.__name__)
+def test_csv_records_are_pulled_with_their_committed_types(tmp_path, record_data_class):
+    root_path = Path(tmp_path, "storage")
+    record_storage = dv.FileSystemObjectDatasetRecordStorage(root_path=root_path,
+                                                             storage_format=dv.RecordStorageFormats.CSV)
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             record_storage=record_storage)
+    df = make_typed_records()
+    write_objects(working_directory=dataset.working_directory, contents=make_objects(labels=dict(df["label"])))
+    dataset.add(dv.PandasObjectDatasetRecordData(df))
+    dataset.commit()
+
+    record_schema = dataset.metadata.private_metadata.record_schema
+    assert record_schema["index_dimension_name"] == "id"
+    assert [dimension["name"] for dimension in record_schema["dimensions"]] == ["id", *df.columns]
+
+    other = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"),
+                         record_data=record_data_class(), record_storage=record_storage)
+    other.pull()
+    pulled_df = to_data_frame(other.record_data)
+
+    assert pulled_df.index.name == "id"
+    assert pulled_df.index.dtype == "int64"
+    assert pulled_df["label"].dtype == df["label"].dtype
+    assert {name: str(dtype) for name, dtype in pulled_df.dtypes.items() if name != "label"} == \
+           {name: str(dtype) for name, dtype in df.dtypes.items() if name != "label"}
+    pandas.testing.assert_frame_equal(pulled_df, df)
@@ -0,0 +1,220 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+from helpers import commit_labels, create_dataset, get_labels, make_dataset, read_objects
+
+LABELS = {1: "cat", 2: "dog"}
+
+
+def make_ref_dataset(root_path: Path,
+                     working_directory: Path,
+                     **kwargs) -> dv.ObjectDataset:
+    return make_dataset(root_path=root_path,
+                        working_directory=working_directory,
+                        ref_storage=dv.FileSystemObjectDatasetRefStorage(root_path=root_path),
+                        **kwargs)
+
+
+def create_ref_dataset(root_path: Path,
+                       working_directory: Path,
+                       **kwargs) -> dv.ObjectDataset:
+    return create_dataset(root_path=root_path,
+                          working_directory=working_directory,
+                          labels=LABELS,
+                          ref_storage=dv.FileSystemObjectDatasetRefStorage(root_path=root_path),
+                          **kwargs)
+
+
+def test_commits_advance_only_their_branch(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "a"))
+    initial_version = dataset.version
+    dataset.create_branch("main")
+    dataset.create_branch("relabel-2026q3")
+    dataset.create_tag("v1")
+
+    dataset.pull(ref="main")
+    assert dataset.branch == "main"
+    main_version = commit_labels(dataset=dataset, labels={1: "cat", 2: "cat"})
+
+    assert dataset.resolve("main").id == main_version.id
+    assert dataset.resolve("relabel-2026q3").id == initial_version.id
+    assert dataset.resolve("v1").id == initial_version.id
+
+    branches, tags = dataset.list_refs()
+    assert {name: version.id for name, version in branches.items()} == \
+           {"main": main_version.id, "relabel-2026q3": initial_version.id}
+    assert {name: version.id for name, version in tags.items()} == {"v1": initial_version.id}
+
+
+def test_pull_of_tag_does_not_select_a_branch(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "a"))
+    dataset.create_tag("v1")
+
+    dataset.pull(ref="v1")
+
+    assert dataset.branch is None
+    assert get_labels(dataset.record_data) == LABELS
+
+
+def test_stale_branch_head_is_rejected(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "a"))
+    dataset.create_branch("main")
+    dataset.pull(ref="main")
+
+    other = make_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "b"))
+    other.pull(ref="main")
+    other.commit()
+
+    versions_before = dataset.log()
+    with pytest.raises(dv.RefChangedException):
+        dataset.commit()
+
+    # the conflict is detected before a version is written
+    assert [version.id for version in dataset.log()] == [version.id for version in versions_before]
+    assert dataset.branch == "main"
+
+
+def test_tags_are_immutable(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "a"))
+    dataset.create_tag("v1")
+    dataset.commit()
+
+    with pytest.raises(dv.RefExistsException):
+        dataset.create_tag("v1")
+    with pytest.raises(dv.RefExistsException):
+        dataset.create_branch("v1")
+    with pytest.raises(dv.RefDoesNotExistException):
+        dataset.resolve("missing")
+
+
+def test_invalid_and_overlapping_ref_names_are_rejected(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "a"))
+    dataset.create_branch("team")
+    dataset.create_branch("project/experiment")
+
+    for name in ["../outside", "main.lock", "a//b", ""]:
+        with pytest.raises(dv.InvalidRefNameException):
+            dataset.create_branch(name)
+
+    with pytest.raises(dv.RefExistsException):
+        dataset.create_branch("team/experiment")
+    with pytest.raises(dv.RefExistsException):
+        dataset.create_branch("project")
+    with pytest.raises(dv.RefDoesNotExistException):
+        dataset.resolve("team/experiment")
+    with pytest.raises(dv.RefDoesNotExistException):
+        dataset.resolve("project")
+    with pytest.raises(dv.RefDoesNotExistException):
+        dataset.delete_branch("project")
+
+    # names of deleted branches are free again
+    dataset.delete_branch("project/experiment")
+    dataset.create_branch("project")
+    assert set(dataset.list_refs()[0]) == {"team", "project"}
+
+
+def test_amend_on_branch_is_rejected(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "a"))
+    dataset.create_branch("main")
+    dataset.pull(ref="main")
+    head = commit_labels(dataset=dataset, labels={1: "bird"})
+
+    with pytest.raises(dv.BranchAmendException):
+        commit_labels(dataset=dataset, labels={1: "fish"}, amend=True)
+    with pytest.raises(dv.BranchAmendException):
+        dataset.commit(amend=True, branch="other")
+
+    assert [version.id for version in dataset.log()] == [head.id, 1]
+    assert dataset.resolve("main").id == head.id
+
+
+def test_branch_commits_do_not_lock_the_history(tmp_path, monkeypatch):
+    root_path = Path(tmp_path, "storage")
+    version_storage = dv.FileSystemObjectDatasetVersionStorage(root_path=root_path, checkpoint_interval=4)
+    dataset = create_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "a"),
+                                 version_storage=version_storage)
+    dataset.create_branch("team/main")
+    dataset.pull(ref="team/main")
+
+    def fail(**kwargs):
+        raise AssertionError("the history is locked")
+
+    monkeypatch.setattr(version_storage, "_lock_storage", fail)
+    branch_labels = {}
+    for version_number in range(2):
+        labels = {1: f"label {version_number}", 2: "dog"}
+        branch_labels[commit_labels(dataset=dataset, labels=labels).id] = labels
+    monkeypatch.undo()
+
+    # versions are read from the branch journal, and from the checkpoint after every fourth id
+    reader = make_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"))
+    for version_number in range(2, 4):
+        labels = {1: f"label {version_number}", 2: "dog"}
+        branch_labels[commit_labels(dataset=dataset, labels=labels).id] = labels
+        assert [version.id for version in reader.log(limit=1)] == [max(branch_labels)]
+    assert list(Path(root_path, dataset.name, "version_storage", "branches").glob("*.jsonl")) == \
+           [Path(root_path, dataset.name, "version_storage", "branches", "team%2Fmain.jsonl")]
+    checkpoint = json.loads(Path(root_path, dataset.name, "version_storage", "version.json").read_text())
+    assert [version["id"] for version in checkpoint["versions"]] == [1, 2, 3, 4]
+    assert list(checkpoint["branch_journal_offsets"]) == ["team%2Fmain.jsonl"]
+
+    other = make_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "b"))
+    other.pull()
+    assert commit_labels(dataset=other, labels=LABELS).id == 6
+    for version_id, labels in branch_labels.items():
+        reader.pull(version=dv.ObjectDatasetVersion.from_id(id=version_id))
+        assert get_labels(reader.record_data) == labels
+    assert [version.id for version in reader.log()] == [6, 5, 4, 3, 2, 1]
+
+
+def commit_to_branch(root_path: Path,
+                     working_directory: Path,
+                     branch: str,
+                     commit_count: int) -> list:
+    dataset = make_ref_dataset(root_path=root_path, working_directory=working_directory)
+    dataset.pull(ref=branch)
+
+    committed_ids = []
+    for commit_number in range(commit_count):
+        label = f"{branch}-{commit_number}"
+        committed_ids.append(commit_labels(dataset=dataset, labels={**LABELS, 1: label},
+                                           contents={"objects/1.txt": label}).id)
+
+    return committed_ids
+
+
+def test_concurrent_commits_to_two_branches(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "initial"))
+    dataset.create_branch("main")
+    dataset.create_branch("relabel")
+    commit_count = 20
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        futures = {branch: executor.submit(commit_to_branch, root_path, Path(tmp_path, branch), branch, commit_count)
+                   for branch in ("main", "relabel")}
+        committed_ids = {branch: future.result() for branch, future in futures.items()}
+
+    all_ids = committed_ids["main"] + committed_ids["relabel"]
+    assert len(set(all_ids)) == 2 * commit_count
+    assert len(dataset.log()) == 2 * commit_count + 1
+
+    # every version still has the records and objects its own branch committed
+    reader = make_ref_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"))
+    for branch, version_ids in committed_ids.items():
+        for commit_number, version_id in enumerate(version_ids):
+            reader.pull(version=dv.ObjectDatasetVersion.from_id(id=version_id))
+            label = f"{branch}-{commit_number}"
+            assert get_labels(reader.record_data) == {**LABELS, 1: label}
+            assert read_objects(reader.working_directory)["objects/1.txt"] == label
+        assert reader.resolve(branch).id == version_ids[-1]
@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+from helpers import commit_labels, create_dataset, make_dataset, make_records
+
+LABELS = {index: f"label {index}" for index in range(1, 9)}
+
+
+def make_record_storage(root_path: Path,
+                        **kwargs) -> dv.FileSystemObjectDatasetRecordStorage:
+    return dv.FileSystemObjectDatasetRecordStorage(root_path=root_path,
+                                                   storage_format=dv.RecordStorageFormats.PARQUET,
+                                                   store_row_hashes=True,
+                                                   **kwargs)
+
+
+def pull_row_hashes(dataset: dv.ObjectDataset,
+                    record_storage: dv.FileSystemObjectDatasetRecordStorage):
+    return record_storage.pull_row_hashes(dataset_name=dataset.name,
+                                          dataset_version=dataset.version,
+                                          dataset_metadata=dataset.metadata)
+
+
+def get_row_hashes(labels: dict):
+    return dv.PandasObjectDatasetRecordData(make_records(labels)).get_row_hashes()
+
+
+@pytest.mark.parametrize("delta_storage", [False, True], ids=["snapshots", "deltas"])
+def test_row_hashes_are_stored_with_the_records(tmp_path, delta_storage):
+    root_path = Path(tmp_path, "storage")
+    record_storage = make_record_storage(root_path=root_path, delta_storage=delta_storage)
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             record_storage=record_storage, labels=LABELS)
+    assert Path(root_path, "dataset", "record_storage", "dataset_1.hashes.parquet").exists()
+    assert pull_row_hashes(dataset=dataset, record_storage=record_storage).equals(get_row_hashes(LABELS))
+
+    labels = {**{index: label for index, label in LABELS.items() if index != 4}, 2: "wolf", 9: "cow"}
+    commit_labels(dataset=dataset, labels=labels)
+    assert pull_row_hashes(dataset=dataset, record_storage=record_storage).equals(get_row_hashes(labels))
+
+    amended_labels = {**labels, 3: "crow"}
+    commit_labels(dataset=dataset, labels=amended_labels, amend=True)
+    assert pull_row_hashes(dataset=dataset, record_storage=record_storage).equals(get_row_hashes(amended_labels))
+
+
+def test_row_hashes_are_optional(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    record_storage = dv.FileSystemObjectDatasetRecordStorage(root_path=root_path)
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             record_storage=record_storage, labels=LABELS)
+
+    assert list(Path(root_path, "dataset", "record_storage").glob("*.hashes.parquet")) == []
+    assert pull_row_hashes(dataset=dataset, record_storage=record_storage) is None
+
+
+def test_deltas_are_found_without_reading_the_parent_records(tmp_path, monkeypatch):
+    root_path = Path(tmp_path, "storage")
+    record_storage = make_record_storage(root_path=root_path, delta_storage=True)
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             record_storage=record_storage, labels=LABELS)
+
+    def fail(**kwargs):
+        raise AssertionError("the records of the parent are read")
+
+    monkeypatch.setattr(record_storage, "_read_delta_records", fail)
+    commit_labels(dataset=dataset, labels={**LABELS, 2: "wolf"})
+    monkeypatch.undo()
+
+    assert Path(root_path, "dataset", "record_storage", "dataset_2.delta.json").exists()
+    assert pull_row_hashes(dataset=dataset, record_storage=record_storage).equals(
+        get_row_hashes({**LABELS, 2: "wolf"}))
+
+
+def test_diff_compares_stored_row_hashes(tmp_path, monkeypatch):
+    root_path = Path(tmp_path, "storage")
+    record_storage = make_record_storage(root_path=root_path)
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             record_storage=record_storage, labels=LABELS)
+    first_version = dataset.version
+    commit_labels(dataset=dataset, labels={**LABELS, 2: "wolf"})
+
+    def fail(self):
+        raise AssertionError("the records are hashed")
+
+    monkeypatch.setattr(dv.PandasObjectDatasetRecordData, "get_row_hashes", fail)
+    reader = make_dataset(root_path=root_path, working_directory=Path(tmp_path, "reader"),
+                          record_storage=record_storage)
+
+    assert reader.diff(version_a=first_version).modified_index_values == [2]
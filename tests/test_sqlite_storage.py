@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+from helpers import check_round_trip, commit_labels, create_dataset, get_labels, make_dataset
+
+LABELS = {1: "cat", 2: "dog", 3: "bird", 4: "fish"}
+
+
+def make_sqlite_dataset(root_path: Path,
+                        working_directory: Path) -> dv.ObjectDataset:
+    return make_dataset(root_path=root_path, working_directory=working_directory,
+                        version_storage=dv.SQLiteObjectDatasetVersionStorage(root_path=root_path),
+                        metadata_storage=dv.SQLiteObjectDatasetMetadataStorage(root_path=root_path))
+
+
+def test_round_trip(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    check_round_trip(tmp_path=tmp_path,
+                     make_function=lambda name: make_sqlite_dataset(root_path=root_path,
+                                                                    working_directory=Path(tmp_path, name)))
+
+
+def test_file_system_catalogs_are_imported(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    file_system_version_storage = dv.FileSystemObjectDatasetVersionStorage(root_path=root_path, checkpoint_interval=2)
+    file_system_metadata_storage = dv.FileSystemObjectDatasetMetadataStorage(root_path=root_path)
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             version_storage=file_system_version_storage,
+                             metadata_storage=file_system_metadata_storage)
+    committed_labels = {}
+    for version_number, labeler in enumerate(["teamA", "teamB", "teamA"]):
+        dataset.metadata.public_metadata.data.update({"labeler": labeler})
+        labels = {**LABELS, 1: f"label {version_number}"}
+        committed_labels[commit_labels(dataset=dataset, labels=labels, name=f"v{version_number}").id] = labels
+    dataset.metadata.public_metadata.data.update({"labeler": "teamC"})
+    committed_labels[commit_labels(dataset=dataset, labels=LABELS, name="amended", amend=True).id] = LABELS
+
+    version_storage = dv.SQLiteObjectDatasetVersionStorage(root_path=root_path)
+    metadata_storage = dv.SQLiteObjectDatasetMetadataStorage(root_path=root_path)
+    version_storage.import_dataset(dataset_name=dataset.name, storage=file_system_version_storage)
+    metadata_storage.import_dataset(dataset_name=dataset.name, storage=file_system_metadata_storage)
+
+    other = make_sqlite_dataset(root_path=root_path, working_directory=Path(tmp_path, "other"))
+    assert [(version.id, version.name) for version in other.log()] == [(3, "amended"), (2, "v1"), (1, "v0")]
+    assert [version.id for version in other.find_versions({"labeler": "teamA"})] == [1]
+    assert [version.id for version in other.find_versions({"labeler": "teamC"})] == [3]
+    for version_id, labels in committed_labels.items():
+        other.pull(version=dv.ObjectDatasetVersion.from_id(id=version_id))
+        assert get_labels(other.record_data) == labels
+
+    # the imported dataset is committed to like any other
+    commit_labels(dataset=other, labels={**LABELS, 2: "wolf"}, name="after import")
+    assert other.version.id == 4
+    assert [version.id for version in dataset.log()] == [3, 2, 1]
+
+    with pytest.raises(dv.DatasetExistsException):
+        version_storage.import_dataset(dataset_name=dataset.name, storage=file_system_version_storage)
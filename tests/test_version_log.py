@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+
+import dsversioner as dv
+
+VERSION_STORAGE_CLASSES = [
+    pytest.param(dv.FileSystemObjectDatasetVersionStorage, id="file-system"),
+    pytest.param(dv.SQLiteObjectDatasetVersionStorage, id="sqlite"),
+]
+
+
+def create_version_storage(root_path: Path,
+                           version_storage_class,
+                           names: list):
+    version_storage = version_storage_class(root_path=root_path)
+    version_storage.init(dataset_name="dataset")
+    for name in names:
+        version_storage.commit(dataset_name="dataset", dataset_version=dv.ObjectDatasetVersion(name=name), amend=False)
+
+    return version_storage_class(root_path=root_path)
+
+
+def get_ids(versions: list) -> list:
+    return [version.id for version in versions]
+
+
+@pytest.mark.parametrize("version_storage_class", VERSION_STORAGE_CLASSES)
+def test_versions_are_pulled_by_name(tmp_path, version_storage_class):
+    root_path = Path(tmp_path, "storage")
+    version_storage = create_version_storage(root_path=root_path, version_storage_class=version_storage_class,
+                                             names=["a", "b", "a", "c"])
+
+    def pull(name: str) -> dv.ObjectDatasetVersion:
+        return version_storage.pull(dataset_name="dataset", dataset_version=dv.ObjectDatasetVersion(name=name))
+
+    # the latest version with the name
+    assert pull(name="a").id == 3
+    assert pull(name="b").id == 2
+    with pytest.raises(dv.DatasetVersionDoesNotExistException):
+        pull(name="missing")
+
+    version_storage.commit(dataset_name="dataset", dataset_version=dv.ObjectDatasetVersion(name="d"), amend=True)
+    assert pull(name="d").id == 4
+    with pytest.raises(dv.DatasetVersionDoesNotExistException):
+        pull(name="c")
+
+    assert version_storage.pull(dataset_name="dataset", dataset_version=dv.ObjectDatasetVersion.from_id(id=2)).name == "b"
+    with pytest.raises(dv.DatasetVersionDoesNotExistException):
+        version_storage.pull(dataset_name="dataset", dataset_version=dv.ObjectDatasetVersion.from_id(id=5))
+
+
+@pytest.mark.parametrize("version_storage_class", VERSION_STORAGE_CLASSES)
+def test_versions_are_listed_page_by_page(tmp_path, version_storage_class):
+    root_path = Path(tmp_path, "storage")
+    version_storage = create_version_storage(root_path=root_path, version_storage_class=version_storage_class,
+                                             names=[f"v{version_id}" for version_id in range(1, 8)])
+
+    assert get_ids(version_storage.log(dataset_name="dataset")) == [7, 6, 5, 4, 3, 2, 1]
+    assert get_ids(version_storage.log(dataset_name="dataset", limit=3)) == [7, 6, 5]
+    assert get_ids(version_storage.log(dataset_name="dataset", limit=3, offset=5)) == [2, 1]
+    assert version_storage.log(dataset_name="dataset", offset=7) == []
+
+    pages = []
+    before_version = None
+    while True:
+        page = version_storage.log(dataset_name="dataset", limit=3, before_version=before_version)
+        if len(page) == 0:
+            break
+        pages.append(get_ids(page))
+        before_version = page[-1]
+
+    assert pages == [[7, 6, 5], [4, 3, 2], [1]]
+    assert [version.name for version in version_storage.log(dataset_name="dataset", limit=2,
+                                                            before_version=dv.ObjectDatasetVersion.from_id(id=4))] == \
+           ["v3", "v2"]
+
+
+@pytest.mark.parametrize("version_storage_class", VERSION_STORAGE_CLASSES)
+def test_empty_datasets_have_no_versions(tmp_path, version_storage_class):
+    version_storage = create_version_storage(root_path=Path(tmp_path, "storage"),
+                                             version_storage_class=version_storage_class, names=[])
+
+    assert version_storage.log(dataset_name="dataset") == []
+    with pytest.raises(dv.DatasetVersionDoesNotExistException):
+        version_storage.pull(dataset_name="dataset")
+    with pytest.raises(dv.DatasetDoesNotExistException):
+        version_storage.log(dataset_name="missing")
@@ -0,0 +1,123 @@
+import json
+import shutil
+import threading
+from pathlib import Path
+
+import dsversioner as dv
+from helpers import check_round_trip, create_dataset, make_dataset
+
+LABELS = {1: "cat", 2: "dog", 3: "bird", 4: "fish"}
+
+
+def get_storage_path(root_path: Path) -> Path:
+    return Path(root_path, "dataset", "version_storage")
+
+
+def get_journal_path(root_path: Path) -> Path:
+    checkpoint = json.loads(Path(get_storage_path(root_path=root_path), "version.json").read_text())
+    return Path(get_storage_path(root_path=root_path), checkpoint["journal_file_name"])
+
+
+def commit_names(version_storage: dv.FileSystemObjectDatasetVersionStorage,
+                 names: list) -> None:
+    for name in names:
+        version_storage.commit(dataset_name="dataset", dataset_version=dv.ObjectDatasetVersion(name=name), amend=False)
+
+
+def test_round_trip_after_journal_checkpoints(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    check_round_trip(tmp_path=tmp_path,
+                     make_function=lambda name: make_dataset(
+                         root_path=root_path,
+                         working_directory=Path(tmp_path, name),
+                         version_storage=dv.FileSystemObjectDatasetVersionStorage(root_path=root_path,
+                                                                                  checkpoint_interval=2)))
+
+    version_storage = dv.FileSystemObjectDatasetVersionStorage(root_path=root_path, checkpoint_interval=2)
+    commit_names(version_storage=version_storage, names=["v3", "v4", "v5"])
+    reader = dv.FileSystemObjectDatasetVersionStorage(root_path=root_path)
+    assert [version.name for version in reader.log(dataset_name="dataset")] == \
+           ["v5", "v4", "v3", "second-amended", "first"]
+    assert [version.id for version in reader.log(dataset_name="dataset", limit=2, offset=1)] == [4, 3]
+    # replaced journals are removed, the journal of the last checkpoint is written by the next commit
+    assert set(get_storage_path(root_path=root_path).glob("*.jsonl")) <= {get_journal_path(root_path=root_path)}
+
+
+def test_torn_journal_entry_is_replaced(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    dataset = create_dataset(root_path=root_path, working_directory=Path(tmp_path, "working_directory"),
+                             labels=LABELS)
+
+    journal_path = get_journal_path(root_path=root_path)
+    with open(journal_path, "ab") as f:
+        f.write(b'{"name": "interrup')
+
+    assert dataset.log()[0].id == 1
+    committed_version = dataset.commit()
+
+    assert committed_version.id == 2
+    assert journal_path.read_bytes().count(b"\n") == 2
+    assert [version.id for version in dataset.log()] == [2, 1]
+
+
+def test_reads_do_not_write_to_the_storage(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    version_storage = dv.FileSystemObjectDatasetVersionStorage(root_path=root_path)
+    version_storage.init(dataset_name="dataset")
+    commit_names(version_storage=version_storage, names=["first", "second"])
+
+    # a copy without a lock file, e.g. a read-only mount of a storage
+    copied_root_path = Path(tmp_path, "copy")
+    shutil.copytree(get_storage_path(root_path=root_path), get_storage_path(root_path=copied_root_path),
+                    ignore=shutil.ignore_patterns("*.lock"))
+    storage_files = sorted(get_storage_path(root_path=copied_root_path).iterdir())
+
+    reader = dv.FileSystemObjectDatasetVersionStorage(root_path=copied_root_path)
+    assert reader.pull(dataset_name="dataset").name == "second"
+    assert reader.pull(dataset_name="dataset", dataset_version=dv.ObjectDatasetVersion(name="first")).id == 1
+    assert [version.id for version in reader.log(dataset_name="dataset")] == [2, 1]
+    assert sorted(get_storage_path(root_path=copied_root_path).iterdir()) == storage_files
+
+
+def test_checkpoints_without_journal_are_read_and_committed(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    storage_path = get_storage_path(root_path=root_path)
+    storage_path.mkdir(parents=True)
+    Path(storage_path, "version.json").write_text(json.dumps({"versions": [{"name": "first", "id": 1}]}))
+
+    version_storage = dv.FileSystemObjectDatasetVersionStorage(root_path=root_path)
+    assert version_storage.pull(dataset_name="dataset").name == "first"
+    commit_names(version_storage=version_storage, names=["second"])
+
+    reader = dv.FileSystemObjectDatasetVersionStorage(root_path=root_path)
+    assert [version.name for version in reader.log(dataset_name="dataset")] == ["second", "first"]
+
+
+def test_reads_see_consistent_versions_during_commits(tmp_path):
+    root_path = Path(tmp_path, "storage")
+    version_storage = dv.FileSystemObjectDatasetVersionStorage(root_path=root_path, checkpoint_interval=7)
+    version_storage.init(dataset_name="dataset")
+    commit_names(version_storage=version_storage, names=["v1"])
+    reader = dv.FileSystemObjectDatasetVersionStorage(root_path=root_path)
+    errors = []
+
+    def read():
+        try:
+            latest_version_id = 0
+            for _ in range(200):
+                version = reader.pull(dataset_name="dataset")
+                assert version.id >= latest_version_id and version.name == f"v{version.id}"
+                assert [logged.id for logged in reader.log(dataset_name="dataset", limit=3)][0] >= version.id
+                latest_version_id = version.id
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    commit_names(version_storage=version_storage, names=[f"v{version_id}" for version_id in range(2, 100)])
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert reader.pull(dataset_name="dataset").id == 99